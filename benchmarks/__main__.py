@@ -0,0 +1,101 @@
+import argparse
+import importlib
+import json
+import logging
+import sys
+from typing import Dict, List, Tuple
+
+from benchmarks.common import environment
+from daggr import logger
+
+SUITES = ["dag", "traversal", "runtime", "launch", "loader", "interfaces"]
+
+
+def _key(result: Dict) -> Tuple[str, str]:
+    return result["benchmark"], json.dumps(result["params"], sort_keys=True)
+
+
+def run(args: argparse.Namespace) -> int:
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        print(f"Unknown suites: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    # Step logs would dominate the timings of the runtime benchmarks.
+    logger.setLevel(logging.WARNING)
+
+    results: List[Dict] = []
+    for suite in args.suites or SUITES:
+        print(f"Running {suite} benchmarks...", file=sys.stderr)
+        module = importlib.import_module(f"benchmarks.bench_{suite}")
+        results += module.run(quick=args.quick)
+
+    report = {"environment": environment(), "quick": args.quick, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+    return 1 if any(r.get("superlinear") for r in results) else 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    with open(args.baseline, "r") as f:
+        baseline = {_key(r): r for r in json.load(f)["results"]}
+    with open(args.candidate, "r") as f:
+        candidate = {_key(r): r for r in json.load(f)["results"]}
+
+    regressions = 0
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before = baseline[key][args.metric]
+        after = candidate[key][args.metric]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "REGRESSION"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "improvement"
+        print(
+            f"{key[0]:<20} {key[1]:<60} {before:>11.6f}s {after:>11.6f}s "
+            f"{change:>+8.1%} {flag}"
+        )
+
+    for key in sorted(baseline.keys() ^ candidate.keys()):
+        print(f"{key[0]:<20} {key[1]:<60} only in one of the reports")
+
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run benchmark suites")
+    run_parser.add_argument(
+        "suites", nargs="*", metavar="suite", help=f"One of {', '.join(SUITES)}"
+    )
+    run_parser.add_argument("--quick", action="store_true", help="Smaller inputs")
+    run_parser.add_argument("--output", "-o", help="JSON report file")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="Compare two JSON reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument(
+        "--metric", default="min_seconds", choices=["min_seconds", "median_seconds"]
+    )
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown reported as a regression (default: 0.1)",
+    )
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
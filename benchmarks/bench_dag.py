@@ -0,0 +1,58 @@
+import random
+from typing import Dict, List
+
+from benchmarks.common import measure, result
+from daggr.core.dag import Dag, WorkflowDefinition
+
+
+def chain(size: int) -> Dict[str, Dict]:
+    steps: Dict[str, Dict] = {"step0": {}}
+    for i in range(1, size):
+        steps[f"step{i}"] = {"depends_on": [f"step{i - 1}"]}
+    return steps
+
+
+def fan_out(size: int) -> Dict[str, Dict]:
+    steps: Dict[str, Dict] = {"step0": {}}
+    for i in range(1, size):
+        steps[f"step{i}"] = {"depends_on": ["step0"]}
+    return steps
+
+
+def layered(size: int, seed: int = 42) -> Dict[str, Dict]:
+    rng = random.Random(seed)
+    steps: Dict[str, Dict] = {"step0": {}}
+    for i in range(1, size):
+        parents = rng.sample(range(max(0, i - 100), i), min(i, 3))
+        steps[f"step{i}"] = {"depends_on": [f"step{p}" for p in parents]}
+    return steps
+
+
+SHAPES = {"chain": chain, "fan-out": fan_out, "layered": layered}
+
+
+def _definition(steps: Dict[str, Dict]) -> WorkflowDefinition:
+    # Dag fills in the script of each step, copy so each repetition starts clean.
+    return WorkflowDefinition(
+        dag="bench",
+        steps={name: dict(step) for name, step in steps.items()},
+        path="",
+    )
+
+
+def run(quick: bool = False) -> List[Dict]:
+    sizes = [100, 1_000, 10_000] if quick else [100, 1_000, 10_000, 100_000]
+    results = []
+    for shape, generate in SHAPES.items():
+        for size in sizes:
+            steps = generate(size)
+            definitions: List[WorkflowDefinition] = []
+            stats = measure(
+                lambda: Dag(definitions.pop()),
+                repeat=3 if size >= 100_000 else 5,
+                setup=lambda: definitions.append(_definition(steps)),
+            )
+            results.append(
+                result("dag_construction", {"shape": shape, "steps": size}, stats)
+            )
+    return results
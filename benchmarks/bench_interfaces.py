@@ -0,0 +1,111 @@
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.common import measure, result
+from daggr.core.compression import CodecFactory
+from daggr.core.decorators import (
+    InterfaceFactory,
+    PickleProtocolNotSupported,
+    SharedMemoryInterface,
+    UnsupportedOutputType,
+)
+
+
+def _payloads(size: int) -> Dict[str, Callable[[], Any]]:
+    payloads: Dict[str, Callable[[], Any]] = {
+        "bytes": lambda: b"x" * size,
+        "list": lambda: list(range(size // 8)),
+        "records": lambda: [
+            {"id": i, "name": f"name{i}", "score": i * 0.5} for i in range(size // 64)
+        ],
+        "columns": lambda: {
+            "id": list(range(size // 16)),
+            "score": [i * 0.5 for i in range(size // 16)],
+        },
+    }
+    try:
+        import numpy
+
+        payloads["ndarray"] = lambda: numpy.arange(size // 8, dtype="float64")
+    except ImportError:
+        pass
+    return payloads
+
+
+def _variants() -> List[Tuple[str, Dict[str, Any]]]:
+    variants: List[Tuple[str, Dict[str, Any]]] = [
+        (interface, {}) for interface in InterfaceFactory.INTERFACES
+    ]
+    for interface, io_class in InterfaceFactory.INTERFACES.items():
+        if io_class.compressible:
+            variants += [(interface, {"compression": c}) for c in CodecFactory.CODECS]
+    return variants
+
+
+def _streamed(value: Any) -> Callable[[], Any]:
+    step = max(1, len(value) // 16)
+    return lambda: (value[i : i + step] for i in range(0, len(value), step))
+
+
+def _consume(value: Any) -> None:
+    if hasattr(value, "__iter__") and not hasattr(value, "__len__"):
+        for _ in value:
+            pass
+    elif type(value).__name__ == "ChunkedOutput":
+        for _ in value:
+            pass
+
+
+def run(quick: bool = False) -> List[Dict]:
+    sizes = [1_024, 1_024 ** 2] if quick else [1_024, 1_024 ** 2, 64 * 1_024 ** 2]
+    results = []
+    with tempfile.TemporaryDirectory() as path:
+        for interface, options in _variants():
+            try:
+                io = InterfaceFactory.create(interface, **options)
+            except PickleProtocolNotSupported:
+                continue
+            output_file = str(Path(path) / f"output.{io.extension()}")
+            for size in sizes:
+                for payload_name, payload in _payloads(size).items():
+                    value = payload()
+                    if io.streaming and isinstance(value, dict):
+                        continue
+                    make_value = _streamed(value) if io.streaming else lambda: value
+                    attributes: Dict[str, Any] = {}
+
+                    def write() -> None:
+                        if attributes:
+                            io.release(attributes)
+                        attributes.clear()
+                        attributes.update(io.write(make_value(), output_file) or {})
+
+                    try:
+                        write()
+                    except (UnsupportedOutputType, ImportError):
+                        continue
+
+                    params = {
+                        "interface": interface,
+                        **options,
+                        "payload": payload_name,
+                        "bytes": size,
+                    }
+                    repeat = 3 if size > 1_024 ** 2 else 5
+                    results.append(
+                        result("interface_write", params, measure(write, repeat))
+                    )
+                    results.append(
+                        result(
+                            "interface_read",
+                            params,
+                            measure(
+                                lambda: _consume(io.read(output_file, attributes)),
+                                repeat,
+                            ),
+                        )
+                    )
+                    io.release(attributes)
+                    SharedMemoryInterface.detach_all()
+    return results
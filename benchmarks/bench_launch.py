@@ -0,0 +1,62 @@
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.bench_dag import _definition, fan_out
+from benchmarks.common import measure, result
+from daggr.core.dag import Dag, DagRun, LocalRuntime
+from daggr.core.executors import SubprocessExecutor
+
+
+def _parameters(size: int) -> Dict[str, str]:
+    return {"payload": "x" * size}
+
+
+def run(quick: bool = False) -> List[Dict]:
+    steps_count = 200 if quick else 1_000
+    launches = 10 if quick else 50
+    results = []
+    with tempfile.TemporaryDirectory() as path:
+        for parameters_size in [100, 256 * 1_024]:
+            steps = fan_out(steps_count)
+            for name in steps:
+                steps[name]["parameters"] = _parameters(parameters_size)
+            definition = _definition(steps)
+            definition.path = path
+            runtime = LocalRuntime(DagRun(Dag(definition)))
+            dag_steps = list(runtime.dag_run.dag.steps.values())
+
+            def create_envs() -> None:
+                for step in dag_steps:
+                    runtime._create_env(step, runtime.dag_run)
+                    runtime._script_path(step.name)
+
+            stats = measure(create_envs)
+            stats["per_step_seconds"] = stats["median_seconds"] / steps_count
+            results.append(
+                result(
+                    "step_environment",
+                    {"steps": steps_count, "parameters_bytes": parameters_size},
+                    stats,
+                )
+            )
+
+        script = Path(path) / "noop.py"
+        script.write_text("")
+        definition = _definition({"noop": {}})
+        definition.path = path
+        runtime = LocalRuntime(DagRun(Dag(definition)))
+        step = runtime.dag_run.dag.steps["noop"]
+        executor = SubprocessExecutor()
+
+        def launch() -> None:
+            for _ in range(launches):
+                completed = executor.run(
+                    str(script), runtime._create_env(step, runtime.dag_run)
+                )
+                assert completed.returncode == 0, completed.stderr
+
+        stats = measure(launch, repeat=3, min_total_seconds=0)
+        stats["per_step_seconds"] = stats["median_seconds"] / launches
+        results.append(result("step_launch", {"launches": launches}, stats))
+    return results
@@ -0,0 +1,43 @@
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import yaml
+
+from benchmarks.bench_dag import layered
+from benchmarks.common import measure, result
+from daggr.workflow_loader.yaml_definition_loader import YamlDefinitionLoader
+
+
+def _write_workflow(path: Path, size: int) -> Path:
+    steps = {}
+    for name, step in layered(size).items():
+        steps[name] = {**step, "parameters": {"name": name, "threshold": 0.5}}
+    workflow_file = path / "workflow.yml"
+    with open(workflow_file, "w") as f:
+        yaml.safe_dump({"dag": "bench", "steps": steps}, f)
+    return workflow_file
+
+
+def run(quick: bool = False) -> List[Dict]:
+    sizes = [10, 100, 1_000] if quick else [10, 100, 1_000, 10_000]
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as path:
+            workflow_file = _write_workflow(Path(path), size)
+            cache_path = Path(path) / ".daggr"
+
+            def load() -> None:
+                YamlDefinitionLoader(str(workflow_file)).load()
+
+            stats = measure(
+                load,
+                setup=lambda: shutil.rmtree(cache_path, ignore_errors=True),
+                repeat=3 if size >= 10_000 else 5,
+            )
+            results.append(result("yaml_load", {"steps": size, "cached": False}, stats))
+
+            stats = measure(load)
+            results.append(result("yaml_load", {"steps": size, "cached": True}, stats))
+    return results
@@ -0,0 +1,88 @@
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.bench_dag import _definition, chain, fan_out
+from benchmarks.common import measure, result
+from daggr.core.dag import Dag, DagRun, LocalRuntime, StepState
+from daggr.core.executors import StepExecutor
+from daggr.core.history import RunHistory
+from daggr.core.resources import ResourceAllocation
+from daggr.core.run_state import RunStateStore
+
+
+class NoopExecutor(StepExecutor):
+    def run(
+        self,
+        script_path: str,
+        env: Dict[str, str],
+        allocation: Optional[ResourceAllocation] = None,
+    ) -> subprocess.CompletedProcess:
+        return subprocess.CompletedProcess(
+            args=[script_path], returncode=0, stdout="", stderr=""
+        )
+
+
+def _run_steps(runtime: LocalRuntime) -> None:
+    for step_name in runtime.dag_run.dag.topological_order:
+        runtime.run_step(step_name)
+
+
+def run(quick: bool = False) -> List[Dict]:
+    size = 200 if quick else 1_000
+    results = []
+    with tempfile.TemporaryDirectory() as path:
+        for shape, generate in {"chain": chain, "fan-out": fan_out}.items():
+            steps = generate(size)
+            runtimes: List[LocalRuntime] = []
+
+            def setup() -> None:
+                definition = _definition(steps)
+                definition.path = path
+                runtimes.append(
+                    LocalRuntime(DagRun(Dag(definition)), executor=NoopExecutor())
+                )
+
+            stats = measure(lambda: _run_steps(runtimes.pop()), setup=setup)
+            stats["per_step_seconds"] = stats["median_seconds"] / size
+            results.append(
+                result("run_step_overhead", {"shape": shape, "steps": size}, stats)
+            )
+
+            def execute() -> None:
+                runtime = runtimes.pop()
+                runtime.execute()
+                assert all(
+                    s.state == StepState.SUCCESSFUL
+                    for s in runtime.dag_run.step_runs.values()
+                )
+
+            stats = measure(execute, setup=setup)
+            stats["per_step_seconds"] = stats["median_seconds"] / size
+            results.append(
+                result("execute_overhead", {"shape": shape, "steps": size}, stats)
+            )
+
+            def setup_persisted() -> None:
+                definition = _definition(steps)
+                definition.path = path
+                runtimes.append(
+                    LocalRuntime(
+                        DagRun(Dag(definition)),
+                        executor=NoopExecutor(),
+                        run_state_store=RunStateStore(Path(path) / "runs"),
+                        history=RunHistory(Path(path) / "history.db"),
+                    )
+                )
+
+            stats = measure(execute, setup=setup_persisted)
+            stats["per_step_seconds"] = stats["median_seconds"] / size
+            results.append(
+                result(
+                    "execute_overhead",
+                    {"shape": shape, "steps": size, "persisted": True},
+                    stats,
+                )
+            )
+    return results
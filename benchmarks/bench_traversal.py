@@ -0,0 +1,96 @@
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+from benchmarks.bench_dag import _definition, chain, fan_out
+from benchmarks.common import measure, result
+from daggr.core.dag import Dag, DagRun, LocalRuntime, StepState
+from daggr.core.run_state import RunStateStore
+
+# Largest growth of the time per step between the smallest and the largest
+# DAG before a case is reported as superlinear.
+MAX_PER_STEP_GROWTH = 3.0
+
+
+def diamonds(size: int) -> Dict[str, Dict]:
+    steps: Dict[str, Dict] = {"step0": {}}
+    for i in range(1, size // 3 + 1):
+        steps[f"left{i}"] = {"depends_on": [f"step{i - 1}"]}
+        steps[f"right{i}"] = {"depends_on": [f"step{i - 1}"]}
+        steps[f"step{i}"] = {"depends_on": [f"left{i}", f"right{i}"]}
+    return steps
+
+
+SHAPES = {"chain": chain, "diamonds": diamonds, "fan-out": fan_out}
+
+
+def _runtime(
+    steps: Dict[str, Dict], failing_root: bool, store: Optional[RunStateStore] = None
+) -> LocalRuntime:
+    dag_run = DagRun(Dag(_definition(steps)))
+    runtime = LocalRuntime(dag_run, run_state_store=store)
+
+    def run_step(step_name: str) -> StepState:
+        state = StepState.FAILED if failing_root else StepState.SUCCESSFUL
+        dag_run.step_runs[step_name].state = state
+        if store:
+            store.record_step(dag_run, step_name)
+        return state
+
+    runtime.run_step = run_step
+    return runtime
+
+
+def _check_scaling(results: List[Dict]) -> None:
+    # The time per step must stay roughly constant as the DAG grows, anything
+    # quadratic in the number of steps shows up here long before in real runs.
+    groups: Dict[str, List[Dict]] = {}
+    for r in results:
+        params = {k: v for k, v in r["params"].items() if k != "steps"}
+        groups.setdefault(repr(sorted(params.items())), []).append(r)
+    for group in groups.values():
+        smallest = min(group, key=lambda r: r["params"]["steps"])
+        largest = max(group, key=lambda r: r["params"]["steps"])
+        growth = (largest["min_seconds"] / largest["params"]["steps"]) / (
+            smallest["min_seconds"] / smallest["params"]["steps"]
+        )
+        largest["per_step_growth"] = growth
+        largest["superlinear"] = growth > MAX_PER_STEP_GROWTH
+        if largest["superlinear"]:
+            print(
+                f"traversal {largest['params']}: time per step grew {growth:.1f}x "
+                f"from {smallest['params']['steps']} steps",
+                file=sys.stderr,
+            )
+
+
+def run(quick: bool = False) -> List[Dict]:
+    sizes = [1_000, 10_000] if quick else [1_000, 10_000, 100_000]
+    results = []
+    for shape, generate in SHAPES.items():
+        for size in sizes:
+            steps = generate(size)
+            for failing_root, persisted in (
+                (False, False),
+                (True, False),
+                (False, True),
+            ):
+                with tempfile.TemporaryDirectory() as path:
+                    store = RunStateStore(path) if persisted else None
+                    runtimes: List[LocalRuntime] = []
+                    stats = measure(
+                        lambda: runtimes.pop().execute(),
+                        repeat=3,
+                        setup=lambda: runtimes.append(
+                            _runtime(steps, failing_root, store)
+                        ),
+                    )
+                params = {
+                    "shape": shape,
+                    "steps": len(steps),
+                    "failing_root": failing_root,
+                    "persisted": persisted,
+                }
+                results.append(result("traversal", params, stats))
+    _check_scaling(results)
+    return results
@@ -0,0 +1,75 @@
+import gc
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+def measure(
+    func: Callable[[], Any],
+    repeat: int = 5,
+    setup: Optional[Callable[[], Any]] = None,
+    warmup: int = 1,
+    min_total_seconds: float = 0.5,
+    max_repeat: int = 200,
+) -> Dict[str, float]:
+    # Fast cases are repeated until min_total_seconds is spent timing them, so
+    # that their minimum is taken over enough samples to be stable.
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+
+    timings: List[float] = []
+    while len(timings) < repeat or (
+        sum(timings) < min_total_seconds and len(timings) < max_repeat
+    ):
+        if setup:
+            setup()
+        gc.collect()
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    return {
+        "min_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "repeat": len(timings),
+    }
+
+
+def result(benchmark: str, params: Dict[str, Any], stats: Dict[str, Any]) -> Dict:
+    return {"benchmark": benchmark, "params": params, **stats}
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "hash_seed": os.getenv("PYTHONHASHSEED"),
+    }
@@ -1,8 +1,11 @@
 import os
+from pathlib import Path
 
 import click
 
 from daggr.core.dag import StepState
+from daggr.core.history import RunHistory
+from daggr.core.profiling import critical_path, load_profile, slowest_steps
 from daggr.core.runner import Runner
 
 CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
@@ -37,9 +40,149 @@ def daggr():
     default=f"local",
     show_default=True,
 )
-def run(workflow, format, runtime):
+@click.option(
+    "--max-workers",
+    "-j",
+    help="Maximum number of steps executed at the same time by parallel runtimes "
+    "[default: number of CPUs]",
+    type=click.IntRange(min=1),
+    default=None,
+)
+@click.option(
+    "--no-cache",
+    help="Execute every step even if a cached result is available",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--cache-max-size",
+    help="Maximum size of the step cache in MB, least recently used entries "
+    "are evicted first",
+    type=click.IntRange(min=0),
+    default=1024,
+    show_default=True,
+)
+@click.option(
+    "--resume",
+    help="Id of a previous DAG run to resume, only steps that did not succeed "
+    "(or whose outputs changed) are executed",
+    default=None,
+)
+@click.option(
+    "--changed",
+    help="Execute only the steps whose script or definition changed since the "
+    "previous run, and the steps downstream of them",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--target",
+    "-t",
+    "targets",
+    help="Execute only this step and the steps it depends on, can be repeated",
+    multiple=True,
+)
+@click.option(
+    "--from",
+    "sources",
+    help="Execute only this step and the steps downstream of it, reading the "
+    "outputs of other steps from disk, can be repeated",
+    multiple=True,
+)
+@click.option(
+    "--executor",
+    "-e",
+    help="How each step script is executed: a new interpreter per step "
+    "(subprocess) or a pool of long-lived interpreters (worker-pool)",
+    type=click.Choice(["subprocess", "worker-pool"]),
+    default="subprocess",
+    show_default=True,
+)
+@click.option(
+    "--worker-max-tasks",
+    help="Replace a worker-pool process after it executed this many steps",
+    type=click.IntRange(min=1),
+    default=None,
+)
+@click.option(
+    "--worker-max-memory",
+    help="Replace a worker-pool process once its resident memory exceeds this "
+    "many MB",
+    type=click.IntRange(min=1),
+    default=None,
+)
+@click.option(
+    "--cpus",
+    help="Number of CPUs that steps declaring resources can use [default: all]",
+    type=click.IntRange(min=1),
+    default=None,
+)
+@click.option(
+    "--memory",
+    help="Memory in MB that steps declaring resources can use "
+    "[default: physical memory]",
+    type=click.IntRange(min=1),
+    default=None,
+)
+@click.option(
+    "--profile",
+    help="Record the time, CPU, memory and IO of each step in .daggr/profiles",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--history",
+    help="SQLite database where the run and its steps are recorded "
+    "[default: .daggr/history.db]",
+    default=None,
+)
+def run(
+    workflow,
+    format,
+    runtime,
+    max_workers,
+    no_cache,
+    cache_max_size,
+    resume,
+    changed,
+    targets,
+    sources,
+    executor,
+    worker_max_tasks,
+    worker_max_memory,
+    cpus,
+    memory,
+    profile,
+    history,
+):
     """Run a DAG from a workflow definition file"""
-    r = Runner(format, f"{os.getcwd()}/{workflow}", runtime)
+    if resume and changed:
+        raise click.UsageError("--resume and --changed cannot be used together.")
+    if runtime == "async" and executor == "worker-pool":
+        raise click.UsageError(
+            "The async runtime starts a new interpreter per step, "
+            "--executor worker-pool cannot be used with it."
+        )
+
+    r = Runner(
+        format,
+        f"{os.getcwd()}/{workflow}",
+        runtime,
+        max_workers=max_workers,
+        use_cache=not no_cache,
+        cache_max_size_mb=cache_max_size,
+        resume_run_id=resume,
+        executor=executor,
+        worker_max_tasks=worker_max_tasks,
+        worker_max_memory_mb=worker_max_memory,
+        max_cpus=cpus,
+        max_memory_mb=memory,
+        profile=profile,
+        history_path=history,
+        only_changed=changed,
+        targets=list(targets),
+        sources=list(sources),
+    )
     dag_run = r.run()
 
     for step_name, data in dag_run.step_runs.items():
@@ -53,5 +196,126 @@ def run(workflow, format, runtime):
             click.echo(data.stderr)
             click.echo(f" ======== ")
 
+    click.echo(f'DAG run id: "{dag_run.run_id}"')
+
+
+@click.command(context_settings=CONTEXT_SETTINGS)
+@click.option(
+    "--workflow",
+    "-w",
+    help="Workflow definition file",
+    default=f"{os.getcwd()}/workflow.yml",
+    show_default=True,
+)
+@click.option(
+    "--run-id",
+    help="Id of the profiled DAG run [default: latest profiled run]",
+    default=None,
+)
+@click.option(
+    "--top",
+    "-n",
+    help="Number of slowest steps shown",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+)
+def profile(workflow, run_id, top):
+    """Show the critical path and slowest steps of a profiled DAG run"""
+    profiles_path = Path(os.getcwd()) / workflow
+    profile = load_profile(
+        str(profiles_path.parent / ".daggr" / "profiles"), run_id=run_id
+    )
+
+    path, duration = critical_path(profile)
+    click.echo(f'DAG run "{profile["run_id"]}" of DAG "{profile["dag"]}"')
+    click.echo(f"Critical path ({duration:.3f}s): {' -> '.join(path)}")
+    click.echo("")
+    click.echo(
+        f"{'step':<30} {'state':<10} {'wall':>9} {'user':>9} {'sys':>9} "
+        f"{'rss MB':>8} {'read MB':>8} {'write MB':>8}"
+    )
+    for name, step in slowest_steps(profile, top):
+        click.echo(
+            f"{name:<30} {step['state']:<10} "
+            f"{_seconds(step.get('wall_seconds'))} "
+            f"{_seconds(step.get('user_seconds'))} "
+            f"{_seconds(step.get('system_seconds'))} "
+            f"{_megabytes(step.get('max_rss_kb'), 1024):>8} "
+            f"{_megabytes(step['bytes_read'], 2**20):>8} "
+            f"{_megabytes(step['bytes_written'], 2**20):>8}"
+        )
+        for phase, seconds in step["phases"].items():
+            click.echo(f"  {phase:<28} {'':<10} {_seconds(seconds)}")
+
+
+@click.command(context_settings=CONTEXT_SETTINGS)
+@click.option(
+    "--workflow",
+    "-w",
+    help="Workflow definition file",
+    default=f"{os.getcwd()}/workflow.yml",
+    show_default=True,
+)
+@click.option(
+    "--history",
+    help="SQLite database where runs are recorded [default: .daggr/history.db]",
+    default=None,
+)
+@click.option(
+    "--dag",
+    help="Name of the DAG [default: DAG of the latest recorded run]",
+    default=None,
+)
+@click.option("--step", "-s", help="Only show this step", default=None)
+@click.option(
+    "--runs",
+    "-n",
+    help="Number of latest runs of the DAG included",
+    type=click.IntRange(min=1),
+    default=30,
+    show_default=True,
+)
+@click.option(
+    "--percentile",
+    "-p",
+    help="Percentile of the step durations shown",
+    type=click.FloatRange(min=0, max=100),
+    default=95,
+    show_default=True,
+)
+def history(workflow, history, dag, step, runs, percentile):
+    """Show step duration statistics over the latest recorded DAG runs"""
+    workflow_path = Path(os.getcwd()) / workflow
+    run_history = RunHistory(history or workflow_path.parent / ".daggr" / "history.db")
+    dag = dag or run_history.latest_dag()
+    if not dag:
+        raise click.ClickException(f"No runs recorded in {run_history.path}")
+
+    recorded_runs = run_history.runs(dag, runs)
+    click.echo(f'Last {len(recorded_runs)} runs of DAG "{dag}"')
+    click.echo("")
+    p = f"p{percentile:g}"
+    click.echo(
+        f"{'step':<30} {'runs':>5} {'failed':>6} {'mean':>9} {'p50':>9} "
+        f"{p:>9} {'max':>9}"
+    )
+    for stats in run_history.step_statistics(dag, runs, percentile, step):
+        click.echo(
+            f"{stats.step:<30} {stats.runs:>5} {stats.failures:>6} "
+            f"{_seconds(stats.mean_seconds)} {_seconds(stats.p50_seconds)} "
+            f"{_seconds(stats.percentile_seconds)} {_seconds(stats.max_seconds)}"
+        )
+
+
+def _seconds(value) -> str:
+    return f"{value:>8.3f}s" if value is not None else f"{'-':>9}"
+
+
+def _megabytes(value, unit) -> str:
+    return f"{value / unit:.1f}" if value is not None else "-"
+
 
 daggr.add_command(run)
+daggr.add_command(profile)
+daggr.add_command(history)
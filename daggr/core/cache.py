@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from daggr import logger
+from daggr.core.decorators import (
+    InputLoader,
+    OutputMetadataInterface,
+    has_transient_outputs,
+)
+
+if TYPE_CHECKING:
+    from daggr.core.dag import Step
+
+RESULT_FILE = "result.json"
+OUTPUTS_DIR = "outputs"
+
+
+@dataclass
+class CachedResult:
+    stdout: Optional[str]
+    stderr: Optional[str]
+
+
+class StepCache:
+    path: Path
+    max_size_bytes: Optional[int]
+
+    def __init__(self, path: str, max_size_bytes: Optional[int] = None) -> None:
+        self.path = Path(path)
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+
+    def key(self, step: Step, script_path: Path, outputs_path: Path) -> Optional[str]:
+        try:
+            script = script_path.read_bytes()
+        except OSError:
+            return None
+
+        digest = hashlib.sha256()
+        digest.update(script)
+        digest.update(
+            json.dumps(
+                {
+                    "type": step.type,
+                    "parameters": step.parameters if step.parameters else {},
+                    "inputs": step.inputs if step.inputs else {},
+                    "map_over": step.map_over,
+                },
+                sort_keys=True,
+            ).encode()
+        )
+        for upstream_step in sorted(_upstream_steps(step)):
+            digest.update(upstream_step.encode())
+            for content_hash in _output_hashes(outputs_path / upstream_step):
+                digest.update(content_hash.encode())
+
+        return digest.hexdigest()
+
+    def restore(self, key: str, step_output_path: Path) -> Optional[CachedResult]:
+        entry = self.path / key
+        result_file = entry / RESULT_FILE
+        if not result_file.is_file():
+            return None
+
+        with open(result_file, "r") as f:
+            result = CachedResult(**json.load(f))
+
+        cached_outputs = entry / OUTPUTS_DIR
+        if cached_outputs.is_dir():
+            if step_output_path.exists():
+                shutil.rmtree(step_output_path)
+            shutil.copytree(
+                cached_outputs, step_output_path, copy_function=_link_or_copy
+            )
+
+        os.utime(result_file)
+        return result
+
+    def store(
+        self,
+        key: str,
+        step_output_path: Path,
+        stdout: Optional[str],
+        stderr: Optional[str],
+    ) -> None:
+        entry = self.path / key
+        if entry.exists() or has_transient_outputs(step_output_path):
+            return
+
+        if self.max_size_bytes is not None and step_output_path.is_dir():
+            size = _directory_size(step_output_path)
+            if size > self.max_size_bytes:
+                logger.info(
+                    f"Outputs of {step_output_path.name} ({size} bytes) exceed the "
+                    "cache size, they will not be cached."
+                )
+                return
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_entry = self.path / f".tmp-{uuid.uuid4().hex}"
+        tmp_entry.mkdir()
+        if step_output_path.is_dir():
+            shutil.copytree(
+                step_output_path, tmp_entry / OUTPUTS_DIR, copy_function=_link_or_copy
+            )
+        with open(tmp_entry / RESULT_FILE, "w") as f:
+            json.dump({"stdout": stdout, "stderr": stderr}, f)
+
+        try:
+            os.rename(tmp_entry, entry)
+        except OSError:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+
+        self.evict()
+
+    def evict(self) -> None:
+        if self.max_size_bytes is None:
+            return
+
+        with self._lock:
+            entries: List[Tuple[float, int, Path]] = []
+            for entry in self.path.iterdir():
+                result_file = entry / RESULT_FILE
+                if not result_file.is_file():
+                    continue
+                entries.append(
+                    (result_file.stat().st_mtime, _directory_size(entry), entry)
+                )
+
+            total_size = sum(size for _, size, _ in entries)
+            for _, size, entry in sorted(entries, key=lambda e: e[0]):
+                if total_size <= self.max_size_bytes:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total_size -= size
+                logger.info(f'Evicted cache entry "{entry.name}".')
+
+
+def detach_outputs(step_output_path: Path) -> None:
+    # Cached outputs are hard links, so files shared with the cache are removed
+    # before a step runs instead of being overwritten in place.
+    if not step_output_path.is_dir():
+        return
+    for output_file in step_output_path.rglob("*"):
+        if output_file.is_file() and output_file.stat().st_nlink > 1:
+            output_file.unlink()
+
+
+def _link_or_copy(source: str, destination: str) -> None:
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def _upstream_steps(step: Step) -> List[str]:
+    upstream_steps = set(step.depends_on)
+    for input_definition in (step.inputs or {}).values():
+        upstream_step = InputLoader.upstream_step(str(input_definition))
+        if upstream_step:
+            upstream_steps.add(upstream_step)
+    return list(upstream_steps)
+
+
+def _output_hashes(step_output_path: Path) -> List[str]:
+    metadata_file = step_output_path / ".daggr"
+    if not metadata_file.is_file():
+        return []
+    metadata = OutputMetadataInterface.read(str(metadata_file))
+    return [f"{o.name}:{o.content_hash}" for o in metadata.outputs]
+
+
+def _directory_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
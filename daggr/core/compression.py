@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import bz2
+import gzip
+import lzma
+from abc import ABC, abstractmethod
+from typing import IO, Dict, Optional, Type
+
+
+class Codec(ABC):
+    default_level: Optional[int] = None
+
+    @abstractmethod
+    def open(self, path: str, mode: str, level: Optional[int] = None) -> IO[bytes]:
+        raise NotImplementedError()
+
+
+class ZlibCodec(Codec):
+    default_level = 6
+
+    def open(self, path: str, mode: str, level: Optional[int] = None) -> IO[bytes]:
+        # Deflate streams framed as gzip, which the stdlib reads and writes
+        # incrementally through a file object.
+        return gzip.open(
+            path, mode, compresslevel=self.default_level if level is None else level
+        )
+
+
+class LzmaCodec(Codec):
+    def open(self, path: str, mode: str, level: Optional[int] = None) -> IO[bytes]:
+        if mode.startswith("r"):
+            return lzma.open(path, mode)
+        return lzma.open(path, mode, preset=level)
+
+
+class Bz2Codec(Codec):
+    default_level = 9
+
+    def open(self, path: str, mode: str, level: Optional[int] = None) -> IO[bytes]:
+        return bz2.open(
+            path, mode, compresslevel=self.default_level if level is None else level
+        )
+
+
+class CodecNotImplemented(Exception):
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __str__(self) -> str:
+        return (
+            f'Compression codec "{self.name}" is not registered, available codecs: '
+            f"{', '.join(CodecFactory.CODECS)}"
+        )
+
+
+class CodecFactory:
+    CODECS: Dict[str, Type[Codec]] = {
+        "zlib": ZlibCodec,
+        "lzma": LzmaCodec,
+        "bz2": Bz2Codec,
+    }
+
+    @staticmethod
+    def register(name: str, codec: Type[Codec]) -> None:
+        CodecFactory.CODECS[name] = codec
+
+    @staticmethod
+    def create(name: str) -> Codec:
+        if name not in CodecFactory.CODECS:
+            raise CodecNotImplemented(name)
+
+        return CodecFactory.CODECS[name]()
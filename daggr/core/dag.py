@@ -1,17 +1,54 @@
 from __future__ import annotations
 
+import asyncio
+import heapq
+import importlib.util
 import json
 import os
+import shutil
 import subprocess
 import sys
+import threading
+import traceback
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from array import array
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
 from datetime import datetime
 from enum import Enum, auto
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from uuid import uuid4
 
 from daggr import logger
+from daggr.core.cache import StepCache, detach_outputs
+from daggr.core.decorators import (
+    InputLoader,
+    count_partitions,
+    gather_partition_outputs,
+    release_transient_outputs,
+    write_step_output,
+)
+from daggr.core.executors import StepExecutor, SubprocessExecutor
+from daggr.core.graph import CompiledDag
+from daggr.core.hashing import stat_directory
+from daggr.core.profiling import Profiler, ResourceUsage
+from daggr.core.resources import ResourceAllocation, ResourcePool, ResourceRequest
+
+if TYPE_CHECKING:
+    from daggr.core.history import RunHistory
+    from daggr.core.run_state import RunStateStore
 
 
 @dataclass
@@ -27,11 +64,31 @@ class DependenciesNotDefinedYet(Exception):
 
     def __str__(self) -> str:
         return (
-            f"The step {self.dependency_name} has not been configured yet.\n"
-            "Only after its definition it can be used as a dependency."
+            f"The step {self.dependency_name} is used as a dependency "
+            "but it is not defined."
+        )
+
+
+class InvalidMapStep(Exception):
+    def __init__(self, step_name: str, input_name: str):
+        self.step_name = step_name
+        self.input_name = input_name
+
+    def __str__(self) -> str:
+        return (
+            f'The step {self.step_name} maps over "{self.input_name}" '
+            "which is not an input read from the output of another step."
         )
 
 
+class InlineMapStepNotSupported(Exception):
+    def __init__(self, step_name: str):
+        self.step_name = step_name
+
+    def __str__(self) -> str:
+        return f'Step "{self.step_name}" is inline and cannot have map_over'
+
+
 class DependencyOnSelfNotAllowed(Exception):
     def __init__(self, dependency_name: str):
         self.dependency_name = dependency_name
@@ -40,11 +97,20 @@ class DependencyOnSelfNotAllowed(Exception):
         return f'Step "{self.dependency_name}"  cannot have dependency on itself'
 
 
+class StepNotFound(Exception):
+    def __init__(self, step_name: str):
+        self.step_name = step_name
+
+    def __str__(self) -> str:
+        return f'Step "{self.step_name}" is not defined in the workflow'
+
+
 class Dag:
     name: str
     root_steps: List[str]
     steps: Dict[str, Step]
     definition_path: str
+    graph: CompiledDag
 
     def __init__(self, definition: WorkflowDefinition) -> None:
         self.name = definition.dag
@@ -58,13 +124,61 @@ class Dag:
             self.steps[name] = step
             if not step.depends_on or len(step.depends_on) == 0:
                 self.root_steps.append(name)
-            else:
-                for dependency_name in step.depends_on:
-                    if dependency_name == step.name:
-                        raise DependencyOnSelfNotAllowed(dependency_name)
-                    if dependency_name not in self.steps.keys():
-                        raise DependenciesNotDefinedYet(dependency_name)
-                    self.steps[dependency_name].dependency_of.append(name)
+
+        for name, step in self.steps.items():
+            if step.map_over and step.type == INLINE_STEP_TYPE:
+                raise InlineMapStepNotSupported(name)
+            if step.map_over and not str(step.inputs.get(step.map_over, "")).startswith(
+                "output:"
+            ):
+                raise InvalidMapStep(name, step.map_over)
+            for dependency_name in step.depends_on:
+                if dependency_name == step.name:
+                    raise DependencyOnSelfNotAllowed(dependency_name)
+                if dependency_name not in self.steps:
+                    raise DependenciesNotDefinedYet(dependency_name)
+                self.steps[dependency_name].dependency_of.append(name)
+
+        self.graph = CompiledDag(
+            list(self.steps),
+            (
+                (dependency_name, name)
+                for name, step in self.steps.items()
+                for dependency_name in step.depends_on
+            ),
+        )
+
+    @property
+    def topological_order(self) -> List[str]:
+        return [self.graph.names[node] for node in self.graph.topological_order]
+
+    @property
+    def levels(self) -> List[List[str]]:
+        return [
+            [self.graph.names[node] for node in level] for level in self.graph.levels
+        ]
+
+    @property
+    def outputs_path(self) -> Path:
+        return Path(self.definition_path) / "outputs"
+
+    def _nodes(self, step_names: List[str]) -> List[int]:
+        for name in step_names:
+            if name not in self.graph.ids:
+                raise StepNotFound(name)
+        return [self.graph.ids[name] for name in step_names]
+
+    def ancestors(self, step_names: List[str]) -> Set[str]:
+        return {
+            self.graph.names[node]
+            for node in self.graph.ancestors(self._nodes(step_names))
+        }
+
+    def descendants(self, step_names: List[str]) -> Set[str]:
+        return {
+            self.graph.names[node]
+            for node in self.graph.descendants(self._nodes(step_names))
+        }
 
 
 class StepState(Enum):
@@ -75,16 +189,49 @@ class StepState(Enum):
     CANCELLED = auto()
 
 
+FINISHED_STATES = (StepState.SUCCESSFUL, StepState.FAILED, StepState.CANCELLED)
+
+INLINE_STEP_TYPE = "inline"
+
+
 class DagRun:
     dag: Dag
+    run_id: str
     step_runs: Dict[str, StepRun]
 
     def __init__(self, dag: Dag) -> None:
         self.dag = dag
+        self.run_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid4().hex[:8]}"
         self.step_runs = {}
         for name, step in self.dag.steps.items():
             self.step_runs[name] = StepRun(step)
 
+    def select(
+        self,
+        targets: Optional[List[str]] = None,
+        sources: Optional[List[str]] = None,
+    ) -> Set[str]:
+        selected = set(self.dag.steps)
+        if targets:
+            selected &= self.dag.ancestors(targets)
+        if sources:
+            selected &= self.dag.descendants(sources)
+
+        for name, step_run in self.step_runs.items():
+            if name in selected or step_run.reused:
+                continue
+            step_output_path = self.dag.outputs_path / name
+            if step_output_path.is_dir():
+                step_run.outputs = stat_directory(step_output_path)
+            elif any(s in selected for s in step_run.step.dependency_of):
+                logger.warning(
+                    f'Step "{name}" is not selected and has no outputs, the steps '
+                    "depending on it may fail."
+                )
+            step_run.state = StepState.SUCCESSFUL
+            step_run.reused = True
+        return selected
+
 
 class StepRun:
     step: Step
@@ -93,17 +240,53 @@ class StepRun:
     state: StepState = StepState.WAITING
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
+    cache_key: Optional[str] = None
+    fingerprint: Optional[str] = None
+    inputs_fingerprint: Optional[str] = None
+    cached: bool = False
+    reused: bool = False
+    partitions: Optional[int] = None
+    returncode: Optional[int] = None
+    outputs: Dict[str, str]
 
     def __init__(self, step: Step):
         self.step = step
         self.stdout = None
+        self.outputs = {}
 
 
 class DagRuntime(ABC):
     dag_run: DagRun
+    max_workers: int
+    cache: Optional[StepCache]
+    run_state_store: Optional[RunStateStore]
+    executor: StepExecutor
+    step_durations: Dict[str, float]
+    resource_pool: ResourcePool
+    profiler: Optional[Profiler]
+    history: Optional[RunHistory]
 
-    def __init__(self, dag_run: DagRun) -> None:
+    def __init__(
+        self,
+        dag_run: DagRun,
+        max_workers: Optional[int] = None,
+        cache: Optional[StepCache] = None,
+        run_state_store: Optional[RunStateStore] = None,
+        executor: Optional[StepExecutor] = None,
+        step_durations: Optional[Dict[str, float]] = None,
+        resource_pool: Optional[ResourcePool] = None,
+        profiler: Optional[Profiler] = None,
+        history: Optional[RunHistory] = None,
+    ) -> None:
         self.dag_run = dag_run
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache = cache
+        self.run_state_store = run_state_store
+        self.executor = executor or SubprocessExecutor()
+        self.step_durations = step_durations or {}
+        self.resource_pool = resource_pool or ResourcePool()
+        self.profiler = profiler
+        self.history = history
 
     @abstractmethod
     def execute(self):
@@ -113,6 +296,23 @@ class DagRuntime(ABC):
 class LocalRuntime(DagRuntime):
     dag_run: DagRun
 
+    # Larger parameters are passed in a file, environment variables are
+    # limited to 128 KiB each on Linux.
+    MAX_PARAMETERS_ENV_BYTES = 32 * 1024
+
+    def __init__(self, dag_run: DagRun, **options: Any) -> None:
+        super().__init__(dag_run, **options)
+        self._released_outputs: Set[str] = set()
+        self._unfinished_dependents: Optional[array] = None
+        self._allocations: Dict[str, ResourceAllocation] = {}
+        self._definition_path = Path(dag_run.dag.definition_path)
+        self._outputs_dir = dag_run.dag.outputs_path
+        self._script_paths: Dict[str, Path] = {}
+        self._base_env: Optional[Dict[str, str]] = None
+        self._inline_modules: Dict[Path, Any] = {}
+        self._inline_outputs: Dict[str, Any] = {}
+        self._inline_lock = threading.Lock()
+
     def _start_step_run(self, step_name: str) -> None:
         step_run = self.dag_run.step_runs[step_name]
         step_run.state = StepState.EXECUTING
@@ -135,93 +335,730 @@ class LocalRuntime(DagRuntime):
         step_run.stdout = stdout
         step_run.stderr = stderr
         step_run.state = state
+        step_run.returncode = result.returncode
+
+        step_output_path = self._outputs_path() / step_name
+        if state == StepState.SUCCESSFUL and step_output_path.is_dir():
+            step_run.outputs = stat_directory(step_output_path)
+
+        if self.profiler:
+            self.profiler.record_usage(step_name, getattr(result, "usage", None))
 
         logger.info(f'Step "{step_name}" {state}')
 
+        if self.run_state_store:
+            self.run_state_store.record_step(self.dag_run, step_name)
+        if self.history:
+            self.history.record_step(self.dag_run, step_name)
+
+    def _outputs_path(self) -> Path:
+        return self._outputs_dir
+
+    def _script_path(self, step_name: str) -> Path:
+        script_path = self._script_paths.get(step_name)
+        if script_path is None:
+            script_path = (
+                self._definition_path / self.dag_run.dag.steps[step_name].script
+            )
+            self._script_paths[step_name] = script_path
+        return script_path
+
+    def _restore_from_cache(self, step_name: str) -> bool:
+        step_run = self.dag_run.step_runs[step_name]
+        step_run.cache_key = self.cache.key(
+            step_run.step, self._script_path(step_name), self._outputs_path()
+        )
+        if not step_run.cache_key:
+            return False
+
+        cached = self.cache.restore(
+            step_run.cache_key, self._outputs_path() / step_name
+        )
+        if not cached:
+            return False
+
+        step_run.cached = True
+        logger.info(f'Step "{step_name}" restored from cache.')
+        self._end_step_run(
+            step_name,
+            subprocess.CompletedProcess(
+                args=[], returncode=0, stdout=cached.stdout, stderr=cached.stderr
+            ),
+        )
+        return True
+
+    def _store_in_cache(self, step_name: str) -> None:
+        step_run = self.dag_run.step_runs[step_name]
+        if step_run.state != StepState.SUCCESSFUL or not step_run.cache_key:
+            return
+
+        self.cache.store(
+            step_run.cache_key,
+            self._outputs_path() / step_name,
+            step_run.stdout,
+            step_run.stderr,
+        )
+
+    def _release_outputs(self, step_name: str) -> None:
+        if step_name in self._released_outputs:
+            return
+        self._released_outputs.add(step_name)
+        self._inline_outputs.pop(step_name, None)
+        release_transient_outputs(self._outputs_path() / step_name)
+
+    def _track_finished_steps(self) -> None:
+        graph = self.dag_run.dag.graph
+        self._unfinished_dependents = array(
+            "l",
+            (
+                sum(
+                    1
+                    for s in graph.successors_of(node)
+                    if self.dag_run.step_runs[graph.names[s]].state
+                    not in FINISHED_STATES
+                )
+                for node in range(len(graph))
+            ),
+        )
+
+    def _step_finished(self, step_name: str) -> None:
+        if self._unfinished_dependents is None:
+            return
+
+        graph = self.dag_run.dag.graph
+        for node in graph.predecessors_of(graph.ids[step_name]):
+            self._unfinished_dependents[node] -= 1
+            if self._unfinished_dependents[node] == 0:
+                self._release_outputs(graph.names[node])
+
+    def _release_all_outputs(self) -> None:
+        for step_name in self.dag_run.dag.steps:
+            self._release_outputs(step_name)
+
+    def _create_base_env(self) -> Dict[str, str]:
+        if self._base_env is None:
+            env = os.environ.copy()
+            env.pop("DAGGR_PARAMETERS", None)
+            env.pop("DAGGR_PARAMETERS_FILE", None)
+            env["DAGGR_DAG_NAME"] = self.dag_run.dag.name
+            self._outputs_dir.mkdir(exist_ok=True)
+            env["DAGGR_OUTPUTS_PATH"] = str(self._outputs_dir)
+            self._base_env = env
+        return self._base_env
+
+    def _parameters_file(self, step_name: str, parameters: str) -> Path:
+        parameters_path = (
+            self._definition_path / ".daggr" / "parameters" / self.dag_run.run_id
+        )
+        parameters_path.mkdir(parents=True, exist_ok=True)
+        parameters_file = parameters_path / f"{step_name}.json"
+        parameters_file.write_text(parameters)
+        return parameters_file
+
     def _create_env(self, step: Step, dag_run: DagRun) -> Dict[str, str]:
         step_name = step.name
-        parameters = step.parameters if step.parameters else {}
-        inputs = step.inputs if step.inputs else {}
+        parameters = json.dumps(step.parameters if step.parameters else {})
 
-        env = os.environ.copy()
-        env["DAGGR_DAG_NAME"] = dag_run.dag.name
+        env = dict(self._create_base_env())
         env["DAGGR_STEP_NAME"] = step_name
-        env["DAGGR_PARAMETERS"] = json.dumps(parameters)
-        env["DAGGR_INPUTS"] = json.dumps(inputs)
-        outputs_path = Path(self.dag_run.dag.definition_path) / "outputs"
-        outputs_path.mkdir(exist_ok=True)
-        env["DAGGR_OUTPUTS_PATH"] = str(outputs_path)
+        if len(parameters) > self.MAX_PARAMETERS_ENV_BYTES:
+            env["DAGGR_PARAMETERS_FILE"] = str(
+                self._parameters_file(step_name, parameters)
+            )
+        else:
+            env["DAGGR_PARAMETERS"] = parameters
+        env["DAGGR_INPUTS"] = json.dumps(step.inputs if step.inputs else {})
+        if self.profiler:
+            env.update(self.profiler.env(step_name))
 
         return env
 
-    def run_step(self, step_name: str) -> StepState:
-        self._start_step_run(step_name)
+    def _inline_function(self, step: Step) -> Callable:
+        script_path = self._script_path(step.name)
+        with self._inline_lock:
+            module = self._inline_modules.get(script_path)
+            if module is None:
+                module = _import_script(script_path)
+                self._inline_modules[script_path] = module
+        return getattr(module, step.function)
 
-        script_path = str(
-            Path(self.dag_run.dag.definition_path)
-            / self.dag_run.dag.steps[step_name].script
+    def _inline_inputs(self, step: Step) -> Dict[str, Any]:
+        loader = InputLoader(str(self._outputs_path()))
+        inputs = {}
+        for name, input_definition in (step.inputs or {}).items():
+            source = str(input_definition)
+            _, query = InputLoader.split_query(source)
+            upstream_step = InputLoader.upstream_step(source)
+            if not query and upstream_step in self._inline_outputs:
+                inputs[name] = self._inline_outputs[upstream_step]
+            else:
+                inputs[name] = loader.load(source)
+        return inputs
+
+    def _persists_inline_output(self, step: Step) -> bool:
+        steps = self.dag_run.dag.steps
+        return not step.dependency_of or any(
+            steps[name].type != INLINE_STEP_TYPE
+            or self._queries_output(steps[name], step.name)
+            for name in step.dependency_of
         )
 
-        # TODO: encapsulate execution implementation in class or function
-        result = subprocess.run(
-            f"{sys.executable} {script_path}",
-            text=True,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            env=self._create_env(self.dag_run.dag.steps[step_name], self.dag_run),
+    def _queries_output(self, step: Step, upstream_step: str) -> bool:
+        # Queries such as ?columns= are applied by the input loader, so inline
+        # steps using one read the upstream output from disk.
+        for input_definition in (step.inputs or {}).values():
+            source = str(input_definition)
+            _, query = InputLoader.split_query(source)
+            if query and InputLoader.upstream_step(source) == upstream_step:
+                return True
+        return False
+
+    def _run_inline(self, step: Step) -> subprocess.CompletedProcess:
+        # Values are handed to inline dependents in memory and only written to
+        # disk for the steps that read them from another process.
+        args = [str(self._script_path(step.name)), step.function]
+        step_output_path = self._outputs_path() / step.name
+        try:
+            value = self._inline_function(step)(
+                inputs=self._inline_inputs(step),
+                parameters=dict(step.parameters or {}),
+            )
+            if self._persists_inline_output(step):
+                write_step_output(step_output_path, INLINE_OUTPUT, "pickle", value)
+            else:
+                shutil.rmtree(step_output_path, ignore_errors=True)
+        except Exception:
+            return subprocess.CompletedProcess(
+                args=args, returncode=1, stdout="", stderr=traceback.format_exc()
+            )
+
+        self._inline_outputs[step.name] = value
+        return subprocess.CompletedProcess(
+            args=args, returncode=0, stdout="", stderr=""
         )
 
+    def _begin_step(self, step_name: str) -> bool:
+        self._start_step_run(step_name)
+
+        step = self.dag_run.dag.steps[step_name]
+        if (
+            self.cache
+            and step.type != INLINE_STEP_TYPE
+            and self._restore_from_cache(step_name)
+        ):
+            return True
+
+        detach_outputs(self._outputs_path() / step_name)
+        return False
+
+    def _complete_step(
+        self, step_name: str, result: subprocess.CompletedProcess
+    ) -> StepState:
         self._end_step_run(step_name, result)
 
+        if self.cache and self.dag_run.dag.steps[step_name].type != INLINE_STEP_TYPE:
+            self._store_in_cache(step_name)
+
         return self.dag_run.step_runs[step_name].state
 
-    def run_dependencies_of_step(self, step_name: str):
-        for dependent_step in self.dag_run.dag.steps[step_name].dependency_of:
-            if self.dag_run.step_runs[dependent_step].state != StepState.WAITING:
-                continue
+    def run_step(self, step_name: str) -> StepState:
+        if self._begin_step(step_name):
+            return self.dag_run.step_runs[step_name].state
 
-            dependencies_state = self._all_dependencies_are_met(dependent_step)
-            if dependencies_state != StepState.SUCCESSFUL:
-                continue
+        step = self.dag_run.dag.steps[step_name]
+        if step.type == INLINE_STEP_TYPE:
+            result = self._run_inline(step)
+        elif step.map_over:
+            results = [
+                self._run_partition(step, index)
+                for index in range(self._expand_partitions(step))
+            ]
+            result = self._gather_partitions(step, results)
+        else:
+            result = self.executor.run(
+                str(self._script_path(step_name)),
+                self._create_env(step, self.dag_run),
+                self._allocations.get(step_name),
+            )
 
-            self.run_step_and_dependencies(dependent_step)
+        return self._complete_step(step_name, result)
 
-    def _all_dependencies_are_met(self, step_name: str) -> StepState:
-        for s in self.dag_run.dag.steps[step_name].depends_on:
-            dependency_state = self.dag_run.step_runs[s].state
-            if dependency_state == StepState.SUCCESSFUL:
-                continue
-            else:
-                return dependency_state
-        return StepState.SUCCESSFUL
+    def _partition_step(self, step: Step, index: int) -> Step:
+        inputs = dict(step.inputs)
+        source, query = InputLoader.split_query(inputs[step.map_over])
+        inputs[step.map_over] = InputLoader.join_query(
+            source, {**query, "partition": str(index)}
+        )
+        return replace(step, name=f"{step.name}.{index}", inputs=inputs)
+
+    def _expand_partitions(self, step: Step) -> int:
+        upstream_step = InputLoader.upstream_step(step.inputs[step.map_over])
+        partitions = count_partitions(self._outputs_path() / upstream_step)
+        self.dag_run.step_runs[step.name].partitions = partitions
+        logger.info(f'Step "{step.name}" expanded into {partitions} partitions.')
+        return partitions
+
+    def _run_partition(self, step: Step, index: int) -> subprocess.CompletedProcess:
+        partition_step = self._partition_step(step, index)
+        return self.executor.run(
+            str(self._script_path(step.name)),
+            self._create_env(partition_step, self.dag_run),
+            self._allocations.get(
+                partition_step.name, self._allocations.get(step.name)
+            ),
+        )
+
+    def _gather_partitions(
+        self, step: Step, results: List[subprocess.CompletedProcess]
+    ) -> subprocess.CompletedProcess:
+        partitions = len(results)
+        script_path = str(self._script_path(step.name))
+        partition_paths = [
+            self._outputs_path() / f"{step.name}.{index}" for index in range(partitions)
+        ]
+        returncode = next((r.returncode for r in results if r.returncode != 0), 0)
+        if returncode == 0:
+            gather_partition_outputs(self._outputs_path() / step.name, partition_paths)
+            for partition_path in partition_paths:
+                shutil.rmtree(partition_path, ignore_errors=True)
+
+        result = subprocess.CompletedProcess(
+            args=[sys.executable, script_path],
+            returncode=returncode,
+            stdout="".join(r.stdout or "" for r in results),
+            stderr="".join(r.stderr or "" for r in results),
+        )
+        usages = [r.usage for r in results if getattr(r, "usage", None)]
+        if usages:
+            result.usage = ResourceUsage(
+                user_seconds=sum(u.user_seconds for u in usages),
+                system_seconds=sum(u.system_seconds for u in usages),
+                max_rss_kb=max(
+                    (u.max_rss_kb for u in usages if u.max_rss_kb is not None),
+                    default=None,
+                ),
+            )
+        return result
+
+    def _next_ready_step(self, queue: ReadyQueue) -> Optional[str]:
+        deferred = []
+        try:
+            while queue:
+                step_name = queue.pop()
+                if self.dag_run.step_runs[step_name].state != StepState.WAITING:
+                    continue
+
+                request = ResourceRequest.from_step(
+                    self.dag_run.dag.steps[step_name].resources
+                )
+                if not self.resource_pool.fits(request):
+                    deferred.append(step_name)
+                    continue
 
-    def run_step_and_dependencies(self, step_name: str) -> None:
-        step_state = self.run_step(step_name)
+                self._allocations[step_name] = self.resource_pool.acquire(request)
+                return step_name
+            return None
+        finally:
+            queue.push(deferred)
 
+    def _finish_step(
+        self, queue: ReadyQueue, step_name: str, step_state: StepState
+    ) -> None:
+        allocation = self._allocations.pop(step_name, None)
+        if allocation:
+            self.resource_pool.release(allocation)
         if step_state == StepState.SUCCESSFUL:
-            self.run_dependencies_of_step(step_name)
+            queue.complete(step_name)
         else:
             self.cancel_dependencies_of_step(step_name)
+        self._step_finished(step_name)
 
     def cancel_dependencies_of_step(self, step_name: str):
-        for step in self.dag_run.dag.steps[step_name].dependency_of:
-            self.dag_run.step_runs[step].state = StepState.CANCELLED
-            logger.info(f'Step "{step}" {self.dag_run.step_runs[step].state }')
+        graph = self.dag_run.dag.graph
+        pending = [graph.ids[step_name]]
+        visited = set(pending)
+
+        while pending:
+            for node in graph.successors_of(pending.pop()):
+                if node in visited:
+                    continue
+                visited.add(node)
+                pending.append(node)
 
-            self.cancel_dependencies_of_step(step)
+                step = graph.names[node]
+                if self.dag_run.step_runs[step].state != StepState.WAITING:
+                    continue
+                self.dag_run.step_runs[step].state = StepState.CANCELLED
+                logger.info(f'Step "{step}" {self.dag_run.step_runs[step].state}')
+                self._step_finished(step)
 
     def execute(self):
-        for root_step in self.dag_run.dag.root_steps:
-            self.run_step_and_dependencies(root_step)
+        queue = ReadyQueue(self.dag_run, depth_first=True)
+        self._track_finished_steps()
+
+        try:
+            while True:
+                step_name = self._next_ready_step(queue)
+                if not step_name:
+                    break
+                self._finish_step(queue, step_name, self.run_step(step_name))
+        finally:
+            self._release_all_outputs()
+
+
+class ReadyQueue:
+    dag_run: DagRun
+    depth_first: bool
+    priorities: Optional[Sequence[float]]
+
+    def __init__(
+        self,
+        dag_run: DagRun,
+        depth_first: bool = False,
+        priorities: Optional[Sequence[float]] = None,
+    ) -> None:
+        self.dag_run = dag_run
+        self.depth_first = depth_first
+        self.priorities = priorities
+        self._graph = dag_run.dag.graph
+        self._remaining = array("l", [0] * len(self._graph))
+        self._ready: deque = deque()
+        self._heap: List[Tuple[float, int]] = []
+
+        states = [dag_run.step_runs[name].state for name in self._graph.names]
+        ready = []
+        for node in range(len(self._graph)):
+            self._remaining[node] = sum(
+                1
+                for p in self._graph.predecessors_of(node)
+                if states[p] != StepState.SUCCESSFUL
+            )
+            if self._remaining[node] == 0 and states[node] == StepState.WAITING:
+                ready.append(node)
+        self._push(ready)
+
+    def _push(self, nodes: List[int]) -> None:
+        if self.priorities is not None:
+            for node in nodes:
+                heapq.heappush(self._heap, (-self.priorities[node], node))
+        elif self.depth_first:
+            self._ready.extend(reversed(nodes))
+        else:
+            self._ready.extend(nodes)
+
+    def __len__(self) -> int:
+        return len(self._ready) + len(self._heap)
+
+    def push(self, step_names: List[str]) -> None:
+        self._push([self._graph.ids[step_name] for step_name in step_names])
+
+    def pop(self) -> str:
+        if self.priorities is not None:
+            return self._graph.names[heapq.heappop(self._heap)[1]]
+        if self.depth_first:
+            return self._graph.names[self._ready.pop()]
+        return self._graph.names[self._ready.popleft()]
+
+    def complete(self, step_name: str) -> None:
+        ready = []
+        for node in self._graph.successors_of(self._graph.ids[step_name]):
+            self._remaining[node] -= 1
+            if (
+                self._remaining[node] == 0
+                and self.dag_run.step_runs[self._graph.names[node]].state
+                == StepState.WAITING
+            ):
+                ready.append(node)
+        self._push(ready)
+
+
+class LocalParallelRuntime(LocalRuntime):
+    dag_run: DagRun
+
+    DEFAULT_STEP_DURATION = 1.0
+
+    def _critical_path_priorities(self) -> List[float]:
+        graph = self.dag_run.dag.graph
+        durations = [
+            self.step_durations.get(
+                name, self.dag_run.dag.steps[name].estimated_duration
+            )
+            for name in graph.names
+        ]
+        known = [duration for duration in durations if duration is not None]
+        default = sum(known) / len(known) if known else self.DEFAULT_STEP_DURATION
+        return graph.longest_paths(
+            [default if duration is None else duration for duration in durations]
+        )
+
+    def _submit(self, func: Callable[..., Any], *args: Any) -> Any:
+        return self._pool.submit(func, *args)
+
+    def _submit_step(self, step_name: str) -> Any:
+        return self._submit(self.run_step, step_name)
+
+    def _next_partition(self) -> Optional[Tuple[str, int]]:
+        if not self._pending_partitions:
+            return None
+
+        step_name, index = self._pending_partitions[0]
+        request = ResourceRequest.from_step(self.dag_run.dag.steps[step_name].resources)
+        if not self.resource_pool.fits(request):
+            return None
+
+        self._pending_partitions.popleft()
+        self._allocations[f"{step_name}.{index}"] = self.resource_pool.acquire(request)
+        return step_name, index
+
+    def _start_map_step(
+        self, queue: ReadyQueue, running: Dict[Any, Any], step_name: str
+    ) -> None:
+        # Partitions are scheduled like steps, each one taking a worker slot and
+        # its own resources, so the step itself holds neither.
+        allocation = self._allocations.pop(step_name, None)
+        if allocation:
+            self.resource_pool.release(allocation)
+        if self._begin_step(step_name):
+            self._finish_step(queue, step_name, self.dag_run.step_runs[step_name].state)
+            return
+
+        partitions = self._expand_partitions(self.dag_run.dag.steps[step_name])
+        self._partition_results[step_name] = [None] * partitions
+        self._remaining_partitions[step_name] = partitions
+        if partitions:
+            self._pending_partitions.extend(
+                (step_name, index) for index in range(partitions)
+            )
+        else:
+            running[self._submit(self._finish_map_step, step_name)] = step_name
+
+    def _finish_map_step(self, step_name: str) -> StepState:
+        results = self._partition_results.pop(step_name)
+        del self._remaining_partitions[step_name]
+        return self._complete_step(
+            step_name,
+            self._gather_partitions(self.dag_run.dag.steps[step_name], results),
+        )
+
+    def _start_ready(self, queue: ReadyQueue, running: Dict[Any, Any]) -> None:
+        while len(running) < self.max_workers:
+            partition = self._next_partition()
+            if partition:
+                step = self.dag_run.dag.steps[partition[0]]
+                running[
+                    self._submit(self._run_partition, step, partition[1])
+                ] = partition
+                continue
+
+            step_name = self._next_ready_step(queue)
+            if not step_name:
+                break
+            if self.dag_run.dag.steps[step_name].map_over:
+                self._start_map_step(queue, running, step_name)
+            else:
+                running[self._submit_step(step_name)] = step_name
+
+    def _finish_done(
+        self, queue: ReadyQueue, running: Dict[Any, Any], done: Any
+    ) -> None:
+        for future in done:
+            unit = running.pop(future)
+            if isinstance(unit, str):
+                self._finish_step(queue, unit, future.result())
+                continue
+
+            step_name, index = unit
+            allocation = self._allocations.pop(f"{step_name}.{index}", None)
+            if allocation:
+                self.resource_pool.release(allocation)
+            self._partition_results[step_name][index] = future.result()
+            self._remaining_partitions[step_name] -= 1
+            if not self._remaining_partitions[step_name]:
+                running[self._submit(self._finish_map_step, step_name)] = step_name
+
+    def _reset_partitions(self) -> None:
+        self._pending_partitions: deque = deque()
+        self._partition_results: Dict[str, List[Any]] = {}
+        self._remaining_partitions: Dict[str, int] = {}
+
+    def execute(self):
+        queue = ReadyQueue(self.dag_run, priorities=self._critical_path_priorities())
+        running: Dict[Future, Any] = {}
+        self._track_finished_steps()
+        self._reset_partitions()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            self._pool = pool
+            try:
+                self._schedule(queue, running)
+            finally:
+                self._release_all_outputs()
+
+    def _schedule(self, queue: ReadyQueue, running: Dict[Future, Any]) -> None:
+        while queue or running or self._pending_partitions:
+            self._start_ready(queue, running)
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            self._finish_done(queue, running, done)
+
+
+class _OutputTail:
+    max_bytes: int
+    truncated_bytes: int
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.truncated_bytes = 0
+        self._chunks: deque = deque()
+        self._size = 0
+
+    def append(self, data: bytes) -> None:
+        self._chunks.append(data)
+        self._size += len(data)
+        while self._size > self.max_bytes:
+            excess = self._size - self.max_bytes
+            first = self._chunks.popleft()
+            if len(first) > excess:
+                self._chunks.appendleft(first[excess:])
+                self._size -= excess
+                self.truncated_bytes += excess
+            else:
+                self._size -= len(first)
+                self.truncated_bytes += len(first)
+
+    def getvalue(self) -> str:
+        text = b"".join(self._chunks).decode(errors="replace")
+        if self.truncated_bytes:
+            return f"[... {self.truncated_bytes} bytes truncated ...]\n{text}"
+        return text
+
+
+class AsyncRuntime(LocalParallelRuntime):
+    dag_run: DagRun
+    max_output_bytes: int
+
+    MAX_OUTPUT_BYTES = 1024 * 1024
+    READ_SIZE = 64 * 1024
+
+    def __init__(
+        self, dag_run: DagRun, max_output_bytes: Optional[int] = None, **options: Any
+    ) -> None:
+        super().__init__(dag_run, **options)
+        self.max_output_bytes = max_output_bytes or self.MAX_OUTPUT_BYTES
+
+    def _logs_path(self) -> Path:
+        return (
+            Path(self.dag_run.dag.definition_path)
+            / ".daggr"
+            / "logs"
+            / self.dag_run.run_id
+        )
+
+    async def _stream_output(
+        self, step_name: str, stream: asyncio.StreamReader, log_file: Path
+    ) -> str:
+        tail = _OutputTail(self.max_output_bytes)
+        pending = b""
+
+        with open(log_file, "wb") as f:
+            while True:
+                data = await stream.read(self.READ_SIZE)
+                if not data:
+                    break
+                f.write(data)
+                tail.append(data)
+
+                *lines, pending = (pending + data).split(b"\n")
+                if len(pending) > self.READ_SIZE:
+                    lines.append(pending)
+                    pending = b""
+                for line in lines:
+                    logger.info(f"[{step_name}] {line.decode(errors='replace')}")
+
+        if pending:
+            logger.info(f"[{step_name}] {pending.decode(errors='replace')}")
+        return tail.getvalue()
+
+    async def run_step_async(self, step_name: str) -> StepState:
+        if self.dag_run.dag.steps[step_name].type == INLINE_STEP_TYPE:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.run_step, step_name)
+
+        if self._begin_step(step_name):
+            return self.dag_run.step_runs[step_name].state
+
+        script_path = str(self._script_path(step_name))
+        allocation = self._allocations.get(step_name)
+        args = (
+            allocation.command(script_path)
+            if allocation
+            else [sys.executable, script_path]
+        )
+        logs_path = self._logs_path()
+        logs_path.mkdir(parents=True, exist_ok=True)
+
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=self._create_env(self.dag_run.dag.steps[step_name], self.dag_run),
+        )
+        stdout, stderr = await asyncio.gather(
+            self._stream_output(
+                step_name, process.stdout, logs_path / f"{step_name}.stdout.log"
+            ),
+            self._stream_output(
+                step_name, process.stderr, logs_path / f"{step_name}.stderr.log"
+            ),
+        )
+        returncode = await process.wait()
+
+        return self._complete_step(
+            step_name,
+            subprocess.CompletedProcess(
+                args=args, returncode=returncode, stdout=stdout, stderr=stderr
+            ),
+        )
+
+    def _submit(self, func: Callable[..., Any], *args: Any) -> Any:
+        return asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _submit_step(self, step_name: str) -> Any:
+        return asyncio.ensure_future(self.run_step_async(step_name))
+
+    async def _schedule_async(self) -> None:
+        queue = ReadyQueue(self.dag_run, priorities=self._critical_path_priorities())
+        running: Dict[asyncio.Future, Any] = {}
+        self._track_finished_steps()
+        self._reset_partitions()
+
+        while queue or running or self._pending_partitions:
+            self._start_ready(queue, running)
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            self._finish_done(queue, running, done)
+
+    def execute(self):
+        try:
+            asyncio.run(self._schedule_async())
+        finally:
+            self._release_all_outputs()
 
 
 class DagRuntimeFactory:
-    IMPLEMENTATIONS = {"local": LocalRuntime}
+    IMPLEMENTATIONS = {
+        "local": LocalRuntime,
+        "local-parallel": LocalParallelRuntime,
+        "async": AsyncRuntime,
+    }
 
     @staticmethod
-    def create(type: str, dag_run: DagRun) -> DagRuntime:
-        return DagRuntimeFactory.IMPLEMENTATIONS[type](dag_run)
+    def create(type: str, dag_run: DagRun, **options: Any) -> DagRuntime:
+        return DagRuntimeFactory.IMPLEMENTATIONS[type](dag_run, **options)
 
 
 @dataclass
@@ -234,3 +1071,23 @@ class Step:
     inputs: Dict[str, Any] = field(default_factory=lambda: {})
     type: str = "python"
     requirements: Optional[str] = None
+    estimated_duration: Optional[float] = None
+    resources: Dict[str, int] = field(default_factory=lambda: {})
+    map_over: Optional[str] = None
+    function: str = "main"
+
+
+INLINE_OUTPUT = "result"
+
+
+def _import_script(script_path: Path) -> Any:
+    script_dir = str(script_path.parent)
+    if script_dir not in sys.path:
+        sys.path.append(script_dir)
+
+    spec = importlib.util.spec_from_file_location(
+        f"daggr_inline_{uuid4().hex}", script_path
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
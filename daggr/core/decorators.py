@@ -1,18 +1,52 @@
 from __future__ import annotations
 
+import inspect
 import json
+import mmap
 import os
 import pickle
+import struct
+import sys
 from abc import ABC
-from dataclasses import dataclass
+from collections.abc import Mapping
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Callable, List, Optional, Tuple
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+from urllib.parse import parse_qsl, urlencode
+
+from daggr.core.compression import CodecFactory
+from daggr.core.events import record_event, timed, timed_iterator
+from daggr.core.hashing import hash_file
+
+if TYPE_CHECKING:
+    from multiprocessing import shared_memory
 
 
 class output:
-    def __init__(self, name: str, type: str, output_path: Optional[str] = None):
+    def __init__(
+        self,
+        name: str,
+        type: str,
+        output_path: Optional[str] = None,
+        compression: Optional[str] = None,
+        compression_level: Optional[int] = None,
+    ):
         self.name = name
         self.type = type
+        self.compression = compression
+        self.compression_level = compression_level
+        if compression:
+            CodecFactory.create(compression)
         self.dag_name = os.getenv("DAGGR_DAG_NAME")
         self.step_name = os.getenv("DAGGR_STEP_NAME", "test")
         if output_path:
@@ -26,34 +60,79 @@ class output:
     def _get_step_output_path(self, step_name: str) -> Path:
         return Path(self.output_path) / step_name
 
+    def _create_writer(self) -> OutputWriter:
+        if not self.compression:
+            return InterfaceFactory.create(self.type)
+        if not InterfaceFactory.INTERFACES[self.type].compressible:
+            raise CompressionNotSupported(self.type)
+        return InterfaceFactory.create(
+            self.type,
+            compression=self.compression,
+            compression_level=self.compression_level,
+        )
+
     def __call__(self, func: Callable):
         def wrapper(*args, **kwargs):
-            return_value = func(*args, **kwargs)
-
-            writer = InterfaceFactory.create(self.type)
-            extension = writer.extension()
-            step_output_path = self._get_step_output_path(self.step_name)
-            step_output_path.mkdir(exist_ok=True)
-            writer.write(
-                return_value,
-                step_output_path / f"{self.name}.{extension}",
-            )
-            om = OutputMetadata(
-                outputs=[OutputInfo(io_interface=self.type, name=self.name)]
-            )
-            OutputMetadataInterface().write(om, str(step_output_path / ".daggr"))
+            writer = self._create_writer()
+            with timed("function"):
+                return_value = func(*args, **kwargs)
+
+            chunks = None
+            if inspect.isgenerator(return_value):
+                if not writer.streaming:
+                    raise UnsupportedOutputType(self.type, return_value)
+                chunks = timed_iterator(return_value)
+            with timed("output") as phase:
+                output_file = write_step_output(
+                    self._get_step_output_path(self.step_name),
+                    self.name,
+                    self.type,
+                    return_value if chunks is None else chunks,
+                    writer=writer,
+                    compression=self.compression,
+                )
+                phase.size = os.path.getsize(output_file)
+                if chunks is not None:
+                    phase.excluded = chunks.seconds
+            if chunks is not None:
+                # The generator runs while its chunks are written.
+                record_event("function", phase.start, chunks.seconds)
             return return_value
 
+        wrapper.times_function = True
         return wrapper
 
 
-class inputs:
-    def __init__(self):
-        self.parameters = json.loads(os.getenv("DAGGR_PARAMETERS"))
-        self.inputs = json.loads(os.getenv("DAGGR_INPUTS"))
-        self.dag_name = os.getenv("DAGGR_DAG_NAME")
-        self.step_name = os.getenv("DAGGR_STEP_NAME", "test")
-        self.output_path = os.getenv("DAGGR_OUTPUTS_PATH")
+def write_step_output(
+    step_output_path: Path,
+    name: str,
+    type: str,
+    value: Any,
+    writer: Optional[OutputWriter] = None,
+    compression: Optional[str] = None,
+) -> Path:
+    writer = writer or InterfaceFactory.create(type)
+    step_output_path.mkdir(parents=True, exist_ok=True)
+    output_file = step_output_path / f"{name}.{writer.extension()}"
+    attributes = writer.write(value, output_file)
+    om = OutputMetadata(
+        outputs=[
+            OutputInfo(
+                io_interface=type,
+                name=name,
+                content_hash=writer.content_hash(str(output_file)),
+                attributes=attributes or {},
+                compression=compression,
+            )
+        ]
+    )
+    OutputMetadataInterface().write(om, str(step_output_path / ".daggr"))
+    return output_file
+
+
+class InputLoader:
+    def __init__(self, output_path: str) -> None:
+        self.output_path = output_path
 
     def _input_source_is_output(self, input: str) -> bool:
         return input.startswith("output:")
@@ -61,6 +140,20 @@ class inputs:
     def _get_step_name(self, input: str) -> str:
         return input.split(":")[1]
 
+    @staticmethod
+    def split_query(input: str) -> Tuple[str, Dict[str, str]]:
+        source, _, query = input.partition("?")
+        return source, dict(parse_qsl(query))
+
+    @staticmethod
+    def join_query(source: str, query: Dict[str, str]) -> str:
+        return f"{source}?{urlencode(query, safe=',')}" if query else source
+
+    @staticmethod
+    def upstream_step(input: str) -> Optional[str]:
+        source, _ = InputLoader.split_query(input)
+        return source[len("output:") :] if source.startswith("output:") else None
+
     def _get_interface_and_filepath(self, input: str) -> Tuple[str, str]:
         return input.split(":")[0], input.split(":")[1]
 
@@ -71,55 +164,166 @@ class inputs:
     def _get_step_output_path(self, step_name: str) -> Path:
         return Path(self.output_path) / step_name
 
+    def load(self, input_definition: str) -> Any:
+        return self._read_input(input_definition)[0]
+
+    def _load_input(self, input_definition: str) -> Any:
+        with timed("inputs") as phase:
+            value, phase.size = self._read_input(input_definition)
+        return value
+
+    def _read_input(self, input_definition: str) -> Tuple[Any, int]:
+        input_definition, query = self.split_query(input_definition)
+        if self._input_source_is_output(input_definition):
+            step_name = self._get_step_name(input_definition)
+            metadata = self._read_metadata_file(step_name)
+
+            value = None
+            for output in metadata.outputs:
+                io = _output_interface(output)
+                path = str(
+                    self._get_step_output_path(step_name)
+                    / f"{output.name}.{io.extension()}"
+                )
+                value = self._read_with_query(io, path, query, output.attributes)
+            return value, _file_size(path) if metadata.outputs else 0
+
+        interface, filepath = self._get_interface_and_filepath(input_definition)
+        io = InterfaceFactory.create(interface)
+        return self._read_with_query(io, filepath, query), _file_size(filepath)
+
+    def _read_with_query(
+        self,
+        io: InputReader,
+        path: str,
+        query: Dict[str, str],
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        if query.keys() == {"partition"}:
+            return io.read_partition(path, int(query["partition"]), attributes)
+        if query:
+            return io.read_query(path, query, attributes)
+        return io.read(path, attributes)
+
+
+class inputs(InputLoader):
+    def __init__(self, lazy: bool = False):
+        self.lazy = lazy
+        parameters_file = os.getenv("DAGGR_PARAMETERS_FILE")
+        if parameters_file:
+            with open(parameters_file, "r") as f:
+                self.parameters = json.load(f)
+        else:
+            self.parameters = json.loads(os.getenv("DAGGR_PARAMETERS"))
+        self.inputs = json.loads(os.getenv("DAGGR_INPUTS"))
+        self.dag_name = os.getenv("DAGGR_DAG_NAME")
+        self.step_name = os.getenv("DAGGR_STEP_NAME", "test")
+        super().__init__(os.getenv("DAGGR_OUTPUTS_PATH"))
+
     def __call__(self, func: Callable):
         def wrapper(*args, **kwargs):
-            inputs = {}
-            for name, input_definition in self.inputs.items():
-                if self._input_source_is_output(input_definition):
-                    step_name = self._get_step_name(input_definition)
-                    metadata = self._read_metadata_file(step_name)
-
-                    for output in metadata.outputs:
-                        io = InterfaceFactory.create(output.io_interface)
-                        inputs[name] = io.read(
-                            str(
-                                self._get_step_output_path(step_name)
-                                / f"{output.name}.{io.extension()}"
-                            )
-                        )
-                else:
-                    interface, filepath = self._get_interface_and_filepath(input_source)
-                    io = InterfaceFactory.create(interface)
-                    io.read(filepath)
-
-            return_value = func(
-                *args, **kwargs, parameters=self.parameters, inputs=inputs
-            )
+            if self.lazy:
+                inputs = LazyInputs(self.inputs, self._load_input)
+            else:
+                inputs = {
+                    name: self._load_input(input_definition)
+                    for name, input_definition in self.inputs.items()
+                }
+
+            if getattr(func, "times_function", False):
+                return func(*args, **kwargs, parameters=self.parameters, inputs=inputs)
+
+            with timed("function"):
+                return_value = func(
+                    *args, **kwargs, parameters=self.parameters, inputs=inputs
+                )
             return return_value
 
         return wrapper
 
 
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class LazyInputs(Mapping):
+    def __init__(
+        self, definitions: Dict[str, str], loader: Callable[[str], Any]
+    ) -> None:
+        self._definitions = definitions
+        self._loader = loader
+        self._loaded: Dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._loaded:
+            self._loaded[name] = self._loader(self._definitions[name])
+        return self._loaded[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._definitions)
+
+    def __len__(self) -> int:
+        return len(self._definitions)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._loaded
+
+    def __repr__(self) -> str:
+        return f"LazyInputs(loaded={list(self._loaded)}, inputs={list(self)})"
+
+
 class InputReader(ABC):
-    def read(self, path: str) -> Any:
+    def read(self, path: str, attributes: Optional[Dict[str, Any]] = None) -> Any:
         raise NotImplementedError()
 
+    def partitions(self, path: str, attributes: Optional[Dict[str, Any]] = None) -> int:
+        return len(self.read(path, attributes))
+
+    def read_partition(
+        self, path: str, index: int, attributes: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        return self.read(path, attributes)[index]
+
+    def read_query(
+        self,
+        path: str,
+        query: Dict[str, str],
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        raise UnsupportedInputQuery(type(self).__name__, query)
+
     def extension(self) -> str:
         raise NotImplementedError()
 
 
 class OutputWriter(ABC):
-    def write(self, obj: Any, path: str) -> None:
+    persistent: bool = True
+    streaming: bool = False
+    compressible: bool = False
+
+    def write(self, obj: Any, path: str) -> Optional[Dict[str, Any]]:
         raise NotImplementedError()
 
     def extension(self) -> str:
         raise NotImplementedError()
 
+    def release(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def content_hash(self, path: str) -> str:
+        return hash_file(path)
+
 
 @dataclass
 class OutputInfo:
     io_interface: str
     name: str
+    content_hash: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    compression: Optional[str] = None
 
 
 @dataclass
@@ -139,33 +343,621 @@ class OutputMetadataInterface:
             pickle.dump(om, f)
 
 
+def read_step_output_metadata(step_output_path: Path) -> Optional[OutputMetadata]:
+    metadata_file = step_output_path / ".daggr"
+    if not metadata_file.is_file():
+        return None
+    return OutputMetadataInterface.read(str(metadata_file))
+
+
+def has_transient_outputs(step_output_path: Path) -> bool:
+    metadata = read_step_output_metadata(step_output_path)
+    if not metadata:
+        return False
+    return any(
+        not InterfaceFactory.create(o.io_interface).persistent for o in metadata.outputs
+    )
+
+
+def release_transient_outputs(step_output_path: Path) -> None:
+    metadata = read_step_output_metadata(step_output_path)
+    if not metadata:
+        return
+    for o in metadata.outputs:
+        io = InterfaceFactory.create(o.io_interface)
+        if not io.persistent:
+            io.release(o.attributes)
+
+
+def _output_interface(output: OutputInfo) -> IOInterface:
+    if output.compression:
+        return InterfaceFactory.create(
+            output.io_interface, compression=output.compression
+        )
+    return InterfaceFactory.create(output.io_interface)
+
+
+def _output_file(step_output_path: Path, output: OutputInfo) -> str:
+    io = InterfaceFactory.create(output.io_interface)
+    return str(step_output_path / f"{output.name}.{io.extension()}")
+
+
+def count_partitions(step_output_path: Path) -> int:
+    metadata = read_step_output_metadata(step_output_path)
+    if not metadata or not metadata.outputs:
+        return 0
+    output = metadata.outputs[-1]
+    return _output_interface(output).partitions(
+        _output_file(step_output_path, output), output.attributes
+    )
+
+
+def _materialize(value: Any) -> Any:
+    if isinstance(value, ChunkedOutput):
+        return list(value)
+    if isinstance(value, memoryview):
+        return value.tobytes()
+    return value
+
+
+def gather_partition_outputs(
+    step_output_path: Path, partition_paths: List[Path]
+) -> None:
+    gathered: Dict[str, List[Any]] = {}
+    compressions: Dict[str, Optional[str]] = {}
+    for partition_path in partition_paths:
+        metadata = read_step_output_metadata(partition_path)
+        for output in metadata.outputs if metadata else []:
+            io = _output_interface(output)
+            value = io.read(_output_file(partition_path, output), output.attributes)
+            gathered.setdefault(output.name, []).append(_materialize(value))
+            compressions[output.name] = output.compression
+        release_transient_outputs(partition_path)
+    if not partition_paths:
+        # Steps read the last output of their upstream step, an upstream output
+        # with no partitions gives them an empty list.
+        gathered[step_output_path.name] = []
+        compressions[step_output_path.name] = None
+
+    step_output_path.mkdir(parents=True, exist_ok=True)
+    outputs = []
+    for name, values in gathered.items():
+        io = PickleInterface(compression=compressions[name])
+        output_file = step_output_path / f"{name}.{io.extension()}"
+        io.write(values, str(output_file))
+        outputs.append(
+            OutputInfo(
+                io_interface="pickle",
+                name=name,
+                content_hash=hash_file(output_file),
+                compression=compressions[name],
+            )
+        )
+    OutputMetadataInterface.write(
+        OutputMetadata(outputs=outputs), str(step_output_path / ".daggr")
+    )
+
+
 class IOInterface(InputReader, OutputWriter):
     pass
 
 
 class PickleInterface(OutputWriter, InputReader):
+    compressible = True
+
+    def __init__(
+        self,
+        compression: Optional[str] = None,
+        compression_level: Optional[int] = None,
+    ) -> None:
+        self.codec = CodecFactory.create(compression) if compression else None
+        self.compression_level = compression_level
+
+    def _open(self, path: str, mode: str) -> IO[bytes]:
+        if self.codec:
+            return self.codec.open(path, mode, self.compression_level)
+        return open(path, mode)
+
     def write(self, obj: Any, path: str) -> None:
-        with open(path, "wb") as f:
+        # Pickle writes frames to the codec's file object as it goes, so the
+        # uncompressed byte string is never built in memory.
+        with self._open(path, "wb") as f:
             pickle.dump(obj, f)
 
-    def read(self, path: str) -> Any:
-        with open(path, "rb") as f:
+    def read(self, path: str, attributes: Optional[Dict[str, Any]] = None) -> Any:
+        with self._open(path, "rb") as f:
             return pickle.load(f)
 
     def extension(self) -> str:
         return "pkl"
 
 
+class OutOfBandPickleInterface(OutputWriter, InputReader):
+    PROTOCOL = 5
+    BUFFER_THRESHOLD = 64 * 1024
+    ALIGNMENT = 64
+    INDEX_ENTRY = struct.Struct("<QQ")
+    INDEX_SIZE = struct.Struct("<Q")
+
+    def __init__(self) -> None:
+        if pickle.HIGHEST_PROTOCOL < self.PROTOCOL:
+            raise PickleProtocolNotSupported(self.PROTOCOL)
+
+    @staticmethod
+    def buffers_file(path: str) -> str:
+        return f"{path}.buffers"
+
+    def write(self, obj: Any, path: str) -> Dict[str, Any]:
+        # Large buffers are written from the object's memory to the sidecar
+        # file, at aligned offsets, instead of being copied into the pickle.
+        index: List[Tuple[int, int]] = []
+        with open(self.buffers_file(path), "wb") as buffers:
+
+            def buffer_callback(buffer: pickle.PickleBuffer) -> bool:
+                try:
+                    data = buffer.raw()
+                except BufferError:
+                    return True
+                if data.nbytes < self.BUFFER_THRESHOLD:
+                    return True
+
+                buffers.write(b"\0" * (-buffers.tell() % self.ALIGNMENT))
+                index.append((buffers.tell(), data.nbytes))
+                buffers.write(data)
+                return False
+
+            with open(path, "wb") as f:
+                pickle.dump(
+                    obj, f, protocol=self.PROTOCOL, buffer_callback=buffer_callback
+                )
+
+            for offset, size in index:
+                buffers.write(self.INDEX_ENTRY.pack(offset, size))
+            buffers.write(self.INDEX_SIZE.pack(len(index)))
+        return {"buffers": len(index)}
+
+    def read(self, path: str, attributes: Optional[Dict[str, Any]] = None) -> Any:
+        with open(self.buffers_file(path), "rb") as f:
+            buffers_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(buffers_map)
+        (count,) = self.INDEX_SIZE.unpack_from(view, len(view) - self.INDEX_SIZE.size)
+        index_offset = len(view) - self.INDEX_SIZE.size - count * self.INDEX_ENTRY.size
+        buffers = []
+        for i in range(count):
+            offset, size = self.INDEX_ENTRY.unpack_from(
+                view, index_offset + i * self.INDEX_ENTRY.size
+            )
+            buffers.append(view[offset : offset + size])
+
+        with open(path, "rb") as f:
+            return pickle.load(f, buffers=buffers)
+
+    def content_hash(self, path: str) -> str:
+        # The pickle only references the buffers, so equal streams can hold
+        # different data.
+        return hash_file(path) + hash_file(self.buffers_file(path))
+
+    def extension(self) -> str:
+        return "pkl5"
+
+
+class UnsupportedOutputType(Exception):
+    def __init__(self, interface: str, obj: Any) -> None:
+        self.interface = interface
+        self.obj = obj
+
+    def __str__(self) -> str:
+        return (
+            f'Output interface "{self.interface}" cannot write objects of type '
+            f"{type(self.obj).__name__}"
+        )
+
+
+class PickleProtocolNotSupported(Exception):
+    def __init__(self, protocol: int) -> None:
+        self.protocol = protocol
+
+    def __str__(self) -> str:
+        return (
+            f"Pickle protocol {self.protocol} is not supported by Python "
+            f"{sys.version.split()[0]}, the highest protocol is "
+            f"{pickle.HIGHEST_PROTOCOL}"
+        )
+
+
+class SharedMemoryNotSupported(Exception):
+    def __str__(self) -> str:
+        return (
+            "Shared memory outputs require Python 3.8+, the step runs on "
+            f"Python {sys.version.split()[0]}"
+        )
+
+
+class CompressionNotSupported(Exception):
+    def __init__(self, interface: str) -> None:
+        self.interface = interface
+
+    def __str__(self) -> str:
+        return f'Output interface "{self.interface}" does not support compression'
+
+
+class UnsupportedInputQuery(Exception):
+    def __init__(self, interface: str, query: Dict[str, str]) -> None:
+        self.interface = interface
+        self.query = query
+
+    def __str__(self) -> str:
+        return (
+            f"{self.interface} does not support the input query "
+            f"{', '.join(f'{k}={v}' for k, v in self.query.items())}"
+        )
+
+
+class SharedMemoryInterface(OutputWriter, InputReader):
+    persistent = False
+    _attached: List[shared_memory.SharedMemory] = []
+
+    def __init__(self) -> None:
+        if sys.version_info < (3, 8):
+            raise SharedMemoryNotSupported()
+
+    @staticmethod
+    def _untrack(block: shared_memory.SharedMemory) -> None:
+        # Blocks outlive the process that creates or attaches to them, they are
+        # unlinked by the runtime once every dependent step has finished.
+        try:
+            from multiprocessing import resource_tracker
+
+            resource_tracker.unregister(block._name, "shared_memory")
+        except Exception:
+            pass
+
+    def write(self, obj: Any, path: str) -> Dict[str, Any]:
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            buffer = memoryview(obj).cast("B")
+            attributes = {"kind": "bytes"}
+        elif hasattr(obj, "__array_interface__"):
+            import numpy
+
+            array = numpy.ascontiguousarray(obj)
+            if array.dtype.hasobject:
+                raise UnsupportedOutputType("shm", obj)
+            buffer = memoryview(array.reshape(-1).view(numpy.uint8))
+            attributes = {
+                "kind": "ndarray",
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+            }
+        else:
+            raise UnsupportedOutputType("shm", obj)
+
+        from multiprocessing import shared_memory
+
+        block = shared_memory.SharedMemory(create=True, size=max(buffer.nbytes, 1))
+        self._untrack(block)
+        block.buf[: buffer.nbytes] = buffer
+        block.close()
+
+        attributes["block"] = block.name
+        attributes["nbytes"] = buffer.nbytes
+        with open(path, "w") as f:
+            json.dump(attributes, f)
+        return attributes
+
+    def read(self, path: str, attributes: Optional[Dict[str, Any]] = None) -> Any:
+        if not attributes:
+            with open(path, "r") as f:
+                attributes = json.load(f)
+
+        from multiprocessing import shared_memory
+
+        block = shared_memory.SharedMemory(name=attributes["block"])
+        self._untrack(block)
+        SharedMemoryInterface._attached.append(block)
+
+        if attributes["kind"] == "ndarray":
+            import numpy
+
+            array = numpy.ndarray(
+                tuple(attributes["shape"]),
+                dtype=numpy.dtype(attributes["dtype"]),
+                buffer=block.buf,
+            )
+            array.flags.writeable = False
+            return array
+
+        return block.buf[: attributes["nbytes"]].toreadonly()
+
+    def extension(self) -> str:
+        return "shm"
+
+    def release(self, attributes: Dict[str, Any]) -> None:
+        from multiprocessing import shared_memory
+
+        try:
+            block = shared_memory.SharedMemory(name=attributes["block"])
+        except FileNotFoundError:
+            return
+        block.close()
+        block.unlink()
+
+    @staticmethod
+    def detach_all() -> None:
+        attached, SharedMemoryInterface._attached = SharedMemoryInterface._attached, []
+        for block in attached:
+            try:
+                block.close()
+            except BufferError:
+                pass
+
+
+class ChunkedOutput:
+    path: str
+    chunks: Optional[int]
+
+    def __init__(self, path: str, chunks: Optional[int] = None) -> None:
+        self.path = path
+        self.chunks = chunks
+
+    def __iter__(self) -> Iterator[Any]:
+        with open(self.path, "rb") as f:
+            for offset, size in ChunkInterface.frames(self.path):
+                f.seek(offset)
+                yield pickle.loads(f.read(size))
+
+    def __len__(self) -> int:
+        if self.chunks is None:
+            self.chunks = sum(1 for _ in ChunkInterface.frames(self.path))
+        return self.chunks
+
+
+class ChunkInterface(OutputWriter, InputReader):
+    streaming = True
+    HEADER = struct.Struct("<Q")
+
+    def write(self, obj: Any, path: str) -> Dict[str, Any]:
+        chunks = 0
+        with open(path, "wb") as f:
+            for chunk in obj:
+                data = pickle.dumps(chunk, protocol=pickle.HIGHEST_PROTOCOL)
+                f.write(self.HEADER.pack(len(data)))
+                f.write(data)
+                chunks += 1
+        return {"chunks": chunks}
+
+    def read(self, path: str, attributes: Optional[Dict[str, Any]] = None) -> Any:
+        return ChunkedOutput(path, (attributes or {}).get("chunks"))
+
+    def read_partition(
+        self, path: str, index: int, attributes: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        with open(path, "rb") as f:
+            for offset, size in ChunkInterface.frames(path, start=index):
+                f.seek(offset)
+                return pickle.loads(f.read(size))
+        raise IndexError(f"Chunk {index} out of range in {path}")
+
+    def extension(self) -> str:
+        return "chunks"
+
+    @staticmethod
+    def frames(path: str, start: int = 0) -> Iterator[Tuple[int, int]]:
+        with open(path, "rb") as f:
+            for _ in range(start):
+                header = f.read(ChunkInterface.HEADER.size)
+                if not header:
+                    return
+                (size,) = ChunkInterface.HEADER.unpack(header)
+                f.seek(size, os.SEEK_CUR)
+            while True:
+                header = f.read(ChunkInterface.HEADER.size)
+                if not header:
+                    return
+                (size,) = ChunkInterface.HEADER.unpack(header)
+                yield f.tell(), size
+                f.seek(size, os.SEEK_CUR)
+
+
+class NumpyInterface(OutputWriter, InputReader):
+    mmap_mode: Optional[str] = None
+
+    def write(self, obj: Any, path: str) -> None:
+        import numpy
+
+        array = numpy.asanyarray(obj)
+        if array.dtype.hasobject:
+            raise UnsupportedOutputType("npy", obj)
+        with open(path, "wb") as f:
+            numpy.lib.format.write_array(f, array, allow_pickle=False)
+
+    def read(self, path: str, attributes: Optional[Dict[str, Any]] = None) -> Any:
+        import numpy
+
+        return numpy.load(path, mmap_mode=self.mmap_mode, allow_pickle=False)
+
+    def extension(self) -> str:
+        return "npy"
+
+
+class MemoryMappedNumpyInterface(NumpyInterface):
+    mmap_mode = "r"
+
+
+class _TableInterface(OutputWriter, InputReader):
+    ROW_GROUP_SIZE = 64 * 1024
+    QUERY_KEYS = ("columns", "row_groups", "partition")
+
+    @staticmethod
+    def _to_table(obj: Any, interface: str) -> Any:
+        import pyarrow
+
+        if isinstance(obj, pyarrow.Table):
+            return obj
+        if isinstance(obj, pyarrow.RecordBatch):
+            return pyarrow.Table.from_batches([obj])
+        if isinstance(obj, dict):
+            return pyarrow.table(obj)
+        if type(obj).__name__ == "DataFrame" and hasattr(obj, "columns"):
+            return pyarrow.Table.from_pandas(obj, preserve_index=False)
+        raise UnsupportedOutputType(interface, obj)
+
+    @staticmethod
+    def _table_attributes(table: Any, row_groups: int) -> Dict[str, Any]:
+        return {
+            "rows": table.num_rows,
+            "columns": table.column_names,
+            "row_groups": row_groups,
+        }
+
+    def _projection(
+        self, query: Dict[str, str]
+    ) -> Tuple[Optional[List[str]], Optional[List[int]]]:
+        unknown = {k: v for k, v in query.items() if k not in self.QUERY_KEYS}
+        if unknown:
+            raise UnsupportedInputQuery(type(self).__name__, unknown)
+
+        columns = query["columns"].split(",") if "columns" in query else None
+        row_groups = (
+            [int(i) for i in query["row_groups"].split(",")]
+            if "row_groups" in query
+            else None
+        )
+        if "partition" in query:
+            row_groups = [int(query["partition"])]
+        return columns, row_groups
+
+    def read(self, path: str, attributes: Optional[Dict[str, Any]] = None) -> Any:
+        return self.read_table(path)
+
+    def read_query(
+        self,
+        path: str,
+        query: Dict[str, str],
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        columns, row_groups = self._projection(query)
+        return self.read_table(path, columns=columns, row_groups=row_groups)
+
+    def partitions(self, path: str, attributes: Optional[Dict[str, Any]] = None) -> int:
+        if attributes and "row_groups" in attributes:
+            return attributes["row_groups"]
+        return self.row_groups(path)
+
+    def read_partition(
+        self, path: str, index: int, attributes: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        return self.read_table(path, row_groups=[index])
+
+    def read_table(
+        self,
+        path: str,
+        columns: Optional[List[str]] = None,
+        row_groups: Optional[List[int]] = None,
+    ) -> Any:
+        raise NotImplementedError()
+
+    def row_groups(self, path: str) -> int:
+        raise NotImplementedError()
+
+
+class ArrowInterface(_TableInterface):
+    def write(self, obj: Any, path: str) -> Dict[str, Any]:
+        import pyarrow
+
+        table = self._to_table(obj, "arrow")
+        batches = table.to_batches(max_chunksize=self.ROW_GROUP_SIZE) or [
+            pyarrow.RecordBatch.from_pylist([], schema=table.schema)
+        ]
+        with pyarrow.OSFile(str(path), "wb") as sink:
+            with pyarrow.ipc.new_file(sink, table.schema) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+        return self._table_attributes(table, len(batches))
+
+    def read_table(
+        self,
+        path: str,
+        columns: Optional[List[str]] = None,
+        row_groups: Optional[List[int]] = None,
+    ) -> Any:
+        import pyarrow
+
+        # Memory-mapped IPC files are read without copies, so only the pages of
+        # the selected columns and batches are ever loaded.
+        reader = pyarrow.ipc.open_file(pyarrow.memory_map(str(path), "r"))
+        if row_groups is None:
+            table = reader.read_all()
+        else:
+            table = pyarrow.Table.from_batches(
+                [reader.get_batch(i) for i in row_groups], schema=reader.schema
+            )
+        return table.select(columns) if columns is not None else table
+
+    def row_groups(self, path: str) -> int:
+        import pyarrow
+
+        return pyarrow.ipc.open_file(
+            pyarrow.memory_map(str(path), "r")
+        ).num_record_batches
+
+    def extension(self) -> str:
+        return "arrow"
+
+
+class ParquetInterface(_TableInterface):
+    def write(self, obj: Any, path: str) -> Dict[str, Any]:
+        import pyarrow.parquet
+
+        table = self._to_table(obj, "parquet")
+        pyarrow.parquet.write_table(
+            table, str(path), row_group_size=self.ROW_GROUP_SIZE
+        )
+        return self._table_attributes(
+            table, pyarrow.parquet.ParquetFile(str(path)).num_row_groups
+        )
+
+    def read_table(
+        self,
+        path: str,
+        columns: Optional[List[str]] = None,
+        row_groups: Optional[List[int]] = None,
+    ) -> Any:
+        import pyarrow.parquet
+
+        parquet_file = pyarrow.parquet.ParquetFile(str(path), memory_map=True)
+        if row_groups is None:
+            return parquet_file.read(columns=columns)
+        return parquet_file.read_row_groups(row_groups, columns=columns)
+
+    def row_groups(self, path: str) -> int:
+        import pyarrow.parquet
+
+        return pyarrow.parquet.ParquetFile(str(path)).num_row_groups
+
+    def extension(self) -> str:
+        return "parquet"
+
+
 class InterfaceNotImplemented(Exception):
     pass
 
 
 class InterfaceFactory:
-    INTERFACES = {"pickle": PickleInterface}
+    INTERFACES = {
+        "pickle": PickleInterface,
+        "pickle5": OutOfBandPickleInterface,
+        "shm": SharedMemoryInterface,
+        "npy": NumpyInterface,
+        "npy-mmap": MemoryMappedNumpyInterface,
+        "chunks": ChunkInterface,
+        "arrow": ArrowInterface,
+        "parquet": ParquetInterface,
+    }
 
     @staticmethod
-    def create(type: str):
+    def create(type: str, **options: Any):
         if type not in InterfaceFactory.INTERFACES.keys():
             raise InterfaceNotImplemented()
 
-        return InterfaceFactory.INTERFACES[type]()
+        return InterfaceFactory.INTERFACES[type](**options)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import Any, Iterable, Iterator
+
+PROFILE_PATH_VARIABLE = "DAGGR_PROFILE_PATH"
+
+
+def record_event(phase: str, start: float, duration: float, size: int = 0) -> None:
+    path = os.getenv(PROFILE_PATH_VARIABLE)
+    if not path:
+        return
+
+    event = {"phase": phase, "start": start, "duration": duration, "bytes": size}
+    with open(path, "a") as f:
+        f.write(json.dumps(event) + "\n")
+
+
+class timed:
+    def __init__(self, phase: str) -> None:
+        self.phase = phase
+        self.size = 0
+        # Time spent in the phase that belongs to another one, such as the
+        # step function producing chunks while they are written.
+        self.excluded = 0.0
+
+    def __enter__(self) -> timed:
+        self.start = time.time()
+        self._counter = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        duration = time.perf_counter() - self._counter - self.excluded
+        record_event(self.phase, self.start, duration, self.size)
+
+
+class timed_iterator:
+    def __init__(self, iterable: Iterable[Any]) -> None:
+        self._iterator = iter(iterable)
+        self.seconds = 0.0
+
+    def __iter__(self) -> Iterator[Any]:
+        return self
+
+    def __next__(self) -> Any:
+        counter = time.perf_counter()
+        try:
+            return next(self._iterator)
+        finally:
+            self.seconds += time.perf_counter() - counter
@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import io
+import multiprocessing
+import os
+import resource
+import runpy
+import subprocess
+import sys
+import threading
+import traceback
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional
+
+from daggr import logger
+from daggr.core.decorators import SharedMemoryInterface
+from daggr.core.profiling import ResourceUsage
+from daggr.core.resources import ResourceAllocation
+
+
+class StepExecutor(ABC):
+    @abstractmethod
+    def run(
+        self,
+        script_path: str,
+        env: Dict[str, str],
+        allocation: Optional[ResourceAllocation] = None,
+    ) -> subprocess.CompletedProcess:
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        pass
+
+
+class SubprocessExecutor(StepExecutor):
+    measure_usage: bool
+
+    def __init__(self, measure_usage: bool = False) -> None:
+        self.measure_usage = measure_usage
+
+    def run(
+        self,
+        script_path: str,
+        env: Dict[str, str],
+        allocation: Optional[ResourceAllocation] = None,
+    ) -> subprocess.CompletedProcess:
+        args = (
+            allocation.command(script_path)
+            if allocation
+            else [sys.executable, script_path]
+        )
+        if self.measure_usage and hasattr(os, "wait4"):
+            return self._run_measured(args, env)
+
+        # The interpreter is executed without a shell. With close_fds disabled,
+        # subprocess can start it with posix_spawn or vfork; descriptors opened
+        # by Python are not inheritable anyway.
+        return subprocess.run(
+            args,
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            close_fds=False,
+        )
+
+    def _run_measured(
+        self, args: List[str], env: Dict[str, str]
+    ) -> subprocess.CompletedProcess:
+        # The child is reaped with wait4 to get its own resource usage, which
+        # RUSAGE_CHILDREN cannot attribute when steps run in parallel.
+        process = subprocess.Popen(
+            args,
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            close_fds=False,
+        )
+        streams: Dict[str, str] = {}
+        readers = [
+            threading.Thread(
+                target=lambda name, stream: streams.update({name: stream.read()}),
+                args=(name, stream),
+                daemon=True,
+            )
+            for name, stream in (("stdout", process.stdout), ("stderr", process.stderr))
+        ]
+        for reader in readers:
+            reader.start()
+
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = _exit_code(status)
+        for reader in readers:
+            reader.join()
+        process.stdout.close()
+        process.stderr.close()
+
+        result = subprocess.CompletedProcess(
+            args=args,
+            returncode=process.returncode,
+            stdout=streams.get("stdout", ""),
+            stderr=streams.get("stderr", ""),
+        )
+        result.usage = ResourceUsage.from_rusage(rusage)
+        return result
+
+
+@dataclass
+class _Worker:
+    process: Any
+    connection: Connection
+
+
+class WorkerPoolExecutor(StepExecutor):
+    size: int
+    max_tasks_per_worker: Optional[int]
+    max_memory_bytes: Optional[int]
+    started_workers: int
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        max_tasks_per_worker: Optional[int] = None,
+        max_memory_mb: Optional[int] = None,
+    ) -> None:
+        self.size = size or os.cpu_count() or 1
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024 if max_memory_mb else None
+        self.started_workers = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._idle: List[_Worker] = []
+
+    def _start_worker(self) -> _Worker:
+        parent_connection, child_connection = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_connection, self.max_tasks_per_worker, self.max_memory_bytes),
+            daemon=True,
+        )
+        process.start()
+        child_connection.close()
+        with self._lock:
+            self.started_workers += 1
+        logger.info(f"Started worker process {process.pid}.")
+        return _Worker(process=process, connection=parent_connection)
+
+    def _acquire(self) -> _Worker:
+        self._slots.acquire()
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        try:
+            return self._start_worker()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, worker: Optional[_Worker]) -> None:
+        if worker:
+            with self._lock:
+                self._idle.append(worker)
+        self._slots.release()
+
+    def _stop_worker(self, worker: _Worker) -> None:
+        worker.connection.close()
+        worker.process.join(timeout=5)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+
+    def run(
+        self,
+        script_path: str,
+        env: Dict[str, str],
+        allocation: Optional[ResourceAllocation] = None,
+    ) -> subprocess.CompletedProcess:
+        args = [sys.executable, script_path]
+        task = {
+            "script_path": script_path,
+            "env": {k: v for k, v in env.items() if k.startswith("DAGGR_")},
+        }
+
+        worker = self._acquire()
+        try:
+            with _limit_worker(worker, allocation):
+                worker.connection.send(task)
+                result = worker.connection.recv()
+        except (EOFError, OSError):
+            worker.process.join(timeout=5)
+            exitcode = worker.process.exitcode
+            self._stop_worker(worker)
+            self._release(None)
+            return subprocess.CompletedProcess(
+                args=args,
+                returncode=exitcode if exitcode else 1,
+                stdout="",
+                stderr=f"Worker process {worker.process.pid} died "
+                f"with exit code {exitcode}.\n",
+            )
+
+        if result["recycle"]:
+            logger.info(f"Recycling worker process {worker.process.pid}.")
+            self._stop_worker(worker)
+            self._release(None)
+        else:
+            self._release(worker)
+
+        completed = subprocess.CompletedProcess(
+            args=args,
+            returncode=result["returncode"],
+            stdout=result["stdout"],
+            stderr=result["stderr"],
+        )
+        completed.usage = result["usage"]
+        return completed
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            try:
+                worker.connection.send(None)
+            except OSError:
+                pass
+            self._stop_worker(worker)
+
+
+@contextmanager
+def _limit_worker(worker: _Worker, allocation: Optional[ResourceAllocation]):
+    # Workers are shared between steps, so limits are applied from the parent
+    # for the duration of a task only: the affinity is reset afterwards and
+    # only the soft memory limit is lowered, so it can be raised back.
+    pid = worker.process.pid
+    affinity = None
+    data_limit = None
+    try:
+        if allocation and allocation.cpus and hasattr(os, "sched_setaffinity"):
+            affinity = os.sched_getaffinity(pid)
+            os.sched_setaffinity(pid, allocation.cpus)
+        if allocation and allocation.memory_mb and hasattr(resource, "prlimit"):
+            data_limit = resource.prlimit(pid, resource.RLIMIT_DATA)
+            resource.prlimit(
+                pid,
+                resource.RLIMIT_DATA,
+                (allocation.memory_mb * 2 ** 20, data_limit[1]),
+            )
+        yield
+    finally:
+        try:
+            if affinity is not None:
+                os.sched_setaffinity(pid, affinity)
+            if data_limit is not None:
+                resource.prlimit(pid, resource.RLIMIT_DATA, data_limit)
+        except (OSError, ProcessLookupError):
+            pass
+
+
+def _worker_main(
+    connection: Connection,
+    max_tasks: Optional[int],
+    max_memory_bytes: Optional[int],
+) -> None:
+    base_environ = dict(os.environ)
+    tasks = 0
+
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+
+        result = _run_task(task, base_environ)
+        tasks += 1
+        result["recycle"] = bool(
+            (max_tasks and tasks >= max_tasks)
+            or (max_memory_bytes and _resident_memory_bytes() > max_memory_bytes)
+        )
+        connection.send(result)
+        if result["recycle"]:
+            return
+
+
+def _run_task(task: Dict[str, Any], base_environ: Dict[str, str]) -> Dict[str, Any]:
+    script_path = task["script_path"]
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    returncode = 0
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+
+    os.environ.clear()
+    os.environ.update(base_environ)
+    os.environ.update(task["env"])
+    argv = sys.argv
+    path = list(sys.path)
+    sys.argv = [script_path]
+    sys.path.insert(0, os.path.dirname(script_path))
+
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                runpy.run_path(script_path, run_name="__main__")
+            except SystemExit as e:
+                if e.code is None:
+                    returncode = 0
+                elif isinstance(e.code, int):
+                    returncode = e.code
+                else:
+                    print(e.code, file=sys.stderr)
+                    returncode = 1
+            except BaseException:
+                traceback.print_exc()
+                returncode = 1
+    finally:
+        sys.argv = argv
+        sys.path[:] = path
+        SharedMemoryInterface.detach_all()
+
+    return {
+        "returncode": returncode,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "usage": ResourceUsage.since(usage),
+    }
+
+
+def _exit_code(status: int) -> int:
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _resident_memory_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class ExecutorNotImplemented(Exception):
+    pass
+
+
+class ExecutorFactory:
+    IMPLEMENTATIONS = {
+        "subprocess": SubprocessExecutor,
+        "worker-pool": WorkerPoolExecutor,
+    }
+
+    @staticmethod
+    def create(type: str, **options: Any) -> StepExecutor:
+        if type not in ExecutorFactory.IMPLEMENTATIONS.keys():
+            raise ExecutorNotImplemented()
+
+        return ExecutorFactory.IMPLEMENTATIONS[type](**options)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from array import array
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+
+class CircularDependency(Exception):
+    def __init__(self, cycle: List[str]) -> None:
+        self.cycle = cycle
+
+    def __str__(self) -> str:
+        return f"Steps have a circular dependency: {' -> '.join(self.cycle)}"
+
+
+class CompiledDag:
+    names: List[str]
+    ids: Dict[str, int]
+    successor_offsets: array
+    successors: array
+    predecessor_offsets: array
+    predecessors: array
+    topological_order: array
+    levels: List[List[int]]
+
+    def __init__(self, names: Sequence[str], edges: Iterable[Tuple[str, str]]) -> None:
+        self.names = list(names)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+
+        unique_edges = list(
+            dict.fromkeys(
+                (self.ids[source], self.ids[target]) for source, target in edges
+            )
+        )
+        self.successor_offsets, self.successors = _csr(len(self.names), unique_edges)
+        self.predecessor_offsets, self.predecessors = _csr(
+            len(self.names), [(target, source) for source, target in unique_edges]
+        )
+        self.topological_order, self.levels = self._sort()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def successors_of(self, node: int) -> array:
+        return self.successors[
+            self.successor_offsets[node] : self.successor_offsets[node + 1]
+        ]
+
+    def predecessors_of(self, node: int) -> array:
+        return self.predecessors[
+            self.predecessor_offsets[node] : self.predecessor_offsets[node + 1]
+        ]
+
+    def in_degree(self, node: int) -> int:
+        return self.predecessor_offsets[node + 1] - self.predecessor_offsets[node]
+
+    def ancestors(self, nodes: Iterable[int]) -> List[int]:
+        return self._reachable(nodes, self.predecessors_of)
+
+    def descendants(self, nodes: Iterable[int]) -> List[int]:
+        return self._reachable(nodes, self.successors_of)
+
+    def _reachable(
+        self, nodes: Iterable[int], neighbours: Callable[[int], array]
+    ) -> List[int]:
+        visited = bytearray(len(self))
+        reached = []
+        for node in nodes:
+            if not visited[node]:
+                visited[node] = 1
+                reached.append(node)
+
+        position = 0
+        while position < len(reached):
+            for neighbour in neighbours(reached[position]):
+                if not visited[neighbour]:
+                    visited[neighbour] = 1
+                    reached.append(neighbour)
+            position += 1
+        return reached
+
+    def longest_paths(self, weights: Sequence[float]) -> List[float]:
+        lengths = list(weights)
+        for node in reversed(self.topological_order):
+            successors = self.successors_of(node)
+            if successors:
+                lengths[node] += max(lengths[successor] for successor in successors)
+        return lengths
+
+    def _sort(self) -> Tuple[array, List[List[int]]]:
+        in_degrees = [self.in_degree(node) for node in range(len(self))]
+        level = [0] * len(self)
+        order = array("l", (node for node in range(len(self)) if in_degrees[node] == 0))
+
+        position = 0
+        while position < len(order):
+            node = order[position]
+            position += 1
+            for successor in self.successors_of(node):
+                level[successor] = max(level[successor], level[node] + 1)
+                in_degrees[successor] -= 1
+                if in_degrees[successor] == 0:
+                    order.append(successor)
+
+        if len(order) != len(self):
+            raise CircularDependency(self._find_cycle(in_degrees))
+
+        levels: List[List[int]] = [[] for _ in range(max(level, default=-1) + 1)]
+        for node in order:
+            levels[level[node]].append(node)
+        return order, levels
+
+    def _find_cycle(self, in_degrees: List[int]) -> List[str]:
+        # Nodes left with a positive in-degree after Kahn's algorithm are on a
+        # cycle or downstream of one, walking predecessors must revisit a node.
+        node = next(n for n in range(len(self)) if in_degrees[n] > 0)
+        visited: Dict[int, int] = {}
+        path: List[int] = []
+        while node not in visited:
+            visited[node] = len(path)
+            path.append(node)
+            node = next(p for p in self.predecessors_of(node) if in_degrees[p] > 0)
+
+        cycle = path[visited[node] :]
+        cycle.reverse()
+        first = cycle.index(min(cycle))
+        cycle = cycle[first:] + cycle[:first]
+        return [self.names[n] for n in cycle + [cycle[0]]]
+
+
+def _csr(size: int, edges: List[Tuple[int, int]]) -> Tuple[array, array]:
+    offsets = array("l", [0] * (size + 1))
+    for source, _ in edges:
+        offsets[source + 1] += 1
+    for node in range(size):
+        offsets[node + 1] += offsets[node]
+
+    targets = array("l", [0] * len(edges))
+    position = array("l", offsets[:-1])
+    for source, target in edges:
+        targets[position[source]] = target
+        position[source] += 1
+    return offsets, targets
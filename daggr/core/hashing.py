@@ -0,0 +1,28 @@
+import hashlib
+import stat
+from pathlib import Path
+from typing import Dict, Union
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: Union[str, Path]) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stat_directory(path: Union[str, Path]) -> Dict[str, str]:
+    # Size and modification time of each file, cheap enough to record after
+    # every step and compared when a run is resumed or checked for changes.
+    root = Path(path)
+    signatures = {}
+    for file in sorted(root.rglob("*")):
+        file_stat = file.stat()
+        if stat.S_ISREG(file_stat.st_mode):
+            signatures[
+                str(file.relative_to(root))
+            ] = f"{file_stat.st_size}:{file_stat.st_mtime_ns}"
+    return signatures
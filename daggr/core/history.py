@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import json
+import math
+import pickle
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from daggr.core.dag import DagRun, StepRun, StepState
+from daggr.core.decorators import read_step_output_metadata
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    dag TEXT NOT NULL,
+    state TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_dag ON runs (dag, start_time);
+CREATE TABLE IF NOT EXISTS steps (
+    run_id TEXT NOT NULL,
+    step TEXT NOT NULL,
+    state TEXT NOT NULL,
+    start_time TEXT,
+    end_time TEXT,
+    duration_seconds REAL,
+    returncode INTEGER,
+    cache_key TEXT,
+    cached INTEGER NOT NULL,
+    reused INTEGER NOT NULL,
+    outputs TEXT NOT NULL,
+    PRIMARY KEY (run_id, step)
+);
+"""
+
+
+@dataclass
+class StepStatistics:
+    step: str
+    runs: int
+    failures: int
+    mean_seconds: Optional[float]
+    p50_seconds: Optional[float]
+    percentile_seconds: Optional[float]
+    max_seconds: Optional[float]
+
+
+class RunHistory:
+    path: Path
+    batch_size: int
+    flush_interval: float
+
+    def __init__(
+        self, path: str, batch_size: int = 100, flush_interval: float = 5.0
+    ) -> None:
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[Any, ...]] = []
+        self._last_flush = time.monotonic()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.path), timeout=30)
+        if not self._initialized:
+            # WAL lets readers query the history while a run appends to it,
+            # and NORMAL synchronous mode skips an fsync per transaction.
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._initialized = True
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def start_run(self, dag_run: DagRun) -> None:
+        with self._lock:
+            with _closing(self._connect()) as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, NULL)",
+                    (
+                        dag_run.run_id,
+                        dag_run.dag.name,
+                        StepState.EXECUTING.name,
+                        datetime.utcnow().isoformat(),
+                    ),
+                )
+
+    def record_step(self, dag_run: DagRun, step_name: str) -> None:
+        row = self._step_row(dag_run, step_name)
+        with self._lock:
+            self._pending.append(row)
+            if (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self._flush()
+
+    def finish_run(self, dag_run: DagRun) -> None:
+        rows = [self._step_row(dag_run, name) for name in dag_run.step_runs]
+        states = {step_run.state for step_run in dag_run.step_runs.values()}
+        state = StepState.SUCCESSFUL
+        if StepState.FAILED in states:
+            state = StepState.FAILED
+        elif states - {StepState.SUCCESSFUL}:
+            state = StepState.CANCELLED
+
+        with self._lock:
+            self._pending = rows
+            with _closing(self._connect()) as connection:
+                self._write_steps(connection)
+                connection.execute(
+                    "UPDATE runs SET state = ?, end_time = ? WHERE run_id = ?",
+                    (state.name, datetime.utcnow().isoformat(), dag_run.run_id),
+                )
+
+    def _flush(self) -> None:
+        with _closing(self._connect()) as connection:
+            self._write_steps(connection)
+
+    def _write_steps(self, connection: sqlite3.Connection) -> None:
+        connection.executemany(
+            "INSERT OR REPLACE INTO steps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            self._pending,
+        )
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def _step_row(self, dag_run: DagRun, step_name: str) -> Tuple[Any, ...]:
+        step_run = dag_run.step_runs[step_name]
+        return (
+            dag_run.run_id,
+            step_name,
+            step_run.state.name,
+            _isoformat(step_run.start_time),
+            _isoformat(step_run.end_time),
+            _duration(step_run),
+            step_run.returncode,
+            step_run.cache_key,
+            int(step_run.cached),
+            int(step_run.reused),
+            json.dumps(
+                {
+                    "files": step_run.outputs,
+                    "metadata": _output_metadata(dag_run.dag.outputs_path / step_name),
+                },
+                default=str,
+            ),
+        )
+
+    def latest_dag(self) -> Optional[str]:
+        if not self.path.is_file():
+            return None
+
+        with _closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT dag FROM runs ORDER BY start_time DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    def runs(self, dag_name: str, limit: int) -> List[Dict[str, Any]]:
+        if not self.path.is_file():
+            return []
+
+        with _closing(self._connect()) as connection:
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute(
+                "SELECT * FROM runs WHERE dag = ? ORDER BY start_time DESC LIMIT ?",
+                (dag_name, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def durations(self, dag_name: str, max_runs: int = 10) -> Dict[str, float]:
+        if not self.path.is_file():
+            return {}
+
+        with _closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT steps.step, AVG(steps.duration_seconds) FROM steps "
+                "JOIN (SELECT run_id FROM runs WHERE dag = ? "
+                "ORDER BY start_time DESC LIMIT ?) AS latest USING (run_id) "
+                "WHERE steps.cached = 0 AND steps.reused = 0 AND steps.state = ? "
+                "AND steps.duration_seconds IS NOT NULL GROUP BY steps.step",
+                (dag_name, max_runs, StepState.SUCCESSFUL.name),
+            ).fetchall()
+        return dict(rows)
+
+    def step_statistics(
+        self,
+        dag_name: str,
+        max_runs: int = 30,
+        percentile: float = 95,
+        step_name: Optional[str] = None,
+    ) -> List[StepStatistics]:
+        if not self.path.is_file():
+            return []
+
+        query = (
+            "SELECT steps.step, steps.state, steps.duration_seconds FROM steps "
+            "JOIN (SELECT run_id FROM runs WHERE dag = ? "
+            "ORDER BY start_time DESC LIMIT ?) AS latest USING (run_id) "
+            "WHERE steps.cached = 0 AND steps.reused = 0 "
+            "AND steps.state IN (?, ?)"
+        )
+        parameters: List[Any] = [
+            dag_name,
+            max_runs,
+            StepState.SUCCESSFUL.name,
+            StepState.FAILED.name,
+        ]
+        if step_name:
+            query += " AND steps.step = ?"
+            parameters.append(step_name)
+
+        with _closing(self._connect()) as connection:
+            rows = connection.execute(query, parameters).fetchall()
+
+        durations: Dict[str, List[float]] = {}
+        failures: Dict[str, int] = {}
+        for name, state, duration in rows:
+            durations.setdefault(name, [])
+            failures.setdefault(name, 0)
+            if state == StepState.FAILED.name:
+                failures[name] += 1
+            elif duration is not None:
+                durations[name].append(duration)
+
+        return [
+            StepStatistics(
+                step=name,
+                runs=len(values) + failures[name],
+                failures=failures[name],
+                mean_seconds=sum(values) / len(values) if values else None,
+                p50_seconds=_percentile(values, 50),
+                percentile_seconds=_percentile(values, percentile),
+                max_seconds=max(values, default=None),
+            )
+            for name, values in sorted(durations.items())
+        ]
+
+
+class _closing:
+    # sqlite3 connections used as context managers commit but stay open.
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self.connection
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        try:
+            if exc_type is None:
+                self.connection.commit()
+        finally:
+            self.connection.close()
+
+
+def _percentile(values: List[float], percentile: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percentile / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _duration(step_run: StepRun) -> Optional[float]:
+    if step_run.start_time and step_run.end_time:
+        return (step_run.end_time - step_run.start_time).total_seconds()
+    return None
+
+
+def _output_metadata(step_output_path: Path) -> List[Dict[str, Any]]:
+    try:
+        metadata = read_step_output_metadata(step_output_path)
+    except (OSError, EOFError, AttributeError, pickle.UnpicklingError):
+        return []
+    return [asdict(output) for output in metadata.outputs] if metadata else []
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
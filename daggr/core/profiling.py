@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import json
+import resource
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from daggr.core.events import PROFILE_PATH_VARIABLE
+from daggr.core.graph import CompiledDag
+
+if TYPE_CHECKING:
+    from daggr.core.dag import DagRun, StepRun
+
+
+class ProfileNotFound(Exception):
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def __str__(self) -> str:
+        return f"No profile found in {self.path}"
+
+
+@dataclass
+class ResourceUsage:
+    user_seconds: float
+    system_seconds: float
+    max_rss_kb: Optional[int]
+
+    @staticmethod
+    def from_rusage(rusage: Any) -> ResourceUsage:
+        return ResourceUsage(
+            user_seconds=rusage.ru_utime,
+            system_seconds=rusage.ru_stime,
+            max_rss_kb=rusage.ru_maxrss,
+        )
+
+    @staticmethod
+    def since(before: Any) -> ResourceUsage:
+        # ru_maxrss is the peak of the whole process, it is only the peak of
+        # the task when the task raised it, otherwise the task's is unknown.
+        after = resource.getrusage(resource.RUSAGE_SELF)
+        return ResourceUsage(
+            user_seconds=after.ru_utime - before.ru_utime,
+            system_seconds=after.ru_stime - before.ru_stime,
+            max_rss_kb=(
+                after.ru_maxrss if after.ru_maxrss > before.ru_maxrss else None
+            ),
+        )
+
+
+class Profiler:
+    path: Path
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self._usage: Dict[str, ResourceUsage] = {}
+
+    def events_file(self, step_name: str) -> Path:
+        return self.path / "steps" / f"{step_name}.jsonl"
+
+    def env(self, step_name: str) -> Dict[str, str]:
+        events_file = self.events_file(step_name)
+        events_file.parent.mkdir(parents=True, exist_ok=True)
+        if events_file.exists():
+            events_file.unlink()
+        return {PROFILE_PATH_VARIABLE: str(events_file)}
+
+    def record_usage(self, step_name: str, usage: Optional[ResourceUsage]) -> None:
+        if usage:
+            self._usage[step_name] = usage
+
+    def _events(self, step_name: str) -> List[Dict[str, Any]]:
+        events_files = [self.events_file(step_name)]
+        events_files += sorted(
+            (self.path / "steps").glob(f"{step_name}.*.jsonl"),
+            key=lambda f: int(f.name.split(".")[1]),
+        )
+
+        events = []
+        for events_file in events_files:
+            if events_file.is_file():
+                with open(events_file, "r") as f:
+                    events += [json.loads(line) for line in f if line.strip()]
+        return events
+
+    def _step_profile(self, step_name: str, step_run: StepRun) -> Dict[str, Any]:
+        events = self._events(step_name)
+        phases: Dict[str, float] = {}
+        for event in events:
+            phases[event["phase"]] = phases.get(event["phase"], 0) + event["duration"]
+
+        wall_seconds = None
+        if step_run.start_time and step_run.end_time:
+            wall_seconds = (step_run.end_time - step_run.start_time).total_seconds()
+
+        usage = self._usage.get(step_name)
+        return {
+            "state": step_run.state.name,
+            "depends_on": step_run.step.depends_on,
+            "start": _timestamp(step_run.start_time),
+            "wall_seconds": wall_seconds,
+            **(asdict(usage) if usage else {}),
+            "bytes_read": sum(e["bytes"] for e in events if e["phase"] == "inputs"),
+            "bytes_written": sum(e["bytes"] for e in events if e["phase"] == "output"),
+            "phases": phases,
+            "events": events,
+        }
+
+    def write(self, dag_run: DagRun) -> Path:
+        profile = {
+            "run_id": dag_run.run_id,
+            "dag": dag_run.dag.name,
+            "steps": {
+                name: self._step_profile(name, step_run)
+                for name, step_run in dag_run.step_runs.items()
+            },
+        }
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / "profile.json", "w") as f:
+            json.dump(profile, f, indent=2)
+        with open(self.path / "trace.json", "w") as f:
+            json.dump(chrome_trace(profile), f)
+        return self.path / "profile.json"
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[float]:
+    # Step runs record naive UTC datetimes.
+    return value.replace(tzinfo=timezone.utc).timestamp() if value else None
+
+
+def _lanes(steps: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    lanes: Dict[str, int] = {}
+    lane_ends: List[float] = []
+    timed_steps = [(n, s) for n, s in steps.items() if s["start"] is not None]
+    for name, step in sorted(timed_steps, key=lambda item: item[1]["start"]):
+        end = step["start"] + (step["wall_seconds"] or 0)
+        lane = next(
+            (i for i, lane_end in enumerate(lane_ends) if lane_end <= step["start"]),
+            len(lane_ends),
+        )
+        if lane == len(lane_ends):
+            lane_ends.append(end)
+        else:
+            lane_ends[lane] = end
+        lanes[name] = lane
+    return lanes
+
+
+def chrome_trace(profile: Dict[str, Any]) -> Dict[str, Any]:
+    events = []
+    for name, lane in _lanes(profile["steps"]).items():
+        step = profile["steps"][name]
+        args = {k: v for k, v in step.items() if k not in ("events", "depends_on")}
+        events.append(
+            {
+                "name": name,
+                "cat": "step",
+                "ph": "X",
+                "ts": step["start"] * 1e6,
+                "dur": (step["wall_seconds"] or 0) * 1e6,
+                "pid": 1,
+                "tid": lane,
+                "args": args,
+            }
+        )
+        for event in step["events"]:
+            events.append(
+                {
+                    "name": event["phase"],
+                    "cat": "phase",
+                    "ph": "X",
+                    "ts": event["start"] * 1e6,
+                    "dur": event["duration"] * 1e6,
+                    "pid": 1,
+                    "tid": lane,
+                    "args": {"bytes": event["bytes"]},
+                }
+            )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def load_profile(path: str, run_id: Optional[str] = None) -> Dict[str, Any]:
+    profiles_path = Path(path)
+    if run_id:
+        profile_file = profiles_path / run_id / "profile.json"
+    else:
+        profile_files = sorted(
+            profiles_path.glob("*/profile.json"), key=lambda f: f.stat().st_mtime
+        )
+        profile_file = profile_files[-1] if profile_files else profiles_path
+    if not profile_file.is_file():
+        raise ProfileNotFound(str(profiles_path))
+
+    with open(profile_file, "r") as f:
+        return json.load(f)
+
+
+def critical_path(profile: Dict[str, Any]) -> Tuple[List[str], float]:
+    steps = profile["steps"]
+    if not steps:
+        return [], 0.0
+
+    graph = CompiledDag(
+        list(steps),
+        ((d, name) for name, step in steps.items() for d in step["depends_on"]),
+    )
+    lengths = graph.longest_paths(
+        [steps[name]["wall_seconds"] or 0.0 for name in graph.names]
+    )
+
+    node = max(
+        (n for n in range(len(graph)) if graph.in_degree(n) == 0),
+        key=lambda n: lengths[n],
+    )
+    path = [node]
+    while len(graph.successors_of(node)):
+        node = max(graph.successors_of(node), key=lambda n: lengths[n])
+        path.append(node)
+    return [graph.names[n] for n in path], lengths[path[0]]
+
+
+def slowest_steps(profile: Dict[str, Any], count: int) -> List[Tuple[str, Any]]:
+    return sorted(
+        profile["steps"].items(),
+        key=lambda item: item[1]["wall_seconds"] or 0.0,
+        reverse=True,
+    )[:count]
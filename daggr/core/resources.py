@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from daggr import logger
+
+
+def _host_cpus() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _host_memory_mb() -> Optional[int]:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2 ** 20
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+@dataclass
+class ResourceRequest:
+    cpus: Optional[int] = None
+    memory_mb: Optional[int] = None
+
+    @staticmethod
+    def from_step(resources: Optional[Dict[str, Any]]) -> ResourceRequest:
+        resources = resources or {}
+        return ResourceRequest(
+            cpus=resources.get("cpus"), memory_mb=resources.get("memory_mb")
+        )
+
+
+@dataclass
+class ResourceAllocation:
+    cpus: List[int] = field(default_factory=lambda: [])
+    memory_mb: Optional[int] = None
+
+    def is_limited(self) -> bool:
+        return bool(self.cpus or self.memory_mb)
+
+    def command(self, script_path: str) -> List[str]:
+        # The limits are set by the child itself before the step script runs,
+        # so the step never runs outside of its allocation.
+        if not self.is_limited():
+            return [sys.executable, script_path]
+        cpus = ",".join(str(cpu) for cpu in self.cpus)
+        memory_mb = str(self.memory_mb or "")
+        return [sys.executable, "-c", _LAUNCHER, cpus, memory_mb, script_path]
+
+
+# Runs the step script like "python <script>" once the limits are applied. It
+# does not import daggr, which configures logging when it is imported.
+_LAUNCHER = """\
+import os, resource, runpy, sys
+cpus, memory_mb, script_path = sys.argv[1:]
+if cpus and hasattr(os, "sched_setaffinity"):
+    os.sched_setaffinity(0, [int(cpu) for cpu in cpus.split(",")])
+if memory_mb and hasattr(resource, "setrlimit"):
+    memory_bytes = int(memory_mb) * 2 ** 20
+    resource.setrlimit(resource.RLIMIT_DATA, (memory_bytes, memory_bytes))
+sys.argv = [script_path]
+sys.path[0] = os.path.dirname(script_path)
+runpy.run_path(script_path, run_name="__main__")
+"""
+
+
+class ResourcePool:
+    cpus: List[int]
+    memory_mb: Optional[int]
+
+    def __init__(
+        self, cpus: Optional[int] = None, memory_mb: Optional[int] = None
+    ) -> None:
+        host_cpus = _host_cpus()
+        self.cpus = host_cpus[:cpus] if cpus else host_cpus
+        self.memory_mb = memory_mb or _host_memory_mb()
+        self._free_cpus = list(self.cpus)
+        self._free_memory_mb = self.memory_mb
+
+    def _clamp(self, request: ResourceRequest, warn: bool = False) -> ResourceRequest:
+        cpus = request.cpus
+        memory_mb = request.memory_mb
+        if cpus and cpus > len(self.cpus):
+            if warn:
+                logger.warning(
+                    f"{cpus} CPUs requested but only {len(self.cpus)} are available."
+                )
+            cpus = len(self.cpus)
+        if memory_mb and self.memory_mb and memory_mb > self.memory_mb:
+            if warn:
+                logger.warning(
+                    f"{memory_mb} MB of memory requested but only "
+                    f"{self.memory_mb} MB are available."
+                )
+            memory_mb = self.memory_mb
+        return ResourceRequest(cpus=cpus, memory_mb=memory_mb)
+
+    def fits(self, request: ResourceRequest) -> bool:
+        request = self._clamp(request)
+        if request.cpus and request.cpus > len(self._free_cpus):
+            return False
+        if request.memory_mb and self._free_memory_mb is not None:
+            return request.memory_mb <= self._free_memory_mb
+        return True
+
+    def acquire(self, request: ResourceRequest) -> ResourceAllocation:
+        request = self._clamp(request, warn=True)
+        allocation = ResourceAllocation(memory_mb=request.memory_mb)
+        if request.cpus:
+            allocation.cpus = self._free_cpus[: request.cpus]
+            del self._free_cpus[: request.cpus]
+        if request.memory_mb and self._free_memory_mb is not None:
+            self._free_memory_mb -= request.memory_mb
+        return allocation
+
+    def release(self, allocation: ResourceAllocation) -> None:
+        self._free_cpus.extend(allocation.cpus)
+        self._free_cpus.sort()
+        if allocation.memory_mb and self._free_memory_mb is not None:
+            self._free_memory_mb += allocation.memory_mb
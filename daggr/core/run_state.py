@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from daggr import logger
+from daggr.core.dag import INLINE_STEP_TYPE, Dag, DagRun, Step, StepRun, StepState
+from daggr.core.decorators import has_transient_outputs
+from daggr.core.hashing import hash_file, stat_directory
+
+
+class RunNotFound(Exception):
+    def __init__(self, run_id: str, path: str) -> None:
+        self.run_id = run_id
+        self.path = path
+
+    def __str__(self) -> str:
+        return f'DAG run "{self.run_id}" not found in {self.path}'
+
+
+class RunStateStore:
+    path: Path
+    max_runs: int
+
+    def __init__(self, path: str, max_runs: int = 100) -> None:
+        self.path = Path(path)
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+
+    def _run_file(self, run_id: str) -> Path:
+        return self.path / f"{run_id}.json"
+
+    def _journal_file(self, run_id: str) -> Path:
+        return self.path / f"{run_id}.journal"
+
+    def record_step(self, dag_run: DagRun, step_name: str) -> None:
+        # One line per finished step; save() compacts the journal at the end of
+        # the run, so the cost of a step does not grow with the size of the DAG.
+        step_run = dag_run.step_runs[step_name]
+        step_run.inputs_fingerprint = _inputs_fingerprint(
+            step_run.step,
+            {
+                name: dag_run.step_runs[name].outputs
+                for name in step_run.step.depends_on
+            },
+        )
+        entry = {"step": step_name, **_step_state(step_run)}
+        with self._lock:
+            journal_file = self._journal_file(dag_run.run_id)
+            if not journal_file.exists():
+                self.path.mkdir(parents=True, exist_ok=True)
+                header = {"run_id": dag_run.run_id, "dag": dag_run.dag.name}
+                with open(journal_file, "a") as f:
+                    f.write(json.dumps(header) + "\n")
+            with open(journal_file, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def save(self, dag_run: DagRun) -> None:
+        state = {
+            "run_id": dag_run.run_id,
+            "dag": dag_run.dag.name,
+            "steps": {
+                name: _step_state(step_run)
+                for name, step_run in dag_run.step_runs.items()
+            },
+        }
+
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            run_file = self._run_file(dag_run.run_id)
+            tmp_file = run_file.with_suffix(".tmp")
+            with open(tmp_file, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_file, run_file)
+            journal_file = self._journal_file(dag_run.run_id)
+            if journal_file.exists():
+                journal_file.unlink()
+            self._prune()
+
+    def _prune(self) -> None:
+        # Previous runs are looked up by modification time, so the directory is
+        # kept to the latest runs to bound the cost of every daggr run.
+        run_files = sorted(
+            [*self.path.glob("*.json"), *self.path.glob("*.journal")],
+            key=lambda f: f.stat().st_mtime,
+            reverse=True,
+        )
+        run_ids: List[str] = []
+        for run_file in run_files:
+            if run_file.stem not in run_ids:
+                run_ids.append(run_file.stem)
+            if len(run_ids) > self.max_runs:
+                run_file.unlink()
+
+    def load(self, run_id: str) -> Dict[str, Any]:
+        run_file = self._run_file(run_id)
+        journal_file = self._journal_file(run_id)
+        if not run_file.is_file() and not journal_file.is_file():
+            raise RunNotFound(run_id, str(self.path))
+
+        state: Dict[str, Any] = {"run_id": run_id, "steps": {}}
+        if run_file.is_file():
+            with open(run_file, "r") as f:
+                state = json.load(f)
+        if journal_file.is_file():
+            # Runs that did not finish, or resumed runs, still have steps that
+            # were not compacted into the run file.
+            with open(journal_file, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if "step" in entry:
+                        state["steps"][entry.pop("step")] = entry
+                    else:
+                        state.setdefault("dag", entry["dag"])
+        return state
+
+    def _latest_runs(self, dag_name: str) -> Iterator[Dict[str, Any]]:
+        if not self.path.is_dir():
+            return
+
+        run_files = sorted(
+            [*self.path.glob("*.json"), *self.path.glob("*.journal")],
+            key=lambda f: f.stat().st_mtime,
+            reverse=True,
+        )
+        run_ids = set()
+        for run_file in run_files:
+            if run_file.stem in run_ids:
+                continue
+            run_ids.add(run_file.stem)
+            try:
+                state = self.load(run_file.stem)
+            except (OSError, ValueError, KeyError, RunNotFound):
+                continue
+            if state.get("dag") == dag_name:
+                yield state
+
+    def resume(self, dag_run: DagRun, run_id: str) -> None:
+        steps = self.load(run_id)["steps"]
+        dag_run.run_id = run_id
+        self._reuse(dag_run, run_id, steps, self._failed_steps(dag_run, steps))
+
+    def fingerprint(self, dag_run: DagRun) -> None:
+        for name, step_run in dag_run.step_runs.items():
+            step_run.fingerprint = step_fingerprint(dag_run.dag, name)
+
+    def carry_over(self, dag_run: DagRun, step_names: Set[str]) -> None:
+        # Steps left out of a --target/--from run were not executed, they keep
+        # the fingerprints of the run that last executed them so that --changed
+        # still runs them when their upstream outputs were recomputed since.
+        previous = next(self._latest_runs(dag_run.dag.name), {"steps": {}})
+        for name in step_names:
+            saved = previous["steps"].get(name) or {}
+            step_run = dag_run.step_runs[name]
+            step_run.fingerprint = saved.get("fingerprint")
+            step_run.inputs_fingerprint = saved.get("inputs_fingerprint")
+
+    def changed(self, dag_run: DagRun) -> None:
+        previous = next(self._latest_runs(dag_run.dag.name), None)
+        if not previous:
+            logger.info("No previous run found, every step will be executed.")
+            return
+
+        steps = previous["steps"]
+        outputs = {name: saved["outputs"] for name, saved in steps.items()}
+        rerun = self._failed_steps(dag_run, steps)
+        for name, step_run in dag_run.step_runs.items():
+            if name in rerun:
+                continue
+            saved = steps[name]
+            if saved.get("fingerprint") != step_run.fingerprint:
+                logger.info(f'Step "{name}" changed, it will be executed.')
+                rerun.add(name)
+            elif saved.get("inputs_fingerprint") != _inputs_fingerprint(
+                step_run.step, outputs
+            ):
+                logger.info(f'Inputs of step "{name}" changed, it will be executed.')
+                rerun.add(name)
+        self._reuse(dag_run, previous["run_id"], steps, rerun)
+
+    def _failed_steps(self, dag_run: DagRun, steps: Dict[str, Any]) -> Set[str]:
+        failed: Set[str] = set()
+        for name in dag_run.dag.steps:
+            saved = steps.get(name)
+            if not saved or saved["state"] != StepState.SUCCESSFUL.name:
+                failed.add(name)
+            elif _kept_in_memory(dag_run.dag, name):
+                failed.add(name)
+            elif not _outputs_are_intact(
+                dag_run.dag.outputs_path / name, saved["outputs"]
+            ):
+                logger.info(f'Outputs of step "{name}" changed, it will be executed.')
+                failed.add(name)
+        return failed
+
+    def _reuse(
+        self, dag_run: DagRun, run_id: str, steps: Dict[str, Any], rerun: Set[str]
+    ) -> None:
+        pending = list(rerun)
+        while pending:
+            for dependent_step in dag_run.dag.steps[pending.pop()].dependency_of:
+                if dependent_step not in rerun:
+                    rerun.add(dependent_step)
+                    pending.append(dependent_step)
+
+        for name, step_run in dag_run.step_runs.items():
+            if name in rerun:
+                continue
+            saved = steps[name]
+            step_run.state = StepState.SUCCESSFUL
+            step_run.reused = True
+            step_run.start_time = _fromisoformat(saved["start_time"])
+            step_run.end_time = _fromisoformat(saved["end_time"])
+            step_run.cache_key = saved["cache_key"]
+            step_run.fingerprint = saved.get("fingerprint")
+            step_run.inputs_fingerprint = saved.get("inputs_fingerprint")
+            step_run.outputs = saved["outputs"]
+            logger.info(f'Step "{name}" reused from run "{run_id}".')
+
+
+def step_fingerprint(dag: Dag, step_name: str) -> str:
+    step = dag.steps[step_name]
+    digest = hashlib.sha256()
+    try:
+        digest.update(hash_file(Path(dag.definition_path) / step.script).encode())
+    except OSError:
+        digest.update(b"missing script")
+    digest.update(
+        json.dumps(
+            {
+                "script": step.script,
+                "type": step.type,
+                "parameters": step.parameters,
+                "inputs": step.inputs,
+                "depends_on": sorted(step.depends_on),
+                "map_over": step.map_over,
+                "function": step.function,
+            },
+            sort_keys=True,
+            default=str,
+        ).encode()
+    )
+    return digest.hexdigest()
+
+
+def _inputs_fingerprint(step: Step, outputs: Dict[str, Dict[str, str]]) -> str:
+    # The hashes of the upstream outputs a step consumed, a step has to run
+    # again when they changed even if its own definition did not.
+    upstream_outputs = {name: outputs.get(name) for name in step.depends_on}
+    return hashlib.sha256(
+        json.dumps(upstream_outputs, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def _kept_in_memory(dag: Dag, step_name: str) -> bool:
+    # Outputs handed only to inline dependents are never written to disk, so
+    # the step has to run again for its dependents to be executed.
+    step = dag.steps[step_name]
+    return (
+        step.type == INLINE_STEP_TYPE
+        and bool(step.dependency_of)
+        and not (dag.outputs_path / step_name).is_dir()
+    )
+
+
+def _outputs_are_intact(step_output_path: Path, outputs: Dict[str, str]) -> bool:
+    if not step_output_path.is_dir():
+        return not outputs
+    if has_transient_outputs(step_output_path):
+        return False
+    return stat_directory(step_output_path) == outputs
+
+
+def _step_state(step_run: StepRun) -> Dict[str, Any]:
+    return {
+        "state": step_run.state.name,
+        "start_time": _isoformat(step_run.start_time),
+        "end_time": _isoformat(step_run.end_time),
+        "cache_key": step_run.cache_key,
+        "fingerprint": step_run.fingerprint,
+        "inputs_fingerprint": step_run.inputs_fingerprint,
+        "outputs": step_run.outputs,
+    }
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _fromisoformat(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
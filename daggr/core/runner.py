@@ -1,4 +1,14 @@
+from pathlib import Path
+from typing import List, Optional
+
+from daggr import logger
+from daggr.core.cache import StepCache
 from daggr.core.dag import Dag, DagRun, DagRuntimeFactory
+from daggr.core.executors import ExecutorFactory, StepExecutor
+from daggr.core.history import RunHistory
+from daggr.core.profiling import Profiler
+from daggr.core.resources import ResourcePool
+from daggr.core.run_state import RunStateStore
 from daggr.workflow_loader.workflow_definition_loader_factory import (
     WorkflowDefinitionLoaderFactory,
 )
@@ -6,10 +16,66 @@ from daggr.workflow_loader.workflow_loader import WorkflowLoader
 
 
 class Runner:
-    def __init__(self, workflow_format: str, workflow_filepath: str, runtime: str):
+    def __init__(
+        self,
+        workflow_format: str,
+        workflow_filepath: str,
+        runtime: str,
+        max_workers: Optional[int] = None,
+        use_cache: bool = False,
+        cache_max_size_mb: Optional[int] = None,
+        resume_run_id: Optional[str] = None,
+        executor: str = "subprocess",
+        worker_max_tasks: Optional[int] = None,
+        worker_max_memory_mb: Optional[int] = None,
+        max_cpus: Optional[int] = None,
+        max_memory_mb: Optional[int] = None,
+        profile: bool = False,
+        history_path: Optional[str] = None,
+        only_changed: bool = False,
+        targets: Optional[List[str]] = None,
+        sources: Optional[List[str]] = None,
+    ):
         self.workflow_format = workflow_format
         self.workflow_filepath = workflow_filepath
         self.runtime = runtime
+        self.max_workers = max_workers
+        self.use_cache = use_cache
+        self.cache_max_size_mb = cache_max_size_mb
+        self.resume_run_id = resume_run_id
+        self.executor = executor
+        self.worker_max_tasks = worker_max_tasks
+        self.worker_max_memory_mb = worker_max_memory_mb
+        self.max_cpus = max_cpus
+        self.max_memory_mb = max_memory_mb
+        self.profile = profile
+        self.history_path = history_path
+        self.only_changed = only_changed
+        self.targets = targets
+        self.sources = sources
+
+    def _create_executor(self) -> StepExecutor:
+        if self.executor == "worker-pool":
+            return ExecutorFactory.create(
+                self.executor,
+                size=self.max_workers,
+                max_tasks_per_worker=self.worker_max_tasks,
+                max_memory_mb=self.worker_max_memory_mb,
+            )
+        if self.executor == "subprocess":
+            return ExecutorFactory.create(self.executor, measure_usage=self.profile)
+        return ExecutorFactory.create(self.executor)
+
+    def _create_cache(self, dag: Dag) -> Optional[StepCache]:
+        if not self.use_cache:
+            return None
+
+        max_size_bytes = (
+            self.cache_max_size_mb * 1024 * 1024
+            if self.cache_max_size_mb is not None
+            else None
+        )
+        return StepCache(Path(dag.definition_path) / ".daggr" / "cache", max_size_bytes)
 
     def run(self) -> DagRun:
         definition_loader = WorkflowDefinitionLoaderFactory.create(
@@ -19,7 +85,47 @@ class Runner:
         wd = loader.load()
         dag = Dag(wd)
         dag_run = DagRun(dag)
-        runtime = DagRuntimeFactory.create(self.runtime, dag_run)
-        runtime.execute()
+        run_state_store = RunStateStore(Path(dag.definition_path) / ".daggr" / "runs")
+        run_state_store.fingerprint(dag_run)
+        if self.resume_run_id:
+            run_state_store.resume(dag_run, self.resume_run_id)
+        elif self.only_changed:
+            run_state_store.changed(dag_run)
+        if self.targets or self.sources:
+            reused = {name for name, run in dag_run.step_runs.items() if run.reused}
+            selected = dag_run.select(targets=self.targets, sources=self.sources)
+            run_state_store.carry_over(dag_run, set(dag.steps) - selected - reused)
+            logger.info(f"{len(selected)} of {len(dag.steps)} steps selected.")
+
+        profiler = (
+            Profiler(Path(dag.definition_path) / ".daggr" / "profiles" / dag_run.run_id)
+            if self.profile
+            else None
+        )
+        history = RunHistory(
+            self.history_path or Path(dag.definition_path) / ".daggr" / "history.db"
+        )
+        history.start_run(dag_run)
+        executor = self._create_executor()
+        try:
+            runtime = DagRuntimeFactory.create(
+                self.runtime,
+                dag_run,
+                max_workers=self.max_workers,
+                cache=self._create_cache(dag),
+                run_state_store=run_state_store,
+                executor=executor,
+                step_durations=history.durations(dag.name),
+                resource_pool=ResourcePool(self.max_cpus, self.max_memory_mb),
+                profiler=profiler,
+                history=history,
+            )
+            runtime.execute()
+        finally:
+            executor.close()
+            history.finish_run(dag_run)
+        run_state_store.save(dag_run)
+        if profiler:
+            logger.info(f"Profile written to {profiler.write(dag_run)}")
 
         return dag_run
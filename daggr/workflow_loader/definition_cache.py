@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+
+class DefinitionCache:
+    path: Path
+    max_entries: int
+
+    def __init__(self, path: str, max_entries: int = 100) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+
+    def _entry(self, workflow_path: str) -> Path:
+        # One entry per workflow file, so editing it replaces its entry.
+        name = hashlib.sha256(str(Path(workflow_path).resolve()).encode()).hexdigest()
+        return self.path / f"{name}.pkl"
+
+    def get(self, workflow_path: str, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._entry(workflow_path), "rb") as f:
+                entry_key, definition = pickle.load(f)
+        except Exception:
+            return None
+        return definition if entry_key == key else None
+
+    def put(self, workflow_path: str, key: str, definition: Dict[str, Any]) -> None:
+        entry = self._entry(workflow_path)
+        tmp_entry = entry.with_suffix(f".{uuid4().hex}.tmp")
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            with open(tmp_entry, "wb") as f:
+                pickle.dump((key, definition), f)
+            os.replace(tmp_entry, entry)
+            self._prune()
+        except OSError:
+            if tmp_entry.exists():
+                tmp_entry.unlink()
+
+    def _prune(self) -> None:
+        # Generated workflows get a new file name per run, only the most
+        # recently stored definitions are kept.
+        entries = sorted(
+            self.path.glob("*.pkl"), key=lambda f: f.stat().st_mtime, reverse=True
+        )
+        for entry in entries[self.max_entries :]:
+            try:
+                entry.unlink()
+            except OSError:
+                pass
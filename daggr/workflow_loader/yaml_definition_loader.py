@@ -1,9 +1,13 @@
+import hashlib
+from functools import lru_cache
 from pathlib import Path
+from typing import Any
 
 import yamale
 import yaml
 
 from daggr.core.dag import WorkflowDefinition
+from daggr.workflow_loader.definition_cache import DefinitionCache
 from daggr.workflow_loader.workflow_definition_loader import (
     InvalidWorkflow,
     InvalidWorkflowSchema,
@@ -39,45 +43,85 @@ class CouldNotParseYaml(Exception):
         )
 
 
+SCHEMA_FILE = Path(__file__).parent / "workflow_schema.yml"
+
+_SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@lru_cache(maxsize=None)
+def _workflow_schema() -> yamale.schema.Schema:
+    return yamale.make_schema(str(SCHEMA_FILE))
+
+
+@lru_cache(maxsize=None)
+def _schema_digest() -> bytes:
+    return hashlib.sha256(SCHEMA_FILE.read_bytes()).digest()
+
+
 class _YamlFileLoader:
     @staticmethod
-    def load(path: str):
+    def read(path: str) -> bytes:
         try:
-            with open(path, "r") as f:
-                return yaml.load(f, Loader=yaml.Loader)
+            with open(path, "rb") as f:
+                return f.read()
         except OSError as e:
             raise CouldNotLoadFile(path, e)
+
+    @staticmethod
+    def parse(path: str, content: bytes) -> Any:
+        try:
+            return yaml.load(content, Loader=_SafeLoader)
         except Exception as e:
             raise CouldNotParseYaml(path, e)
 
+    @staticmethod
+    def load(path: str) -> Any:
+        return _YamlFileLoader.parse(path, _YamlFileLoader.read(path))
+
 
 class YamlDefinitionLoader(WorkflowDefinitionLoader):
     def __init__(self, filepath: str) -> None:
         super().__init__(filepath)
         self.validator = YamlWorkflowValidator(self.filepath)
+        self.cache = DefinitionCache(
+            Path(self.filepath).parent / ".daggr" / "definitions"
+        )
 
     def load(self) -> WorkflowDefinition:
-        self.validator.validate_schema()
-        return WorkflowDefinition(
-            **_YamlFileLoader.load(self.filepath), path=str(Path(self.filepath).parent)
-        )
+        try:
+            content = _YamlFileLoader.read(self.filepath)
+        except CouldNotLoadFile as e:
+            raise InvalidWorkflow({}, e)
+
+        key = hashlib.sha256(_schema_digest() + content).hexdigest()
+        definition = self.cache.get(self.filepath, key)
+        if definition is None:
+            definition = self.validator.validate(self.validator.parse(content))
+            self.cache.put(self.filepath, key, definition)
+
+        return WorkflowDefinition(**definition, path=str(Path(self.filepath).parent))
 
 
 class YamlWorkflowValidator(WorkflowDefinitionValidator):
     filepath: str
 
-    def validate_schema(self) -> None:
-        schema_file = Path(__file__).parent / "workflow_schema.yml"
-        schema = yamale.make_schema(str(schema_file))
+    def parse(self, content: bytes) -> Any:
+        try:
+            return _YamlFileLoader.parse(self.filepath, content)
+        except CouldNotParseYaml as e:
+            raise InvalidWorkflow({}, e)
+
+    def validate(self, data: Any) -> Any:
+        try:
+            yamale.validate(_workflow_schema(), [(data, self.filepath)])
+        except Exception as e:
+            raise InvalidWorkflowSchema(data, e)
+        return data
 
+    def validate_schema(self) -> None:
         try:
-            data = yamale.make_data(self.filepath)
-            yamale.validate(schema, data)
-        except Exception as e1:
-            if locals().get("data"):
-                raise InvalidWorkflowSchema(data, e1)
-
-            try:
-                _YamlFileLoader.load(self.filepath)
-            except Exception as e2:
-                raise InvalidWorkflow({}, e2)
+            content = _YamlFileLoader.read(self.filepath)
+        except CouldNotLoadFile as e:
+            raise InvalidWorkflow({}, e)
+
+        self.validate(self.parse(content))
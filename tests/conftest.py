@@ -70,3 +70,9 @@ def circular_dependency_after_root_definition():
         },
         path=str(Path(__file__).parent),
     )
+
+
+@pytest.fixture
+def valid_workflow_yaml_definition(valid_workflow_yaml_definition_path):
+    with open(valid_workflow_yaml_definition_path, "r") as f:
+        yield f.read()
@@ -0,0 +1,18 @@
+IMPORTS = []
+IMPORTS.append(__name__)
+
+
+def numbers(inputs, parameters):
+    return list(range(parameters["count"]))
+
+
+def double(inputs, parameters):
+    return [n * 2 for n in inputs["numbers"]]
+
+
+def pick(inputs, parameters):
+    return inputs["number"]
+
+
+def fail(inputs, parameters):
+    raise ValueError("inline failure")
@@ -0,0 +1,10 @@
+from daggr.core.decorators import inputs, output
+
+
+@inputs()
+@output("total", type="pickle")
+def main(inputs, parameters):
+    return sum(inputs["doubled"])
+
+
+main()
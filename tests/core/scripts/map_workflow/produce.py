@@ -0,0 +1,11 @@
+from daggr.core.decorators import inputs, output
+
+
+@inputs()
+@output("numbers", type="chunks")
+def main(inputs, parameters):
+    for i in range(parameters.get("count", 4)):
+        yield i
+
+
+main()
@@ -0,0 +1,10 @@
+from daggr.core.decorators import inputs, output
+
+
+@inputs()
+@output("square", type="pickle")
+def main(inputs, parameters):
+    return inputs["number"] ** 2
+
+
+main()
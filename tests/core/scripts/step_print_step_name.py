@@ -0,0 +1,3 @@
+import os
+
+print(os.environ["DAGGR_STEP_NAME"])
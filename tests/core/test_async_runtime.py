@@ -0,0 +1,91 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from daggr.core.dag import (
+    AsyncRuntime,
+    Dag,
+    DagRun,
+    DagRuntimeFactory,
+    StepState,
+    WorkflowDefinition,
+    _OutputTail,
+)
+
+
+@pytest.fixture
+def scripts_path(tmp_path):
+    path = tmp_path / "scripts"
+    shutil.copytree(Path(__file__).parent / "scripts", path)
+    yield path
+
+
+def test_async_runtime_executes_dag(scripts_path):
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "step1": {"script": "step_test.py"},
+            "step2": {"script": "step_test.py"},
+            "step3": {"script": "step_test.py", "depends_on": ["step1", "step2"]},
+        },
+        path=str(scripts_path),
+    )
+    dag_run = DagRun(Dag(wd))
+    AsyncRuntime(dag_run, max_workers=2).execute()
+
+    for step_run in dag_run.step_runs.values():
+        assert step_run.state == StepState.SUCCESSFUL
+        assert step_run.stdout == "Hello World\n"
+    assert dag_run.step_runs["step1"].end_time < dag_run.step_runs["step3"].start_time
+    assert dag_run.step_runs["step2"].end_time < dag_run.step_runs["step3"].start_time
+
+
+def test_async_runtime_failure_cancels_downstream(scripts_path):
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "step1": {"script": "step_test_with_error.py"},
+            "step2": {"script": "step_test.py", "depends_on": ["step1"]},
+        },
+        path=str(scripts_path),
+    )
+    dag_run = DagRun(Dag(wd))
+    AsyncRuntime(dag_run).execute()
+
+    assert dag_run.step_runs["step1"].state == StepState.FAILED
+    assert "Traceback" in dag_run.step_runs["step1"].stderr
+    assert dag_run.step_runs["step2"].state == StepState.CANCELLED
+
+
+def test_async_runtime_caps_kept_output_and_writes_log_files(scripts_path):
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={"chatty": {"script": "step_chatty.py"}},
+        path=str(scripts_path),
+    )
+    dag_run = DagRun(Dag(wd))
+    AsyncRuntime(dag_run, max_output_bytes=100).execute()
+
+    stdout = dag_run.step_runs["chatty"].stdout
+    assert stdout.startswith("[... ")
+    assert stdout.endswith("line 999\n")
+    assert len(stdout.split("\n", 1)[1]) == 100
+
+    log_file = scripts_path / ".daggr" / "logs" / dag_run.run_id / "chatty.stdout.log"
+    assert log_file.read_text().count("\n") == 1000
+
+
+def test_output_tail_keeps_last_bytes():
+    tail = _OutputTail(5)
+    tail.append(b"abc")
+    tail.append(b"defg")
+
+    assert tail.truncated_bytes == 2
+    assert tail.getvalue() == "[... 2 bytes truncated ...]\ncdefg"
+
+
+def test_async_runtime_factory():
+    wd = WorkflowDefinition(dag="test_dag", steps={"root": {}}, path="")
+    runtime = DagRuntimeFactory.create("async", DagRun(Dag(wd)), max_workers=2)
+    assert isinstance(runtime, AsyncRuntime)
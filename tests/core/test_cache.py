@@ -0,0 +1,156 @@
+import os
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from daggr.core.cache import StepCache, detach_outputs
+from daggr.core.dag import (
+    Dag,
+    DagRun,
+    LocalRuntime,
+    Step,
+    StepState,
+    WorkflowDefinition,
+)
+from daggr.core.dag import subprocess as dag_subprocess
+from daggr.core.decorators import OutputInfo, OutputMetadata, OutputMetadataInterface
+
+
+class MockedSuccessfulRun:
+    stdout = "out"
+    stderr = ""
+    returncode = 0
+
+
+def _write_script(path: Path, content: str = "print('hi')") -> Path:
+    path.write_text(content)
+    return path
+
+
+def _write_metadata(step_output_path: Path, content_hash: str) -> None:
+    step_output_path.mkdir(parents=True, exist_ok=True)
+    OutputMetadataInterface.write(
+        OutputMetadata(
+            outputs=[
+                OutputInfo(io_interface="pickle", name="o", content_hash=content_hash)
+            ]
+        ),
+        str(step_output_path / ".daggr"),
+    )
+
+
+def test_key_depends_on_script_and_parameters(tmp_path):
+    cache = StepCache(tmp_path / "cache")
+    script = _write_script(tmp_path / "step.py")
+    step = Step(name="step", script="step.py", parameters={"a": 1})
+
+    key = cache.key(step, script, tmp_path / "outputs")
+    assert key == cache.key(step, script, tmp_path / "outputs")
+
+    other_parameters = Step(name="step", script="step.py", parameters={"a": 2})
+    assert key != cache.key(other_parameters, script, tmp_path / "outputs")
+
+    mapped = Step(name="step", script="step.py", parameters={"a": 1}, map_over="data")
+    assert key != cache.key(mapped, script, tmp_path / "outputs")
+
+    _write_script(script, "print('bye')")
+    assert key != cache.key(step, script, tmp_path / "outputs")
+
+
+@pytest.mark.parametrize("source", ["output:upstream", "output:upstream?columns=a"])
+def test_key_depends_on_upstream_output_hashes(tmp_path, source):
+    cache = StepCache(tmp_path / "cache")
+    script = _write_script(tmp_path / "step.py")
+    outputs = tmp_path / "outputs"
+    step = Step(name="step", script="step.py", inputs={"data": source})
+
+    _write_metadata(outputs / "upstream", "hash1")
+    key = cache.key(step, script, outputs)
+    _write_metadata(outputs / "upstream", "hash2")
+
+    assert key != cache.key(step, script, outputs)
+
+
+def test_key_without_script_is_none(tmp_path):
+    cache = StepCache(tmp_path / "cache")
+    step = Step(name="step", script="missing.py")
+    assert cache.key(step, tmp_path / "missing.py", tmp_path / "outputs") is None
+
+
+def test_store_and_restore_outputs(tmp_path):
+    cache = StepCache(tmp_path / "cache")
+    step_output_path = tmp_path / "outputs" / "step"
+    step_output_path.mkdir(parents=True)
+    (step_output_path / "o.pkl").write_bytes(b"data")
+
+    assert cache.restore("key", step_output_path) is None
+    cache.store("key", step_output_path, "out", "err")
+    assert (step_output_path / "o.pkl").stat().st_nlink == 2
+
+    detach_outputs(step_output_path)
+    (step_output_path / "o.pkl").write_bytes(b"stale")
+    assert (cache.path / "key" / "outputs" / "o.pkl").read_bytes() == b"data"
+    result = cache.restore("key", step_output_path)
+
+    assert result.stdout == "out"
+    assert result.stderr == "err"
+    assert (step_output_path / "o.pkl").read_bytes() == b"data"
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = StepCache(tmp_path / "cache", max_size_bytes=300)
+    step_output_path = tmp_path / "outputs" / "step"
+    step_output_path.mkdir(parents=True)
+    (step_output_path / "o.pkl").write_bytes(b"x" * 100)
+
+    cache.store("old", step_output_path, None, None)
+    cache.store("recent", step_output_path, None, None)
+    os.utime(cache.path / "old" / "result.json", (0, 0))
+    cache.store("new", step_output_path, None, None)
+
+    assert not (cache.path / "old").exists()
+    assert (cache.path / "recent").exists()
+    assert (cache.path / "new").exists()
+
+
+def test_outputs_larger_than_the_cache_are_not_stored(tmp_path):
+    cache = StepCache(tmp_path / "cache", max_size_bytes=50)
+    step_output_path = tmp_path / "outputs" / "step"
+    step_output_path.mkdir(parents=True)
+    (step_output_path / "o.pkl").write_bytes(b"x" * 100)
+
+    cache.store("key", step_output_path, None, None)
+
+    assert not (cache.path / "key").exists()
+
+
+def test_runtime_skips_step_on_cache_hit(tmp_path):
+    _write_script(tmp_path / "step.py")
+    wd = WorkflowDefinition(dag="test_dag", steps={"step": {}}, path=str(tmp_path))
+
+    with mock.patch.object(
+        dag_subprocess, "run", return_value=MockedSuccessfulRun()
+    ) as run:
+        for _ in range(2):
+            dag_run = DagRun(Dag(wd))
+            LocalRuntime(dag_run, cache=StepCache(tmp_path / "cache")).execute()
+
+    run.assert_called_once()
+    assert dag_run.step_runs["step"].cached
+    assert dag_run.step_runs["step"].state == StepState.SUCCESSFUL
+    assert dag_run.step_runs["step"].stdout == "out"
+
+
+def test_runtime_does_not_cache_failed_steps(tmp_path):
+    _write_script(tmp_path / "step.py")
+    wd = WorkflowDefinition(dag="test_dag", steps={"step": {}}, path=str(tmp_path))
+
+    failed_run = mock.MagicMock(stdout="", stderr="error", returncode=1)
+    with mock.patch.object(dag_subprocess, "run", return_value=failed_run) as run:
+        for _ in range(2):
+            dag_run = DagRun(Dag(wd))
+            LocalRuntime(dag_run, cache=StepCache(tmp_path / "cache")).execute()
+
+    assert run.call_count == 2
+    assert dag_run.step_runs["step"].state == StepState.FAILED
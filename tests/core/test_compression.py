@@ -0,0 +1,35 @@
+import gzip
+
+import pytest
+
+from daggr.core.compression import Codec, CodecFactory, CodecNotImplemented
+
+
+@pytest.mark.parametrize("name", ["zlib", "lzma", "bz2"])
+@pytest.mark.parametrize("level", [None, 1])
+def test_codec_round_trip(tmp_path, name, level):
+    codec = CodecFactory.create(name)
+    path = str(tmp_path / "data")
+
+    with codec.open(path, "wb", level) as f:
+        f.write(b"abc" * 1000)
+        f.write(b"def")
+
+    assert (tmp_path / "data").stat().st_size < 3003
+    with codec.open(path, "rb") as f:
+        assert f.read() == b"abc" * 1000 + b"def"
+
+
+def test_unknown_codec():
+    with pytest.raises(CodecNotImplemented, match="zstd"):
+        CodecFactory.create("zstd")
+
+
+def test_registered_codec_is_created(monkeypatch):
+    class GzipCodec(Codec):
+        def open(self, path, mode, level=None):
+            return gzip.open(path, mode)
+
+    monkeypatch.setitem(CodecFactory.CODECS, "gzip", GzipCodec)
+
+    assert isinstance(CodecFactory.create("gzip"), GzipCodec)
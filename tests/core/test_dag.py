@@ -1,3 +1,7 @@
+import json
+import pickle
+import shutil
+import time
 from datetime import datetime
 from pathlib import Path
 from unittest import mock
@@ -5,18 +9,28 @@ from unittest import mock
 import pytest
 
 from daggr.core.dag import (
+    AsyncRuntime,
     Dag,
     DagRun,
     DagRuntime,
     DagRuntimeFactory,
     DependenciesNotDefinedYet,
     DependencyOnSelfNotAllowed,
+    InlineMapStepNotSupported,
+    InvalidMapStep,
+    LocalParallelRuntime,
     LocalRuntime,
+    ReadyQueue,
     Step,
+    StepNotFound,
     StepState,
     WorkflowDefinition,
 )
 from daggr.core.dag import subprocess as dag_subprocess
+from daggr.core.executors import WorkerPoolExecutor
+from daggr.core.graph import CircularDependency
+
+SCRIPTS_PATH = Path(__file__).parent / "scripts"
 
 
 def test_empty_workflow():
@@ -68,15 +82,42 @@ def test_script_name_when_set():
 
 
 def test_dag_with_circular_dependency(circular_dependency_definition):
-    with pytest.raises(DependenciesNotDefinedYet):
+    with pytest.raises(CircularDependency):
         Dag(definition=circular_dependency_definition)
 
 
 def test_dag_with_circular_dependency_after_root(
     circular_dependency_after_root_definition,
 ):
-    with pytest.raises(DependenciesNotDefinedYet):
+    with pytest.raises(CircularDependency) as excinfo:
         Dag(definition=circular_dependency_after_root_definition)
+    assert excinfo.value.cycle[0] == excinfo.value.cycle[-1]
+    assert set(excinfo.value.cycle) == {"step_2", "step_3"}
+
+
+def test_dag_with_undefined_dependency():
+    wd = WorkflowDefinition(
+        dag="test_dag", steps={"step1": {"depends_on": ["missing"]}}, path=""
+    )
+    with pytest.raises(DependenciesNotDefinedYet):
+        Dag(wd)
+
+
+def test_dag_declaration_order_does_not_matter():
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "step3": {"depends_on": ["step2"]},
+            "step2": {"depends_on": ["step1"]},
+            "step1": {},
+        },
+        path="",
+    )
+    dag = Dag(wd)
+
+    assert dag.root_steps == ["step1"]
+    assert dag.topological_order == ["step1", "step2", "step3"]
+    assert dag.steps["step1"].dependency_of == ["step2"]
 
 
 def test_dagrun_initial_state_is_waiting(workflow_definition):
@@ -266,8 +307,10 @@ class MockedFailedRun:
     state = StepState.FAILED
 
 
-def test_multiple_steps_run_in_correct_order():
-    dag_subprocess.run = mock.MagicMock(return_value=MockedSuccessfulRun())
+def test_multiple_steps_run_in_correct_order(monkeypatch):
+    monkeypatch.setattr(
+        dag_subprocess, "run", mock.MagicMock(return_value=MockedSuccessfulRun())
+    )
 
     wd = WorkflowDefinition(
         dag="test_dag",
@@ -296,8 +339,10 @@ def test_multiple_steps_run_in_correct_order():
     assert dagrun.step_runs["step4"].end_time < dagrun.step_runs["step5"].start_time
 
 
-def test_redundant_dependencies():
-    dag_subprocess.run = mock.MagicMock(return_value=MockedSuccessfulRun())
+def test_redundant_dependencies(monkeypatch):
+    monkeypatch.setattr(
+        dag_subprocess, "run", mock.MagicMock(return_value=MockedSuccessfulRun())
+    )
 
     wd = WorkflowDefinition(
         dag="test_dag",
@@ -326,9 +371,11 @@ def test_redundant_dependencies():
     assert dagrun.step_runs["step2"].end_time < dagrun.step_runs["step3"].start_time
 
 
-def test_failed_dependency_cancels_downstream():
+def test_failed_dependency_cancels_downstream(monkeypatch):
 
-    dag_subprocess.run = mock.MagicMock(return_value=MockedFailedRun())
+    monkeypatch.setattr(
+        dag_subprocess, "run", mock.MagicMock(return_value=MockedFailedRun())
+    )
 
     wd = WorkflowDefinition(
         dag="test_dag",
@@ -351,8 +398,63 @@ def test_failed_dependency_cancels_downstream():
     assert dagrun.step_runs["step3"].state == StepState.CANCELLED
 
 
-def test_dependency_on_itself():
-    dag_subprocess.run = mock.MagicMock(return_value=MockedSuccessfulRun())
+def _diamond_definition(path) -> WorkflowDefinition:
+    return WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "root": {},
+            "left": {"depends_on": ["root"]},
+            "right": {"depends_on": ["root"]},
+            "join": {"depends_on": ["left", "right"]},
+        },
+        path=str(path),
+    )
+
+
+def test_select_ancestors_of_target(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        dag_subprocess, "run", mock.MagicMock(return_value=MockedSuccessfulRun())
+    )
+    dagrun = DagRun(Dag(_diamond_definition(tmp_path)))
+
+    assert dagrun.select(targets=["left"]) == {"root", "left"}
+    LocalRuntime(dagrun).execute()
+
+    assert dag_subprocess.run.call_count == 2
+    assert dagrun.step_runs["right"].reused
+    assert dagrun.step_runs["join"].reused
+    assert not dagrun.step_runs["left"].reused
+
+
+def test_select_descendants_keeps_upstream_outputs(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        dag_subprocess, "run", mock.MagicMock(return_value=MockedSuccessfulRun())
+    )
+    (tmp_path / "outputs" / "root").mkdir(parents=True)
+    (tmp_path / "outputs" / "root" / "data.pkl").write_bytes(b"data")
+    dagrun = DagRun(Dag(_diamond_definition(tmp_path)))
+
+    selected = dagrun.select(sources=["right"], targets=["join"])
+    LocalParallelRuntime(dagrun, max_workers=2).execute()
+
+    assert selected == {"right", "join"}
+    assert dag_subprocess.run.call_count == 2
+    assert dagrun.step_runs["root"].reused
+    assert "data.pkl" in dagrun.step_runs["root"].outputs
+    assert dagrun.step_runs["join"].state == StepState.SUCCESSFUL
+
+
+def test_select_unknown_step(tmp_path):
+    dagrun = DagRun(Dag(_diamond_definition(tmp_path)))
+
+    with pytest.raises(StepNotFound, match="missing"):
+        dagrun.select(targets=["missing"])
+
+
+def test_dependency_on_itself(monkeypatch):
+    monkeypatch.setattr(
+        dag_subprocess, "run", mock.MagicMock(return_value=MockedSuccessfulRun())
+    )
 
     wd = WorkflowDefinition(
         dag="test_dag",
@@ -365,8 +467,10 @@ def test_dependency_on_itself():
         dag = Dag(wd)
 
 
-def test_runtime_factory():
-    dag_subprocess.run = mock.MagicMock(return_value=MockedSuccessfulRun())
+def test_runtime_factory(monkeypatch):
+    monkeypatch.setattr(
+        dag_subprocess, "run", mock.MagicMock(return_value=MockedSuccessfulRun())
+    )
 
     wd = WorkflowDefinition(
         dag="test_dag",
@@ -382,3 +486,377 @@ def test_runtime_factory():
     runtime = DagRuntimeFactory.create(impl, dag_run)
     assert runtime.dag_run == dag_run
     assert isinstance(runtime, DagRuntimeFactory.IMPLEMENTATIONS[impl])
+
+
+def _sleeping_run(seconds: float, failing_scripts=()):
+    def run(command, *args, **kwargs):
+        time.sleep(seconds)
+        if any(command[-1].endswith(script) for script in failing_scripts):
+            return MockedFailedRun()
+        return MockedSuccessfulRun()
+
+    return run
+
+
+def test_ready_queue_releases_step_after_all_dependencies():
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "a": {},
+            "b": {},
+            "c": {"depends_on": ["a", "b"]},
+        },
+        path="my/path",
+    )
+    queue = ReadyQueue(DagRun(Dag(wd)))
+
+    assert [queue.pop(), queue.pop()] == ["a", "b"]
+    queue.complete("a")
+    assert len(queue) == 0
+    queue.complete("b")
+    assert queue.pop() == "c"
+
+
+def test_parallel_runtime_runs_independent_steps_concurrently():
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "root": {},
+            "step1": {"depends_on": ["root"]},
+            "step2": {"depends_on": ["root"]},
+            "step3": {"depends_on": ["root"]},
+            "step4": {"depends_on": ["root"]},
+            "sink": {"depends_on": ["step1", "step2", "step3", "step4"]},
+        },
+        path=str(Path(__file__).parent / "scripts"),
+    )
+    dag_run = DagRun(Dag(wd))
+    runtime = LocalParallelRuntime(dag_run, max_workers=4)
+
+    with mock.patch.object(dag_subprocess, "run", side_effect=_sleeping_run(0.2)):
+        before = time.monotonic()
+        runtime.execute()
+        elapsed = time.monotonic() - before
+
+    assert elapsed < 1.0
+    for step_run in dag_run.step_runs.values():
+        assert step_run.state == StepState.SUCCESSFUL
+    for name in ["step1", "step2", "step3", "step4"]:
+        assert dag_run.step_runs["root"].end_time < dag_run.step_runs[name].start_time
+        assert dag_run.step_runs[name].end_time < dag_run.step_runs["sink"].start_time
+
+
+def test_parallel_runtime_respects_max_workers():
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={f"step{i}": {} for i in range(4)},
+        path=str(Path(__file__).parent / "scripts"),
+    )
+    dag_run = DagRun(Dag(wd))
+    runtime = LocalParallelRuntime(dag_run, max_workers=1)
+
+    with mock.patch.object(dag_subprocess, "run", side_effect=_sleeping_run(0.01)):
+        runtime.execute()
+
+    step_runs = sorted(dag_run.step_runs.values(), key=lambda s: s.start_time)
+    for previous, current in zip(step_runs, step_runs[1:]):
+        assert previous.end_time < current.start_time
+
+
+def test_parallel_runtime_failure_cancels_only_downstream():
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "root": {},
+            "broken": {"depends_on": ["root"]},
+            "after_broken": {"depends_on": ["broken"]},
+            "healthy": {"depends_on": ["root"]},
+            "after_healthy": {"depends_on": ["healthy"]},
+        },
+        path=str(Path(__file__).parent / "scripts"),
+    )
+    dag_run = DagRun(Dag(wd))
+    runtime = LocalParallelRuntime(dag_run, max_workers=2)
+
+    with mock.patch.object(
+        dag_subprocess, "run", side_effect=_sleeping_run(0, ["broken.py"])
+    ):
+        runtime.execute()
+
+    assert dag_run.step_runs["root"].state == StepState.SUCCESSFUL
+    assert dag_run.step_runs["broken"].state == StepState.FAILED
+    assert dag_run.step_runs["after_broken"].state == StepState.CANCELLED
+    assert dag_run.step_runs["healthy"].state == StepState.SUCCESSFUL
+    assert dag_run.step_runs["after_healthy"].state == StepState.SUCCESSFUL
+
+
+def test_parallel_runtime_factory():
+    wd = WorkflowDefinition(dag="test_dag", steps={"root": {}}, path="")
+    dag_run = DagRun(Dag(wd))
+
+    runtime = DagRuntimeFactory.create("local-parallel", dag_run, max_workers=3)
+    assert isinstance(runtime, LocalParallelRuntime)
+    assert runtime.max_workers == 3
+
+
+def test_runtime_releases_outputs_once_dependents_finished():
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "root": {},
+            "step1": {"depends_on": ["root"]},
+            "step2": {"depends_on": ["root"]},
+        },
+        path=str(Path(__file__).parent / "scripts"),
+    )
+    dag_run = DagRun(Dag(wd))
+    runtime = LocalRuntime(dag_run)
+    released = []
+
+    def release(step_output_path):
+        released.append(
+            (
+                step_output_path.name,
+                [s.state for s in dag_run.step_runs.values()],
+            )
+        )
+
+    with mock.patch.object(
+        dag_subprocess, "run", return_value=MockedSuccessfulRun()
+    ), mock.patch("daggr.core.dag.release_transient_outputs", side_effect=release):
+        runtime.execute()
+
+    assert [name for name, _ in released][0] == "root"
+    assert released[0][1] == [StepState.SUCCESSFUL] * 3
+    assert sorted(name for name, _ in released) == ["root", "step1", "step2"]
+
+
+def test_local_runtime_runs_deep_chain_without_recursion():
+    steps = {"step0": {}}
+    for i in range(1, 5000):
+        steps[f"step{i}"] = {"depends_on": [f"step{i - 1}"]}
+    wd = WorkflowDefinition(dag="test_dag", steps=steps, path="")
+    dag_run = DagRun(Dag(wd))
+    runtime = LocalRuntime(dag_run)
+    order = []
+
+    def run_step(step_name):
+        order.append(step_name)
+        dag_run.step_runs[step_name].state = StepState.SUCCESSFUL
+        return StepState.SUCCESSFUL
+
+    with mock.patch.object(runtime, "run_step", side_effect=run_step):
+        runtime.execute()
+
+    assert order == list(steps)
+
+
+def test_cancellation_visits_each_step_once():
+    steps = {"step0": {}}
+    for i in range(1, 40):
+        steps[f"left{i}"] = {"depends_on": [f"step{i - 1}"]}
+        steps[f"right{i}"] = {"depends_on": [f"step{i - 1}"]}
+        steps[f"step{i}"] = {"depends_on": [f"left{i}", f"right{i}"]}
+    wd = WorkflowDefinition(dag="test_dag", steps=steps, path="")
+    dag_run = DagRun(Dag(wd))
+    runtime = LocalRuntime(dag_run)
+
+    with mock.patch("daggr.core.dag.logger") as logger:
+        runtime.cancel_dependencies_of_step("step0")
+
+    assert logger.info.call_count == len(steps) - 1
+    assert all(
+        dag_run.step_runs[name].state == StepState.CANCELLED for name in list(steps)[1:]
+    )
+    assert dag_run.step_runs["step0"].state == StepState.WAITING
+
+
+def test_ready_queue_pops_highest_priority_first():
+    wd = WorkflowDefinition(
+        dag="test_dag", steps={"a": {}, "b": {}, "c": {}}, path="my/path"
+    )
+    queue = ReadyQueue(DagRun(Dag(wd)), priorities=[1.0, 3.0, 1.0])
+
+    assert [queue.pop(), queue.pop(), queue.pop()] == ["b", "a", "c"]
+
+
+def test_parallel_runtime_starts_critical_path_first():
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "short": {"estimated_duration": 1},
+            "long1": {"estimated_duration": 1},
+            "long2": {"depends_on": ["long1"], "estimated_duration": 10},
+        },
+        path="my/path",
+    )
+    dag_run = DagRun(Dag(wd))
+    runtime = LocalParallelRuntime(
+        dag_run, max_workers=1, step_durations={"short": 20.0}
+    )
+    order = []
+
+    def run_step(step_name):
+        order.append(step_name)
+        dag_run.step_runs[step_name].state = StepState.SUCCESSFUL
+        return StepState.SUCCESSFUL
+
+    with mock.patch.object(runtime, "run_step", side_effect=run_step):
+        runtime.execute()
+    assert order == ["short", "long1", "long2"]
+
+    dag_run = DagRun(Dag(wd))
+    runtime = LocalParallelRuntime(dag_run, max_workers=1)
+    order.clear()
+    with mock.patch.object(runtime, "run_step", side_effect=run_step):
+        runtime.execute()
+    assert order == ["long1", "long2", "short"]
+
+
+def test_map_over_requires_output_input():
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={"step": {"inputs": {"data": "csv:data.csv"}, "map_over": "data"}},
+        path="my/path",
+    )
+    with pytest.raises(InvalidMapStep):
+        Dag(wd)
+    str(InvalidMapStep("step", "data"))
+
+
+def test_large_parameters_are_passed_in_a_file(tmp_path):
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "small": {"parameters": {"value": 1}},
+            "large": {"parameters": {"value": "x" * 64 * 1024}},
+        },
+        path=str(tmp_path),
+    )
+    dagrun = DagRun(Dag(wd))
+    runtime = LocalRuntime(dagrun)
+
+    small_env = runtime._create_env(dagrun.dag.steps["small"], dagrun)
+    large_env = runtime._create_env(dagrun.dag.steps["large"], dagrun)
+
+    assert json.loads(small_env["DAGGR_PARAMETERS"]) == {"value": 1}
+    assert "DAGGR_PARAMETERS_FILE" not in small_env
+    assert "DAGGR_PARAMETERS" not in large_env
+    with open(large_env["DAGGR_PARAMETERS_FILE"]) as f:
+        assert json.load(f) == {"value": "x" * 64 * 1024}
+    assert small_env["DAGGR_OUTPUTS_PATH"] == str(tmp_path / "outputs")
+
+
+def _inline_workflow(path, **steps):
+    for script in (SCRIPTS_PATH / "inline_workflow").glob("*.py"):
+        shutil.copy(script, path)
+    return WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "numbers": {
+                "type": "inline",
+                "script": "numbers.py",
+                "function": "numbers",
+                "parameters": {"count": 4},
+            },
+            "double": {
+                "type": "inline",
+                "script": "numbers.py",
+                "function": "double",
+                "inputs": {"numbers": "output:numbers"},
+                "depends_on": ["numbers"],
+            },
+            "total": {
+                "inputs": {"doubled": "output:double"},
+                "depends_on": ["double"],
+            },
+            **steps,
+        },
+        path=str(path),
+    )
+
+
+@pytest.mark.parametrize(
+    "runtime_class", [LocalRuntime, LocalParallelRuntime, AsyncRuntime]
+)
+def test_inline_steps_pass_outputs_in_memory(tmp_path, monkeypatch, runtime_class):
+    # Other tests replace subprocess.run, so the downstream step runs in a
+    # worker process; the async runtime starts it with asyncio instead.
+    monkeypatch.setenv("PYTHONPATH", str(Path(__file__).parents[2]))
+    dag_run = DagRun(Dag(_inline_workflow(tmp_path)))
+    executor = WorkerPoolExecutor(size=1)
+    runtime = runtime_class(dag_run, max_workers=2, executor=executor)
+    try:
+        runtime.execute()
+    finally:
+        executor.close()
+
+    assert all(s.state == StepState.SUCCESSFUL for s in dag_run.step_runs.values())
+    assert not (tmp_path / "outputs" / "numbers").exists()
+    with open(tmp_path / "outputs" / "double" / "result.pkl", "rb") as f:
+        assert pickle.load(f) == [0, 2, 4, 6]
+    with open(tmp_path / "outputs" / "total" / "total.pkl", "rb") as f:
+        assert pickle.load(f) == 12
+
+    modules = list(runtime._inline_modules.values())
+    assert len(modules) == 1
+    assert len(modules[0].IMPORTS) == 1
+
+
+def test_inline_step_failure_is_reported(tmp_path):
+    wd = _inline_workflow(
+        tmp_path,
+        fail={
+            "type": "inline",
+            "script": "numbers.py",
+            "function": "fail",
+            "depends_on": ["numbers"],
+        },
+    )
+    wd.steps["total"]["depends_on"].append("fail")
+    dag_run = DagRun(Dag(wd))
+    LocalRuntime(dag_run).execute()
+
+    assert dag_run.step_runs["double"].state == StepState.SUCCESSFUL
+    assert dag_run.step_runs["fail"].state == StepState.FAILED
+    assert "ValueError: inline failure" in dag_run.step_runs["fail"].stderr
+    assert dag_run.step_runs["total"].state == StepState.CANCELLED
+
+
+def test_inline_step_reads_queried_inline_output_from_disk(tmp_path):
+    wd = _inline_workflow(
+        tmp_path,
+        pick={
+            "type": "inline",
+            "script": "numbers.py",
+            "function": "pick",
+            "inputs": {"number": "output:numbers?partition=2"},
+            "depends_on": ["numbers"],
+        },
+    )
+    dag_run = DagRun(Dag(wd))
+    LocalRuntime(dag_run).execute()
+
+    assert dag_run.step_runs["pick"].state == StepState.SUCCESSFUL
+    assert (tmp_path / "outputs" / "numbers" / "result.pkl").is_file()
+    with open(tmp_path / "outputs" / "pick" / "result.pkl", "rb") as f:
+        assert pickle.load(f) == 2
+
+
+def test_inline_step_cannot_map_over():
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "produce": {},
+            "step": {
+                "type": "inline",
+                "inputs": {"data": "output:produce"},
+                "map_over": "data",
+                "depends_on": ["produce"],
+            },
+        },
+        path="my/path",
+    )
+    with pytest.raises(InlineMapStepNotSupported):
+        Dag(wd)
+    str(InlineMapStepNotSupported("step"))
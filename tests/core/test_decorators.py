@@ -1,4 +1,5 @@
 import json
+import pickle
 from unittest import mock
 
 import pytest
@@ -127,3 +128,543 @@ def test_outputs_path_parameter_override(tmp_path):
             )
             == out
         )
+
+
+def _write_pickle_output(output_folder, step_name, value):
+    with mock.patch.dict(
+        decorators.os.environ,
+        {
+            "DAGGR_DAG_NAME": "test",
+            "DAGGR_OUTPUTS_PATH": str(output_folder),
+            "DAGGR_STEP_NAME": step_name,
+        },
+    ):
+
+        @output("result", type="pickle")
+        def write_output():
+            return value
+
+        write_output()
+
+
+def _write_shm_output(output_folder, step_name, value):
+    with mock.patch.dict(
+        decorators.os.environ,
+        {
+            "DAGGR_DAG_NAME": "test",
+            "DAGGR_OUTPUTS_PATH": str(output_folder),
+            "DAGGR_STEP_NAME": step_name,
+        },
+    ):
+
+        @output("block", type="shm")
+        def write_output():
+            return value
+
+        write_output()
+
+
+def _read_shm_input(output_folder, step_name):
+    with mock.patch.dict(
+        decorators.os.environ,
+        {
+            "DAGGR_DAG_NAME": "test",
+            "DAGGR_STEP_NAME": "reader",
+            "DAGGR_OUTPUTS_PATH": str(output_folder),
+            "DAGGR_PARAMETERS": json.dumps({}),
+            "DAGGR_INPUTS": json.dumps({"data": f"output:{step_name}"}),
+        },
+    ):
+
+        @inputs()
+        def read_input(inputs, parameters):
+            return inputs["data"]
+
+        return read_input()
+
+
+def test_shared_memory_bytes(tmp_path):
+    pytest.importorskip("multiprocessing.shared_memory")
+    _write_shm_output(tmp_path, "producer", b"shared bytes")
+    data = _read_shm_input(tmp_path, "producer")
+
+    assert isinstance(data, memoryview)
+    assert data.readonly
+    assert bytes(data) == b"shared bytes"
+
+    data.release()
+    decorators.SharedMemoryInterface.detach_all()
+    decorators.release_transient_outputs(tmp_path / "producer")
+
+
+def test_shared_memory_numpy_array(tmp_path):
+    pytest.importorskip("multiprocessing.shared_memory")
+    numpy = pytest.importorskip("numpy")
+    array = numpy.arange(12, dtype=numpy.float32).reshape(3, 4)
+
+    _write_shm_output(tmp_path, "producer", array)
+    data = _read_shm_input(tmp_path, "producer")
+
+    assert not data.flags.writeable
+    assert data.dtype == numpy.float32
+    assert numpy.array_equal(data, array)
+
+    del data
+    decorators.SharedMemoryInterface.detach_all()
+    decorators.release_transient_outputs(tmp_path / "producer")
+
+
+def test_shared_memory_blocks_are_released(tmp_path):
+    shared_memory = pytest.importorskip("multiprocessing.shared_memory")
+    _write_shm_output(tmp_path, "producer", b"data")
+    metadata = decorators.read_step_output_metadata(tmp_path / "producer")
+
+    assert decorators.has_transient_outputs(tmp_path / "producer")
+    decorators.release_transient_outputs(tmp_path / "producer")
+
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=metadata.outputs[0].attributes["block"])
+
+
+def test_shared_memory_requires_python_3_8():
+    with mock.patch.object(decorators.sys, "version_info", (3, 7, 9)):
+        with pytest.raises(decorators.SharedMemoryNotSupported):
+            InterfaceFactory.create("shm")
+    str(decorators.SharedMemoryNotSupported())
+
+
+def test_shared_memory_unsupported_type(tmp_path):
+    pytest.importorskip("multiprocessing.shared_memory")
+    with pytest.raises(decorators.UnsupportedOutputType):
+        _write_shm_output(tmp_path, "producer", {"a": 1})
+    str(decorators.UnsupportedOutputType("shm", {}))
+
+
+def test_npy_interface(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    array = numpy.arange(20, dtype=numpy.int64).reshape(4, 5)
+    io = InterfaceFactory.create("npy")
+
+    io.write(array, str(tmp_path / "array.npy"))
+    data = io.read(str(tmp_path / "array.npy"))
+
+    assert not isinstance(data, numpy.memmap)
+    assert numpy.array_equal(data, array)
+
+
+def test_npy_mmap_interface_returns_read_only_memmap(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    array = numpy.arange(1000, dtype=numpy.float64).reshape(100, 10)
+
+    with mock.patch.dict(
+        decorators.os.environ,
+        {
+            "DAGGR_DAG_NAME": "test",
+            "DAGGR_OUTPUTS_PATH": str(tmp_path),
+            "DAGGR_STEP_NAME": "producer",
+        },
+    ):
+
+        @output("matrix", type="npy-mmap")
+        def write_output():
+            return array
+
+        write_output()
+
+    data = InterfaceFactory.create("npy-mmap").read(
+        str(tmp_path / "producer" / "matrix.npy")
+    )
+
+    assert isinstance(data, numpy.memmap)
+    assert not data.flags.writeable
+    assert numpy.array_equal(data[10:20], array[10:20])
+
+
+def test_npy_interface_rejects_object_arrays(tmp_path):
+    pytest.importorskip("numpy")
+    with pytest.raises(decorators.UnsupportedOutputType):
+        InterfaceFactory.create("npy").write([{"a": 1}], str(tmp_path / "a.npy"))
+
+
+def test_lazy_inputs_load_on_first_access(tmp_path):
+    for step_name in ["used", "unused"]:
+        with mock.patch.dict(
+            decorators.os.environ,
+            {
+                "DAGGR_DAG_NAME": "test",
+                "DAGGR_OUTPUTS_PATH": str(tmp_path),
+                "DAGGR_STEP_NAME": step_name,
+            },
+        ):
+
+            @output("value", type="pickle")
+            def write_output():
+                return step_name
+
+            write_output()
+
+    with mock.patch.dict(
+        decorators.os.environ,
+        {
+            "DAGGR_DAG_NAME": "test",
+            "DAGGR_STEP_NAME": "reader",
+            "DAGGR_OUTPUTS_PATH": str(tmp_path),
+            "DAGGR_PARAMETERS": json.dumps({}),
+            "DAGGR_INPUTS": json.dumps(
+                {"used": "output:used", "unused": "output:unused"}
+            ),
+        },
+    ):
+
+        @inputs(lazy=True)
+        def read_input(inputs, parameters):
+            assert sorted(inputs) == ["unused", "used"]
+            assert not inputs.is_loaded("used")
+            assert inputs["used"] == "used"
+            assert inputs.is_loaded("used")
+            return inputs
+
+        with mock.patch.object(
+            decorators.PickleInterface,
+            "read",
+            autospec=True,
+            side_effect=decorators.PickleInterface.read,
+        ) as read:
+            lazy_inputs = read_input()
+            assert lazy_inputs["used"] == "used"
+
+        read.assert_called_once()
+        assert not lazy_inputs.is_loaded("unused")
+
+
+def test_generator_output_is_written_in_chunks(tmp_path):
+    with mock.patch.dict(
+        decorators.os.environ,
+        {
+            "DAGGR_DAG_NAME": "test",
+            "DAGGR_OUTPUTS_PATH": str(tmp_path),
+            "DAGGR_STEP_NAME": "producer",
+        },
+    ):
+
+        @output("records", type="chunks")
+        def write_output():
+            for i in range(3):
+                yield [i] * 2
+
+        write_output()
+
+    with mock.patch.dict(
+        decorators.os.environ,
+        {
+            "DAGGR_DAG_NAME": "test",
+            "DAGGR_STEP_NAME": "consumer",
+            "DAGGR_OUTPUTS_PATH": str(tmp_path),
+            "DAGGR_PARAMETERS": json.dumps({}),
+            "DAGGR_INPUTS": json.dumps({"records": "output:producer"}),
+        },
+    ):
+
+        @inputs()
+        def read_input(inputs, parameters):
+            return inputs["records"]
+
+        records = read_input()
+
+    assert len(records) == 3
+    assert list(records) == [[0, 0], [1, 1], [2, 2]]
+    assert list(records) == [[0, 0], [1, 1], [2, 2]]
+
+
+def test_chunked_output_counts_frames_without_metadata(tmp_path):
+    io = InterfaceFactory.create("chunks")
+    io.write(iter(["a", "b"]), str(tmp_path / "records.chunks"))
+
+    assert len(io.read(str(tmp_path / "records.chunks"))) == 2
+
+
+def test_generator_output_requires_streaming_interface(tmp_path):
+    with mock.patch.dict(
+        decorators.os.environ,
+        {
+            "DAGGR_DAG_NAME": "test",
+            "DAGGR_OUTPUTS_PATH": str(tmp_path),
+            "DAGGR_STEP_NAME": "producer",
+        },
+    ):
+
+        @output("records", type="pickle")
+        def write_output():
+            yield 1
+
+        with pytest.raises(decorators.UnsupportedOutputType):
+            write_output()
+
+
+def test_chunk_partition_is_read_without_reading_previous_chunks(tmp_path):
+    io = InterfaceFactory.create("chunks")
+    path = str(tmp_path / "records.chunks")
+    io.write(iter(["a", "b", "c"]), path)
+
+    with mock.patch.object(decorators.pickle, "loads", wraps=pickle.loads) as loads:
+        assert io.read_partition(path, 2) == "c"
+    loads.assert_called_once()
+
+    with pytest.raises(IndexError):
+        io.read_partition(path, 3)
+
+
+def test_partition_of_pickled_list_is_read(tmp_path):
+    _write_pickle_output(tmp_path, "producer", ["a", "b"])
+    assert decorators.count_partitions(tmp_path / "producer") == 2
+
+    with mock.patch.dict(
+        decorators.os.environ,
+        {
+            "DAGGR_DAG_NAME": "test",
+            "DAGGR_STEP_NAME": "consumer.1",
+            "DAGGR_OUTPUTS_PATH": str(tmp_path),
+            "DAGGR_PARAMETERS": json.dumps({}),
+            "DAGGR_INPUTS": json.dumps({"item": "output:producer?partition=1"}),
+        },
+    ):
+
+        @inputs()
+        def read_input(inputs, parameters):
+            return inputs["item"]
+
+        assert read_input() == "b"
+
+
+def test_partition_outputs_are_gathered_in_order(tmp_path):
+    for index, value in enumerate(["x", "y"]):
+        _write_pickle_output(tmp_path, f"mapped.{index}", value)
+
+    decorators.gather_partition_outputs(
+        tmp_path / "mapped", [tmp_path / "mapped.0", tmp_path / "mapped.1"]
+    )
+
+    assert decorators.count_partitions(tmp_path / "mapped") == 2
+    assert InterfaceFactory.create("pickle").read(
+        str(tmp_path / "mapped" / "result.pkl")
+    ) == ["x", "y"]
+
+
+@pytest.mark.parametrize("interface", ["arrow", "parquet"])
+def test_table_input_reads_selected_columns_and_row_groups(tmp_path, interface):
+    pytest.importorskip("pyarrow")
+    table = {"a": list(range(10)), "b": [str(i) for i in range(10)], "c": [0.5] * 10}
+
+    with mock.patch.object(decorators._TableInterface, "ROW_GROUP_SIZE", 4):
+        with mock.patch.dict(
+            decorators.os.environ,
+            {
+                "DAGGR_DAG_NAME": "test",
+                "DAGGR_OUTPUTS_PATH": str(tmp_path),
+                "DAGGR_STEP_NAME": "producer",
+            },
+        ):
+
+            @output("table", type=interface)
+            def write_table():
+                return table
+
+            write_table()
+
+    assert decorators.count_partitions(tmp_path / "producer") == 3
+
+    with mock.patch.dict(
+        decorators.os.environ,
+        {
+            "DAGGR_DAG_NAME": "test",
+            "DAGGR_STEP_NAME": "consumer",
+            "DAGGR_OUTPUTS_PATH": str(tmp_path),
+            "DAGGR_PARAMETERS": json.dumps({}),
+            "DAGGR_INPUTS": json.dumps(
+                {
+                    "full": "output:producer",
+                    "columns": "output:producer?columns=c,a",
+                    "row_groups": "output:producer?columns=a&row_groups=0,2",
+                    "partition": "output:producer?partition=1",
+                }
+            ),
+        },
+    ):
+
+        @inputs()
+        def read_inputs(inputs, parameters):
+            return inputs
+
+        data = read_inputs()
+
+    assert data["full"].num_rows == 10
+    assert data["columns"].column_names == ["c", "a"]
+    assert data["row_groups"].to_pydict() == {"a": [0, 1, 2, 3, 8, 9]}
+    assert data["partition"].column("a").to_pylist() == [4, 5, 6, 7]
+
+
+def test_table_interface_rejects_unknown_query(tmp_path):
+    pytest.importorskip("pyarrow")
+    io = InterfaceFactory.create("arrow")
+    path = str(tmp_path / "table.arrow")
+    io.write({"a": [1, 2]}, path)
+
+    with pytest.raises(decorators.UnsupportedInputQuery):
+        io.read_query(path, {"rows": "1"})
+
+
+def test_query_on_pickle_input_is_rejected(tmp_path):
+    _write_pickle_output(tmp_path, "producer", [1, 2])
+
+    with mock.patch.dict(
+        decorators.os.environ,
+        {
+            "DAGGR_DAG_NAME": "test",
+            "DAGGR_STEP_NAME": "consumer",
+            "DAGGR_OUTPUTS_PATH": str(tmp_path),
+            "DAGGR_PARAMETERS": json.dumps({}),
+            "DAGGR_INPUTS": json.dumps({"item": "output:producer?columns=a"}),
+        },
+    ):
+
+        @inputs()
+        def read_input(inputs, parameters):
+            return inputs["item"]
+
+        with pytest.raises(decorators.UnsupportedInputQuery):
+            read_input()
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma", "bz2"])
+def test_compressed_output_is_read_transparently(tmp_path, codec):
+    value = [{"id": i, "name": f"name{i}"} for i in range(1000)]
+
+    with mock.patch.dict(
+        decorators.os.environ,
+        {
+            "DAGGR_DAG_NAME": "test",
+            "DAGGR_OUTPUTS_PATH": str(tmp_path),
+            "DAGGR_STEP_NAME": "producer",
+        },
+    ):
+
+        @output("result", type="pickle", compression=codec, compression_level=1)
+        def write_output():
+            return value
+
+        write_output()
+
+    metadata = decorators.read_step_output_metadata(tmp_path / "producer")
+    assert metadata.outputs[0].compression == codec
+    with pytest.raises(pickle.UnpicklingError):
+        InterfaceFactory.create("pickle").read(
+            str(tmp_path / "producer" / "result.pkl")
+        )
+
+    with mock.patch.dict(
+        decorators.os.environ,
+        {
+            "DAGGR_DAG_NAME": "test",
+            "DAGGR_STEP_NAME": "consumer",
+            "DAGGR_OUTPUTS_PATH": str(tmp_path),
+            "DAGGR_PARAMETERS": json.dumps({}),
+            "DAGGR_INPUTS": json.dumps({"item": "output:producer"}),
+        },
+    ):
+
+        @inputs()
+        def read_input(inputs, parameters):
+            return inputs["item"]
+
+        assert read_input() == value
+
+
+def test_compression_requires_compressible_interface(tmp_path):
+    with mock.patch.dict(
+        decorators.os.environ,
+        {"DAGGR_OUTPUTS_PATH": str(tmp_path), "DAGGR_STEP_NAME": "producer"},
+    ):
+
+        @output("result", type="chunks", compression="zlib")
+        def write_output():
+            yield 1
+
+        with pytest.raises(decorators.CompressionNotSupported):
+            write_output()
+
+
+requires_pickle5 = pytest.mark.skipif(
+    pickle.HIGHEST_PROTOCOL < 5, reason="pickle protocol 5 requires Python 3.8+"
+)
+
+
+def test_out_of_band_pickle_requires_protocol_5():
+    with mock.patch.object(pickle, "HIGHEST_PROTOCOL", 4):
+        with pytest.raises(decorators.PickleProtocolNotSupported):
+            InterfaceFactory.create("pickle5")
+    str(decorators.PickleProtocolNotSupported(5))
+
+
+@requires_pickle5
+def test_out_of_band_pickle_maps_large_buffers_from_sidecar(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    value = {"large": numpy.arange(100_000, dtype=numpy.float64), "small": [1, 2]}
+    io = InterfaceFactory.create("pickle5")
+    path = str(tmp_path / "value.pkl5")
+
+    assert io.write(value, path) == {"buffers": 1}
+    assert (tmp_path / "value.pkl5").stat().st_size < 1024
+    assert (tmp_path / "value.pkl5.buffers").is_file()
+
+    data = io.read(path)
+    assert numpy.array_equal(data["large"], value["large"])
+    assert data["small"] == [1, 2]
+    assert not data["large"].flags.writeable
+    assert data["large"].ctypes.data % io.ALIGNMENT == 0
+
+
+@requires_pickle5
+def test_out_of_band_pickle_content_hash_covers_buffers(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    io = InterfaceFactory.create("pickle5")
+    hashes = []
+    for fill in (0, 1):
+        path = str(tmp_path / f"value{fill}.pkl5")
+        io.write(numpy.full(100_000, fill, dtype=numpy.int64), path)
+        hashes.append(io.content_hash(path))
+
+    assert (tmp_path / "value0.pkl5").read_bytes() == (
+        tmp_path / "value1.pkl5"
+    ).read_bytes()
+    assert hashes[0] != hashes[1]
+
+
+@requires_pickle5
+def test_out_of_band_pickle_keeps_small_buffers_in_band(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    io = InterfaceFactory.create("pickle5")
+    path = str(tmp_path / "value.pkl5")
+
+    assert io.write(numpy.arange(10), path) == {"buffers": 0}
+    assert numpy.array_equal(io.read(path), numpy.arange(10))
+
+
+def test_parameters_are_read_from_file(tmp_path):
+    parameters_file = tmp_path / "parameters.json"
+    parameters_file.write_text(json.dumps({"threshold": 3}))
+
+    with mock.patch.dict(
+        decorators.os.environ,
+        {
+            "DAGGR_OUTPUTS_PATH": str(tmp_path),
+            "DAGGR_PARAMETERS_FILE": str(parameters_file),
+            "DAGGR_INPUTS": json.dumps({}),
+        },
+    ):
+        decorators.os.environ.pop("DAGGR_PARAMETERS", None)
+
+        @inputs()
+        def read_parameters(inputs, parameters):
+            return parameters
+
+        assert read_parameters() == {"threshold": 3}
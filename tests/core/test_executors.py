@@ -0,0 +1,285 @@
+import pickle
+import resource
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from daggr.core import decorators
+from daggr.core.dag import (
+    AsyncRuntime,
+    Dag,
+    DagRun,
+    LocalParallelRuntime,
+    LocalRuntime,
+    StepState,
+    WorkflowDefinition,
+)
+from daggr.core.decorators import write_step_output
+from daggr.core.executors import (
+    ExecutorFactory,
+    ExecutorNotImplemented,
+    StepExecutor,
+    SubprocessExecutor,
+    WorkerPoolExecutor,
+)
+from daggr.core.resources import ResourcePool
+
+SCRIPTS_PATH = Path(__file__).parent / "scripts"
+
+
+@pytest.fixture
+def pool():
+    executor = WorkerPoolExecutor(size=1)
+    yield executor
+    executor.close()
+
+
+def test_worker_pool_captures_stdout(pool):
+    result = pool.run(str(SCRIPTS_PATH / "step_test.py"), {})
+    assert result.returncode == 0
+    assert result.stdout == "Hello World\n"
+
+
+def test_worker_pool_reports_exceptions(pool):
+    result = pool.run(str(SCRIPTS_PATH / "step_test_with_error.py"), {})
+    assert result.returncode == 1
+    assert "Traceback" in result.stderr
+
+
+def test_worker_pool_reports_exit_code(pool):
+    result = pool.run(str(SCRIPTS_PATH / "step_with_exit_code.py"), {})
+    assert result.returncode == 3
+
+
+def test_worker_pool_passes_daggr_environment(pool):
+    script = str(SCRIPTS_PATH / "step_print_step_name.py")
+    first = pool.run(script, {"DAGGR_STEP_NAME": "first"})
+    second = pool.run(script, {"DAGGR_STEP_NAME": "second"})
+
+    assert first.stdout == "first\n"
+    assert second.stdout == "second\n"
+    assert pool.started_workers == 1
+
+
+def test_worker_pool_reports_peak_memory_only_when_a_task_raised_it(pool, tmp_path):
+    script = tmp_path / "allocate.py"
+    script.write_text(
+        "import os\ndata = b'x' * (int(os.environ['DAGGR_TEST_SIZE_KB']) << 10)\n"
+    )
+    # Workers start with the peak memory of this process, it is kept by exec.
+    size_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + (64 << 10)
+
+    first = pool.run(str(script), {"DAGGR_TEST_SIZE_KB": str(size_kb)})
+    second = pool.run(str(SCRIPTS_PATH / "step_test.py"), {})
+
+    assert first.usage.max_rss_kb > size_kb
+    assert second.usage.max_rss_kb is None
+
+
+def test_worker_pool_recycles_after_max_tasks():
+    pool = WorkerPoolExecutor(size=1, max_tasks_per_worker=2)
+    try:
+        for _ in range(5):
+            pool.run(str(SCRIPTS_PATH / "step_test.py"), {})
+    finally:
+        pool.close()
+
+    assert pool.started_workers == 3
+
+
+def test_worker_pool_recycles_above_memory_threshold():
+    pool = WorkerPoolExecutor(size=1, max_memory_mb=1)
+    try:
+        for _ in range(2):
+            pool.run(str(SCRIPTS_PATH / "step_test.py"), {})
+    finally:
+        pool.close()
+
+    assert pool.started_workers == 2
+
+
+def test_local_runtime_with_worker_pool(tmp_path, pool):
+    workflow_path = tmp_path / "simple_workflow"
+    shutil.copytree(
+        Path(__file__).parents[2] / "workflows" / "examples" / "simple_workflow",
+        workflow_path,
+        ignore=shutil.ignore_patterns("outputs"),
+    )
+    wd = WorkflowDefinition(
+        dag="simple_workflow",
+        steps={
+            "generate_scores": {},
+            "filter_passing_scores": {
+                "inputs": {"grades": "output:generate_scores"},
+                "parameters": {"passing_score": 7},
+                "depends_on": ["generate_scores"],
+            },
+            "display_scores": {
+                "inputs": {"approved": "output:filter_passing_scores"},
+                "depends_on": ["filter_passing_scores"],
+            },
+        },
+        path=str(workflow_path),
+    )
+    dag_run = DagRun(Dag(wd))
+    LocalRuntime(dag_run, executor=pool).execute()
+
+    for step_run in dag_run.step_runs.values():
+        assert step_run.state == StepState.SUCCESSFUL
+    assert dag_run.step_runs["display_scores"].stdout == (
+        "{'2': {'score': 7}, '3': {'score': 8}, '6': {'score': 10}}\n"
+    )
+    assert pool.started_workers == 1
+
+
+def test_executor_factory():
+    assert isinstance(ExecutorFactory.create("subprocess"), SubprocessExecutor)
+    pool = ExecutorFactory.create("worker-pool", size=2)
+    assert isinstance(pool, WorkerPoolExecutor)
+    assert pool.size == 2
+
+    with pytest.raises(ExecutorNotImplemented):
+        ExecutorFactory.create("does_not_exist")
+
+
+def _copy_scripts(source: Path, destination: Path) -> None:
+    for script in source.glob("*.py"):
+        shutil.copy(script, destination)
+
+
+@pytest.mark.parametrize("runtime_class", [LocalRuntime, LocalParallelRuntime])
+@pytest.mark.parametrize("count", [4, 0])
+def test_map_step_runs_one_partition_per_chunk(tmp_path, pool, runtime_class, count):
+    _copy_scripts(SCRIPTS_PATH / "map_workflow", tmp_path)
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "produce": {"parameters": {"count": count}},
+            "square": {
+                "inputs": {"number": "output:produce"},
+                "map_over": "number",
+                "depends_on": ["produce"],
+            },
+            "total": {
+                "inputs": {"squares": "output:square"},
+                "depends_on": ["square"],
+            },
+        },
+        path=str(tmp_path),
+    )
+    dag_run = DagRun(Dag(wd))
+    runtime_class(dag_run, executor=pool, max_workers=2).execute()
+
+    assert dag_run.step_runs["total"].state == StepState.SUCCESSFUL
+    assert dag_run.step_runs["square"].partitions == count
+    with open(tmp_path / "outputs" / "total" / "total.pkl", "rb") as f:
+        assert pickle.load(f) == sum(i ** 2 for i in range(count))
+    assert not (tmp_path / "outputs" / "square.0").exists()
+
+
+def test_map_step_over_queried_table_input(tmp_path, pool):
+    pytest.importorskip("pyarrow")
+    with mock.patch.object(decorators._TableInterface, "ROW_GROUP_SIZE", 4):
+        write_step_output(
+            tmp_path / "outputs" / "produce",
+            "table",
+            "parquet",
+            {"a": list(range(10)), "b": [str(i) for i in range(10)]},
+        )
+    (tmp_path / "rows.py").write_text(
+        "from daggr.core.decorators import inputs, output\n\n\n"
+        "@inputs()\n"
+        '@output("rows", type="pickle")\n'
+        "def main(inputs, parameters):\n"
+        '    return inputs["rows"].to_pydict()\n\n\n'
+        "main()\n"
+    )
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "rows": {
+                "inputs": {"rows": "output:produce?columns=a"},
+                "map_over": "rows",
+            },
+        },
+        path=str(tmp_path),
+    )
+    dag_run = DagRun(Dag(wd))
+    LocalRuntime(dag_run, executor=pool).execute()
+
+    step_run = dag_run.step_runs["rows"]
+    assert step_run.state == StepState.SUCCESSFUL, step_run.stderr
+    with open(tmp_path / "outputs" / "rows" / "rows.pkl", "rb") as f:
+        assert pickle.load(f) == [
+            {"a": [0, 1, 2, 3]},
+            {"a": [4, 5, 6, 7]},
+            {"a": [8, 9]},
+        ]
+
+
+class _ConcurrencyExecutor(StepExecutor):
+    def __init__(self) -> None:
+        self.running = 0
+        self.max_running = 0
+        self.limited = 0
+        self.max_limited = 0
+        self.allocations = []
+        self._lock = threading.Lock()
+
+    def run(self, script_path, env, allocation=None):
+        limited = bool(allocation and allocation.memory_mb)
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.limited += limited
+            self.max_limited = max(self.max_limited, self.limited)
+            self.allocations.append(allocation)
+        time.sleep(0.05)
+        with self._lock:
+            self.running -= 1
+            self.limited -= limited
+        return subprocess.CompletedProcess(
+            args=[script_path], returncode=0, stdout="", stderr=""
+        )
+
+
+@pytest.mark.parametrize("runtime_class", [LocalParallelRuntime, AsyncRuntime])
+def test_partitions_share_worker_slots_and_resources(tmp_path, runtime_class):
+    # The async runtime starts regular steps itself, they run empty scripts.
+    for name in ("produce", "other"):
+        (tmp_path / f"{name}.py").write_text("")
+    write_step_output(tmp_path / "outputs" / "produce", "items", "pickle", [0] * 6)
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "produce": {},
+            "square": {
+                "inputs": {"item": "output:produce"},
+                "map_over": "item",
+                "depends_on": ["produce"],
+                "resources": {"memory_mb": 100},
+            },
+            "other": {"depends_on": ["produce"]},
+        },
+        path=str(tmp_path),
+    )
+    dag_run = DagRun(Dag(wd))
+    executor = _ConcurrencyExecutor()
+    runtime_class(
+        dag_run,
+        executor=executor,
+        max_workers=3,
+        resource_pool=ResourcePool(memory_mb=200),
+    ).execute()
+
+    assert all(s.state == StepState.SUCCESSFUL for s in dag_run.step_runs.values())
+    assert dag_run.step_runs["square"].partitions == 6
+    assert executor.max_running <= 3
+    assert executor.max_limited == 2
+    partition_allocations = [a for a in executor.allocations if a and a.memory_mb]
+    assert len({id(a) for a in partition_allocations}) == 6
@@ -0,0 +1,86 @@
+import pytest
+
+from daggr.core.graph import CircularDependency, CompiledDag
+
+
+def test_adjacency_arrays():
+    graph = CompiledDag(
+        ["a", "b", "c", "d"], [("a", "b"), ("a", "c"), ("b", "d"), ("c", "d")]
+    )
+    a, b, c, d = (graph.ids[name] for name in "abcd")
+
+    assert list(graph.successors_of(a)) == [b, c]
+    assert list(graph.predecessors_of(d)) == [b, c]
+    assert graph.in_degree(a) == 0
+    assert graph.in_degree(d) == 2
+
+
+def test_duplicate_edges_are_ignored():
+    graph = CompiledDag(["a", "b"], [("a", "b"), ("a", "b")])
+    assert graph.in_degree(graph.ids["b"]) == 1
+
+
+def test_topological_order_and_levels():
+    graph = CompiledDag(
+        ["d", "c", "b", "a"], [("a", "b"), ("a", "c"), ("b", "d"), ("c", "d")]
+    )
+    order = [graph.names[node] for node in graph.topological_order]
+    levels = [sorted(graph.names[node] for node in level) for level in graph.levels]
+
+    assert order.index("a") < order.index("b") < order.index("d")
+    assert order.index("a") < order.index("c") < order.index("d")
+    assert levels == [["a"], ["b", "c"], ["d"]]
+
+
+def test_cycle_is_reported():
+    with pytest.raises(CircularDependency) as excinfo:
+        CompiledDag(
+            ["root", "a", "b", "c"],
+            [("root", "a"), ("a", "b"), ("b", "c"), ("c", "a")],
+        )
+
+    assert excinfo.value.cycle == ["a", "b", "c", "a"]
+    assert str(excinfo.value) == "Steps have a circular dependency: a -> b -> c -> a"
+
+
+def test_long_chain():
+    size = 100_000
+    names = [f"step{i}" for i in range(size)]
+    graph = CompiledDag(names, zip(names, names[1:]))
+
+    assert list(graph.topological_order) == list(range(size))
+    assert len(graph.levels) == size
+
+
+def test_empty_graph():
+    graph = CompiledDag([], [])
+    assert list(graph.topological_order) == []
+    assert graph.levels == []
+
+
+def test_longest_paths_to_a_sink():
+    graph = CompiledDag(
+        ["a", "b", "c", "d"], [("a", "b"), ("a", "c"), ("b", "d"), ("c", "d")]
+    )
+    lengths = graph.longest_paths([1.0, 5.0, 2.0, 1.0])
+
+    assert dict(zip(graph.names, lengths)) == {"a": 7.0, "b": 6.0, "c": 3.0, "d": 1.0}
+
+
+def test_ancestors_and_descendants():
+    graph = CompiledDag(
+        ["a", "b", "c", "d", "e"],
+        [("a", "b"), ("a", "c"), ("b", "d"), ("c", "d"), ("e", "c")],
+    )
+
+    def names(nodes):
+        return sorted(graph.names[node] for node in nodes)
+
+    assert names(graph.ancestors([graph.ids["c"]])) == ["a", "c", "e"]
+    assert names(graph.descendants([graph.ids["b"]])) == ["b", "d"]
+    assert names(graph.descendants([graph.ids["b"], graph.ids["e"]])) == [
+        "b",
+        "c",
+        "d",
+        "e",
+    ]
@@ -0,0 +1,114 @@
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+from daggr.core.dag import Dag, DagRun, LocalRuntime, StepState, WorkflowDefinition
+from daggr.core.dag import subprocess as dag_subprocess
+from daggr.core.history import RunHistory
+
+
+class MockedRun:
+    stdout = ""
+    stderr = ""
+
+    def __init__(self, returncode: int) -> None:
+        self.returncode = returncode
+
+
+def _dag(path: Path) -> Dag:
+    return Dag(
+        WorkflowDefinition(
+            dag="test_dag",
+            steps={"step1": {}, "step2": {"depends_on": ["step1"]}},
+            path=str(path),
+        )
+    )
+
+
+def _finished_run(dag: Dag, durations, state=StepState.SUCCESSFUL) -> DagRun:
+    dag_run = DagRun(dag)
+    start = datetime(2021, 12, 1)
+    for name, duration in durations.items():
+        step_run = dag_run.step_runs[name]
+        step_run.state = state
+        step_run.start_time = start
+        step_run.end_time = start + timedelta(seconds=duration)
+        step_run.returncode = 0 if state == StepState.SUCCESSFUL else 1
+    return dag_run
+
+
+def test_runtime_records_steps_with_exit_codes(tmp_path):
+    history = RunHistory(tmp_path / "history.db")
+    dag_run = DagRun(_dag(tmp_path))
+
+    history.start_run(dag_run)
+    with mock.patch.object(dag_subprocess, "run", return_value=MockedRun(3)):
+        LocalRuntime(dag_run, history=history).execute()
+    history.finish_run(dag_run)
+
+    connection = sqlite3.connect(str(tmp_path / "history.db"))
+    assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert connection.execute("SELECT state FROM runs").fetchall() == [("FAILED",)]
+    assert connection.execute(
+        "SELECT step, state, returncode FROM steps ORDER BY step"
+    ).fetchall() == [("step1", "FAILED", 3), ("step2", "CANCELLED", None)]
+
+
+def test_steps_are_written_in_batches(tmp_path):
+    history = RunHistory(tmp_path / "history.db", batch_size=2, flush_interval=60)
+    dag_run = _finished_run(_dag(tmp_path), {"step1": 1, "step2": 2})
+    history.start_run(dag_run)
+
+    def recorded_steps():
+        connection = sqlite3.connect(str(tmp_path / "history.db"))
+        return connection.execute("SELECT COUNT(*) FROM steps").fetchone()[0]
+
+    history.record_step(dag_run, "step1")
+    assert recorded_steps() == 0
+    history.record_step(dag_run, "step2")
+    assert recorded_steps() == 2
+
+
+def test_step_statistics_over_latest_runs(tmp_path):
+    history = RunHistory(tmp_path / "history.db")
+    dag = _dag(tmp_path)
+    for duration in [100, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10]:
+        dag_run = _finished_run(dag, {"step1": duration, "step2": 1})
+        history.start_run(dag_run)
+        history.finish_run(dag_run)
+    failed_run = _finished_run(dag, {"step1": 50}, state=StepState.FAILED)
+    history.start_run(failed_run)
+    history.finish_run(failed_run)
+    reused_run = _finished_run(dag, {"step1": 1000, "step2": 1})
+    reused_run.step_runs["step1"].reused = True
+    history.start_run(reused_run)
+    history.finish_run(reused_run)
+
+    (stats,) = history.step_statistics(
+        "test_dag", max_runs=12, percentile=90, step_name="step1"
+    )
+
+    assert history.latest_dag() == "test_dag"
+    assert (stats.step, stats.runs, stats.failures) == ("step1", 11, 1)
+    assert stats.mean_seconds == 5.5
+    assert stats.p50_seconds == 5
+    assert stats.percentile_seconds == 9
+    assert stats.max_seconds == 10
+
+
+def test_durations_of_latest_successful_runs(tmp_path):
+    history = RunHistory(tmp_path / "history.db")
+    dag = _dag(tmp_path)
+    for durations in ({"step1": 2, "step2": 1}, {"step1": 4}):
+        dag_run = _finished_run(dag, durations)
+        history.start_run(dag_run)
+        history.finish_run(dag_run)
+    failed_run = _finished_run(dag, {"step1": 60}, state=StepState.FAILED)
+    history.start_run(failed_run)
+    history.finish_run(failed_run)
+
+    assert history.durations("test_dag") == {"step1": 3.0, "step2": 1.0}
+    assert history.durations("test_dag", max_runs=1) == {}
+    assert history.durations("other_dag") == {}
+    assert RunHistory(tmp_path / "missing.db").durations("test_dag") == {}
@@ -0,0 +1,161 @@
+import json
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from click.testing import CliRunner
+
+from daggr.cli import daggr
+from daggr.core import decorators
+from daggr.core.dag import Dag, DagRun, StepState, WorkflowDefinition
+from daggr.core.decorators import inputs, output
+from daggr.core.executors import SubprocessExecutor
+from daggr.core.profiling import (
+    ProfileNotFound,
+    Profiler,
+    ResourceUsage,
+    chrome_trace,
+    critical_path,
+    load_profile,
+    slowest_steps,
+)
+
+SCRIPTS_PATH = Path(__file__).parent / "scripts"
+
+
+def _profiled_run(tmp_path: Path) -> DagRun:
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "root": {},
+            "fast": {"depends_on": ["root"]},
+            "slow": {"depends_on": ["root"]},
+        },
+        path=str(tmp_path),
+    )
+    dag_run = DagRun(Dag(wd))
+    durations = {"root": 1, "fast": 3, "slow": 5}
+    for name, seconds in durations.items():
+        step_run = dag_run.step_runs[name]
+        step_run.state = StepState.SUCCESSFUL
+        step_run.start_time = datetime(2022, 1, 1, 0, 0, 1 if name != "root" else 0)
+        step_run.end_time = datetime(2022, 1, 1, 0, 0, seconds)
+    return dag_run
+
+
+def test_decorators_record_phases(tmp_path):
+    profiler = Profiler(tmp_path / "profile")
+    env = {
+        "DAGGR_DAG_NAME": "test",
+        "DAGGR_STEP_NAME": "step",
+        "DAGGR_OUTPUTS_PATH": str(tmp_path),
+        "DAGGR_PARAMETERS": json.dumps({}),
+        "DAGGR_INPUTS": json.dumps({}),
+        **profiler.env("step"),
+    }
+    with mock.patch.dict(decorators.os.environ, env):
+
+        @inputs()
+        @output("result", type="pickle")
+        def step(inputs, parameters):
+            return [1, 2, 3]
+
+        step()
+
+    with open(profiler.events_file("step"), "r") as f:
+        events = [json.loads(line) for line in f]
+
+    assert [e["phase"] for e in events] == ["function", "output"]
+    assert events[1]["bytes"] == (tmp_path / "step" / "result.pkl").stat().st_size
+
+
+def test_profile_and_trace_are_written(tmp_path):
+    dag_run = _profiled_run(tmp_path)
+    profiler = Profiler(tmp_path / "profile")
+    profiler.record_usage("slow", ResourceUsage(1.5, 0.5, 2048))
+
+    profile = load_profile(str(profiler.write(dag_run).parent.parent))
+
+    assert profile["steps"]["slow"]["wall_seconds"] == 4.0
+    assert profile["steps"]["slow"]["user_seconds"] == 1.5
+    assert profile["steps"]["slow"]["max_rss_kb"] == 2048
+    with open(tmp_path / "profile" / "trace.json", "r") as f:
+        trace = json.load(f)
+    lanes = {e["name"]: e["tid"] for e in trace["traceEvents"]}
+    assert lanes["fast"] != lanes["slow"]
+
+
+def test_critical_path_and_slowest_steps(tmp_path):
+    profiler = Profiler(tmp_path / "profile")
+    profiler.write(_profiled_run(tmp_path))
+    profile = load_profile(str(tmp_path), run_id="profile")
+
+    assert critical_path(profile) == (["root", "slow"], 5.0)
+    assert [name for name, _ in slowest_steps(profile, 2)] == ["slow", "fast"]
+    assert chrome_trace({"steps": {}})["traceEvents"] == []
+
+
+def test_chunk_generation_is_timed_as_function(tmp_path):
+    profiler = Profiler(tmp_path / "profile")
+    env = {
+        "DAGGR_STEP_NAME": "step",
+        "DAGGR_OUTPUTS_PATH": str(tmp_path),
+        **profiler.env("step"),
+    }
+    with mock.patch.dict(decorators.os.environ, env):
+
+        @output("result", type="chunks")
+        def step():
+            for index in range(2):
+                time.sleep(0.05)
+                yield index
+
+        step()
+
+    with open(profiler.events_file("step"), "r") as f:
+        events = [json.loads(line) for line in f]
+
+    phases = {}
+    for event in events:
+        phases[event["phase"]] = phases.get(event["phase"], 0) + event["duration"]
+    assert phases["function"] >= 0.1
+    assert phases["output"] < 0.05
+
+
+def test_decorators_do_not_import_profiling():
+    code = (
+        "import sys, daggr.core.decorators; "
+        "assert 'daggr.core.profiling' not in sys.modules; "
+        "assert 'resource' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_missing_profile(tmp_path):
+    with pytest.raises(ProfileNotFound):
+        load_profile(str(tmp_path))
+    str(ProfileNotFound(str(tmp_path)))
+
+
+def test_subprocess_executor_measures_child_usage():
+    result = SubprocessExecutor(measure_usage=True).run(
+        str(SCRIPTS_PATH / "step_with_exit_code.py"), {}
+    )
+
+    assert result.returncode == 3
+    assert result.usage.max_rss_kb > 0
+
+
+def test_profile_command(tmp_path):
+    Profiler(tmp_path / ".daggr" / "profiles" / "run").write(_profiled_run(tmp_path))
+
+    result = CliRunner().invoke(
+        daggr, ["profile", "-w", str(tmp_path / "workflow.yml")]
+    )
+
+    assert result.exit_code == 0
+    assert "Critical path (5.000s): root -> slow" in result.output
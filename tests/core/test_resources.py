@@ -0,0 +1,129 @@
+import os
+import subprocess
+import sys
+from unittest import mock
+
+import pytest
+
+from daggr.core.dag import (
+    Dag,
+    DagRun,
+    LocalParallelRuntime,
+    StepState,
+    WorkflowDefinition,
+)
+from daggr.core.executors import SubprocessExecutor
+from daggr.core.resources import ResourceAllocation, ResourcePool, ResourceRequest
+
+
+def test_pool_admits_requests_within_budget():
+    pool = ResourcePool(memory_mb=1000)
+    heavy = ResourceRequest(memory_mb=800)
+
+    assert pool.fits(heavy)
+    allocation = pool.acquire(heavy)
+    assert not pool.fits(heavy)
+    assert pool.fits(ResourceRequest(memory_mb=200))
+    assert pool.fits(ResourceRequest())
+
+    pool.release(allocation)
+    assert pool.fits(heavy)
+
+
+def test_pool_assigns_distinct_cpus():
+    pool = ResourcePool(cpus=1)
+    allocation = pool.acquire(ResourceRequest(cpus=1))
+
+    assert len(allocation.cpus) == 1
+    assert not pool.fits(ResourceRequest(cpus=1))
+
+
+def test_pool_clamps_requests_larger_than_budget():
+    pool = ResourcePool(cpus=1, memory_mb=100)
+    request = ResourceRequest(cpus=4, memory_mb=1000)
+
+    assert pool.fits(request)
+    allocation = pool.acquire(request)
+    assert allocation.memory_mb == 100
+    assert len(allocation.cpus) == 1
+
+
+def test_parallel_runtime_does_not_overcommit_memory():
+    wd = WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "heavy1": {"resources": {"memory_mb": 600}},
+            "heavy2": {"resources": {"memory_mb": 600}},
+            "light": {"resources": {"memory_mb": 100}},
+        },
+        path="my/path",
+    )
+    dag_run = DagRun(Dag(wd))
+    runtime = LocalParallelRuntime(
+        dag_run, max_workers=3, resource_pool=ResourcePool(memory_mb=1000)
+    )
+    running = set()
+    concurrent = []
+
+    def run_step(step_name):
+        running.add(step_name)
+        concurrent.append(set(running))
+        dag_run.step_runs[step_name].state = StepState.SUCCESSFUL
+        return StepState.SUCCESSFUL
+
+    def finish_step(queue, step_name, step_state):
+        running.discard(step_name)
+        finish(queue, step_name, step_state)
+
+    finish = runtime._finish_step
+    with mock.patch.object(
+        runtime, "run_step", side_effect=run_step
+    ), mock.patch.object(runtime, "_finish_step", side_effect=finish_step):
+        runtime.execute()
+
+    assert all(not {"heavy1", "heavy2"} <= steps for steps in concurrent)
+    assert all(s.state == StepState.SUCCESSFUL for s in dag_run.step_runs.values())
+
+
+def _limits_script(tmp_path):
+    script = tmp_path / "step.py"
+    script.write_text(
+        "import os, resource\n"
+        "print(sorted(os.sched_getaffinity(0)), "
+        "resource.getrlimit(resource.RLIMIT_DATA)[0])\n"
+    )
+    return script
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "sched_setaffinity"), reason="CPU affinity not supported"
+)
+def test_allocation_limits_child_process_before_the_script_runs(tmp_path):
+    cpu = sorted(os.sched_getaffinity(0))[0]
+    allocation = ResourceAllocation(cpus=[cpu], memory_mb=512)
+    script = _limits_script(tmp_path)
+
+    completed = subprocess.run(
+        allocation.command(str(script)), stdout=subprocess.PIPE, text=True
+    )
+
+    assert completed.stdout.strip() == f"[{cpu}] {512 * 2 ** 20}"
+    assert allocation.is_limited()
+    assert not ResourceAllocation().is_limited()
+    assert ResourceAllocation().command(str(script))[1:] == [str(script)]
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "sched_setaffinity"), reason="CPU affinity not supported"
+)
+@pytest.mark.parametrize("measure_usage", [False, True])
+def test_subprocess_executor_limits_step(tmp_path, measure_usage):
+    cpu = sorted(os.sched_getaffinity(0))[0]
+    allocation = ResourceAllocation(cpus=[cpu], memory_mb=512)
+
+    completed = SubprocessExecutor(measure_usage=measure_usage).run(
+        str(_limits_script(tmp_path)), dict(os.environ), allocation
+    )
+
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == f"[{cpu}] {512 * 2 ** 20}"
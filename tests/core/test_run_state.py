@@ -0,0 +1,286 @@
+import os
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from daggr.core.dag import (
+    Dag,
+    DagRun,
+    LocalParallelRuntime,
+    LocalRuntime,
+    StepState,
+    WorkflowDefinition,
+)
+from daggr.core.dag import subprocess as dag_subprocess
+from daggr.core.run_state import RunNotFound, RunStateStore
+
+
+class MockedSuccessfulRun:
+    stdout = ""
+    stderr = ""
+    returncode = 0
+
+
+class MockedFailedRun:
+    stdout = ""
+    stderr = "error"
+    returncode = 1
+
+
+def _chain_definition(path: Path) -> WorkflowDefinition:
+    return WorkflowDefinition(
+        dag="test_dag",
+        steps={
+            "step1": {},
+            "step2": {"depends_on": ["step1"]},
+            "step3": {"depends_on": ["step2"]},
+        },
+        path=str(path),
+    )
+
+
+def _failing_step(step_name: str):
+    def run(command, *args, **kwargs):
+        if command[-1].endswith(f"{step_name}.py"):
+            return MockedFailedRun()
+        return MockedSuccessfulRun()
+
+    return run
+
+
+def _run_with_failure_in_step3(tmp_path: Path, store: RunStateStore) -> DagRun:
+    (tmp_path / "outputs" / "step1").mkdir(parents=True)
+    (tmp_path / "outputs" / "step1" / "data.pkl").write_bytes(b"data")
+
+    dag_run = DagRun(Dag(_chain_definition(tmp_path)))
+    with mock.patch.object(dag_subprocess, "run", side_effect=_failing_step("step3")):
+        LocalRuntime(dag_run, run_state_store=store).execute()
+    return dag_run
+
+
+def test_state_is_saved_after_each_step(tmp_path):
+    store = RunStateStore(tmp_path / "runs")
+    dag_run = _run_with_failure_in_step3(tmp_path, store)
+
+    saved = store.load(dag_run.run_id)
+
+    assert saved["steps"]["step1"]["state"] == "SUCCESSFUL"
+    assert saved["steps"]["step1"]["outputs"] == {
+        "data.pkl": dag_run.step_runs["step1"].outputs["data.pkl"]
+    }
+    assert saved["steps"]["step3"]["state"] == "FAILED"
+    assert saved["steps"]["step3"]["end_time"] is not None
+
+
+def test_steps_are_journaled_and_compacted_on_save(tmp_path):
+    store = RunStateStore(tmp_path / "runs")
+    dag_run = _run_with_failure_in_step3(tmp_path, store)
+
+    journal = tmp_path / "runs" / f"{dag_run.run_id}.journal"
+    assert len(journal.read_text().splitlines()) == 4
+    assert not (tmp_path / "runs" / f"{dag_run.run_id}.json").exists()
+
+    store.save(dag_run)
+
+    assert not journal.exists()
+    saved = store.load(dag_run.run_id)
+    assert saved["dag"] == "test_dag"
+    assert saved["steps"]["step3"]["state"] == "FAILED"
+
+
+def test_resume_only_runs_steps_that_did_not_succeed(tmp_path):
+    store = RunStateStore(tmp_path / "runs")
+    first_run = _run_with_failure_in_step3(tmp_path, store)
+
+    dag_run = DagRun(Dag(_chain_definition(tmp_path)))
+    store.resume(dag_run, first_run.run_id)
+
+    with mock.patch.object(
+        dag_subprocess, "run", return_value=MockedSuccessfulRun()
+    ) as run:
+        LocalRuntime(dag_run, run_state_store=store).execute()
+
+    run.assert_called_once()
+    assert dag_run.run_id == first_run.run_id
+    assert dag_run.step_runs["step1"].reused
+    assert dag_run.step_runs["step2"].reused
+    assert dag_run.step_runs["step3"].state == StepState.SUCCESSFUL
+    assert store.load(first_run.run_id)["steps"]["step3"]["state"] == "SUCCESSFUL"
+
+
+def test_resume_reruns_steps_with_changed_outputs_and_their_dependents(tmp_path):
+    store = RunStateStore(tmp_path / "runs")
+    first_run = _run_with_failure_in_step3(tmp_path, store)
+    (tmp_path / "outputs" / "step1" / "data.pkl").write_bytes(b"changed")
+
+    dag_run = DagRun(Dag(_chain_definition(tmp_path)))
+    store.resume(dag_run, first_run.run_id)
+
+    for step_run in dag_run.step_runs.values():
+        assert step_run.state == StepState.WAITING
+        assert not step_run.reused
+
+
+def test_outputs_are_recorded_without_reading_their_contents(tmp_path):
+    store = RunStateStore(tmp_path / "runs")
+    with mock.patch("daggr.core.hashing.open", create=True) as open_file:
+        first_run = _run_with_failure_in_step3(tmp_path, store)
+    open_file.assert_not_called()
+
+    output_file = tmp_path / "outputs" / "step1" / "data.pkl"
+    output_file.write_bytes(b"dat2")
+    os.utime(output_file, ns=(0, 0))
+    dag_run = DagRun(Dag(_chain_definition(tmp_path)))
+    store.resume(dag_run, first_run.run_id)
+
+    assert not dag_run.step_runs["step1"].reused
+
+
+def test_parallel_runtime_skips_resumed_steps(tmp_path):
+    store = RunStateStore(tmp_path / "runs")
+    first_run = _run_with_failure_in_step3(tmp_path, store)
+
+    dag_run = DagRun(Dag(_chain_definition(tmp_path)))
+    store.resume(dag_run, first_run.run_id)
+
+    with mock.patch.object(
+        dag_subprocess, "run", return_value=MockedSuccessfulRun()
+    ) as run:
+        LocalParallelRuntime(dag_run, max_workers=2).execute()
+
+    run.assert_called_once()
+    assert dag_run.step_runs["step3"].state == StepState.SUCCESSFUL
+
+
+def test_resume_unknown_run(tmp_path):
+    store = RunStateStore(tmp_path / "runs")
+    dag_run = DagRun(Dag(_chain_definition(tmp_path)))
+
+    with pytest.raises(RunNotFound):
+        store.resume(dag_run, "does_not_exist")
+    str(RunNotFound("does_not_exist", str(tmp_path)))
+
+
+def test_only_the_latest_runs_are_kept(tmp_path):
+    store = RunStateStore(tmp_path / "runs", max_runs=2)
+    for index in range(3):
+        dag_run = DagRun(Dag(_chain_definition(tmp_path)))
+        dag_run.run_id = f"run{index}"
+        store.save(dag_run)
+        os.utime(tmp_path / "runs" / f"run{index}.json", (index, index))
+
+    assert sorted(f.stem for f in (tmp_path / "runs").iterdir()) == ["run1", "run2"]
+    with pytest.raises(RunNotFound):
+        store.load("run0")
+
+
+def _fingerprinted_run(definition: WorkflowDefinition, store: RunStateStore) -> DagRun:
+    dag_run = DagRun(Dag(definition))
+    store.fingerprint(dag_run)
+    return dag_run
+
+
+def _successful_chain_run(tmp_path: Path, store: RunStateStore) -> DagRun:
+    for name in ("step1", "step2", "step3"):
+        (tmp_path / f"{name}.py").write_text(f"print('{name}')\n")
+
+    dag_run = _fingerprinted_run(_chain_definition(tmp_path), store)
+    with mock.patch.object(dag_subprocess, "run", return_value=MockedSuccessfulRun()):
+        LocalRuntime(dag_run, run_state_store=store).execute()
+    return dag_run
+
+
+def test_changed_reuses_every_step_when_nothing_changed(tmp_path):
+    store = RunStateStore(tmp_path / "runs")
+    first_run = _successful_chain_run(tmp_path, store)
+
+    dag_run = _fingerprinted_run(_chain_definition(tmp_path), store)
+    store.changed(dag_run)
+
+    assert dag_run.run_id != first_run.run_id
+    assert all(step_run.reused for step_run in dag_run.step_runs.values())
+
+
+def test_changed_runs_edited_step_and_its_descendants(tmp_path):
+    store = RunStateStore(tmp_path / "runs")
+    _successful_chain_run(tmp_path, store)
+    (tmp_path / "step2.py").write_text("print('edited')\n")
+
+    dag_run = _fingerprinted_run(_chain_definition(tmp_path), store)
+    store.changed(dag_run)
+
+    assert dag_run.step_runs["step1"].reused
+    assert dag_run.step_runs["step2"].state == StepState.WAITING
+    assert dag_run.step_runs["step3"].state == StepState.WAITING
+
+
+def test_changed_runs_steps_with_changed_parameters(tmp_path):
+    store = RunStateStore(tmp_path / "runs")
+    _successful_chain_run(tmp_path, store)
+    definition = _chain_definition(tmp_path)
+    definition.steps["step3"]["parameters"] = {"threshold": 2}
+
+    dag_run = _fingerprinted_run(definition, store)
+    store.changed(dag_run)
+
+    assert dag_run.step_runs["step2"].reused
+    assert not dag_run.step_runs["step3"].reused
+
+
+def test_changed_without_previous_run_runs_every_step(tmp_path):
+    store = RunStateStore(tmp_path / "runs")
+    dag_run = _fingerprinted_run(_chain_definition(tmp_path), store)
+
+    store.changed(dag_run)
+
+    assert not any(step_run.reused for step_run in dag_run.step_runs.values())
+
+
+def _inline_chain_definition(path: Path) -> WorkflowDefinition:
+    definition = _chain_definition(path)
+    for name in ("step1", "step2"):
+        definition.steps[name]["type"] = "inline"
+    return definition
+
+
+def test_changed_reruns_inline_steps_whose_outputs_were_kept_in_memory(tmp_path):
+    store = RunStateStore(tmp_path / "runs")
+    for name in ("step1", "step2"):
+        (tmp_path / f"{name}.py").write_text(
+            "def main(inputs, parameters):\n    return 1\n"
+        )
+    (tmp_path / "step3.py").write_text("print('step3')\n")
+    dag_run = _fingerprinted_run(_inline_chain_definition(tmp_path), store)
+    with mock.patch.object(dag_subprocess, "run", return_value=MockedSuccessfulRun()):
+        LocalRuntime(dag_run, run_state_store=store).execute()
+    assert not (tmp_path / "outputs" / "step1").exists()
+    assert (tmp_path / "outputs" / "step2" / "result.pkl").is_file()
+
+    dag_run = _fingerprinted_run(_inline_chain_definition(tmp_path), store)
+    store.changed(dag_run)
+
+    assert not any(step_run.reused for step_run in dag_run.step_runs.values())
+
+
+def test_changed_reruns_steps_left_out_of_a_targeted_run(tmp_path):
+    store = RunStateStore(tmp_path / "runs")
+    (tmp_path / "outputs" / "step1").mkdir(parents=True)
+    (tmp_path / "outputs" / "step1" / "data.pkl").write_bytes(b"10")
+    _successful_chain_run(tmp_path, store)
+
+    (tmp_path / "step1.py").write_text("print('edited')\n")
+    (tmp_path / "outputs" / "step1" / "data.pkl").write_bytes(b"20")
+    dag_run = _fingerprinted_run(_chain_definition(tmp_path), store)
+    selected = dag_run.select(targets=["step1"])
+    store.carry_over(dag_run, set(dag_run.dag.steps) - selected)
+    with mock.patch.object(dag_subprocess, "run", return_value=MockedSuccessfulRun()):
+        LocalRuntime(dag_run, run_state_store=store).execute()
+    store.save(dag_run)
+
+    dag_run = _fingerprinted_run(_chain_definition(tmp_path), store)
+    store.changed(dag_run)
+
+    assert dag_run.step_runs["step1"].reused
+    assert not dag_run.step_runs["step2"].reused
+    assert not dag_run.step_runs["step3"].reused
@@ -1,11 +1,18 @@
+import shutil
+from pathlib import Path
+
 from daggr.core.dag import StepState
 from daggr.core.runner import Runner
 
+EXAMPLE_PATH = Path("workflows/examples/simple_workflow")
+
 
-def test_runner():
-    r = Runner(
-        "yaml", "workflows/examples/simple_workflow/workflow.yml", runtime="local"
+def test_runner(tmp_path):
+    workflow_path = tmp_path / "simple_workflow"
+    shutil.copytree(
+        EXAMPLE_PATH, workflow_path, ignore=shutil.ignore_patterns(".daggr", "outputs")
     )
+    r = Runner("yaml", str(workflow_path / "workflow.yml"), runtime="local")
     dag_run = r.run()
 
     for _, step_run in dag_run.step_runs.items():
@@ -9,6 +9,24 @@ def test_daggr():
     assert result.exit_code == 0
 
 
+def test_async_runtime_rejects_worker_pool():
+    runner = CliRunner()
+    result = runner.invoke(
+        daggr,
+        [
+            "run",
+            "-w",
+            "tests/core/simple_workflow.yml",
+            "-r",
+            "async",
+            "-e",
+            "worker-pool",
+        ],
+    )
+    assert result.exit_code == 2
+    assert "--executor worker-pool cannot be used" in result.output
+
+
 # def test_daggr_run():
 #     runner = CliRunner()
 #     result = runner.invoke(run, args="-w tests/core/simple_workflow.yml")
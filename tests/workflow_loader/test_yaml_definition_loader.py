@@ -1,6 +1,10 @@
+import os
+from unittest import mock
+
 import pytest
 
 from daggr.core.dag import WorkflowDefinition
+from daggr.workflow_loader.definition_cache import DefinitionCache
 from daggr.workflow_loader.workflow_definition_loader import (
     InvalidWorkflow,
     InvalidWorkflowSchema,
@@ -81,7 +85,72 @@ def test_yaml_validator_with_valid_yaml(tmp_path, valid_yaml):
         YamlWorkflowValidator(filepath).validate_schema()
 
 
-def test_loader_with_valid_yaml_definition(valid_workflow_yaml_definition_path):
-    loader = YamlDefinitionLoader(valid_workflow_yaml_definition_path)
+def test_loader_with_valid_yaml_definition(tmp_path, valid_workflow_yaml_definition):
+    filepath = write_str_to_temp_yaml(
+        valid_workflow_yaml_definition, tmp_path, "workflow.yml"
+    )
+    loader = YamlDefinitionLoader(str(filepath))
     workflow = WorkflowLoader(loader).load()
     assert isinstance(workflow, WorkflowDefinition)
+
+
+def test_loader_reuses_cached_definition(tmp_path, valid_workflow_yaml_definition):
+    filepath = write_str_to_temp_yaml(
+        valid_workflow_yaml_definition, tmp_path, "workflow.yml"
+    )
+    first = YamlDefinitionLoader(str(filepath)).load()
+
+    with mock.patch.object(_YamlFileLoader, "parse") as parse:
+        second = YamlDefinitionLoader(str(filepath)).load()
+
+    parse.assert_not_called()
+    assert first == second
+    assert list((filepath.parent / ".daggr" / "definitions").iterdir())
+
+
+def test_loader_revalidates_changed_file(
+    tmp_path, valid_workflow_yaml_definition, invalid_workflow_yaml_definition
+):
+    filepath = write_str_to_temp_yaml(
+        valid_workflow_yaml_definition, tmp_path, "workflow.yml"
+    )
+    YamlDefinitionLoader(str(filepath)).load()
+
+    filepath.write_text(invalid_workflow_yaml_definition)
+    with pytest.raises(InvalidWorkflowSchema):
+        YamlDefinitionLoader(str(filepath)).load()
+
+
+def test_loader_keeps_one_cached_definition_per_file(
+    tmp_path, valid_workflow_yaml_definition
+):
+    filepath = write_str_to_temp_yaml(
+        valid_workflow_yaml_definition, tmp_path, "workflow.yml"
+    )
+    for parameter in range(3):
+        filepath.write_text(
+            valid_workflow_yaml_definition + f"\n# generation {parameter}\n"
+        )
+        YamlDefinitionLoader(str(filepath)).load()
+
+    assert len(list((filepath.parent / ".daggr" / "definitions").iterdir())) == 1
+
+
+def test_definition_cache_prunes_oldest_entries(tmp_path):
+    cache = DefinitionCache(str(tmp_path / "definitions"), max_entries=2)
+    for index in range(3):
+        cache.put(str(tmp_path / f"workflow{index}.yml"), "key", {"dag": index})
+        os.utime(cache._entry(str(tmp_path / f"workflow{index}.yml")), (index, index))
+
+    assert cache.get(str(tmp_path / "workflow0.yml"), "key") is None
+    assert cache.get(str(tmp_path / "workflow2.yml"), "key") == {"dag": 2}
+    assert cache.get(str(tmp_path / "workflow2.yml"), "other") is None
+
+
+def test_loader_does_not_construct_python_objects(tmp_path):
+    filepath = write_str_to_temp_yaml(
+        "dag: !!python/object/apply:os.getcwd []\n", tmp_path, "workflow.yml"
+    )
+    with pytest.raises(InvalidWorkflow) as excinfo:
+        YamlDefinitionLoader(str(filepath)).load()
+    assert isinstance(excinfo.value.exception, CouldNotParseYaml)